@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures what a short-lived CLI / serverless invocation pays before its first answer:
+- import time: the SDKs imported eagerly vs the deepwiki scripts with lazy imports
+- cold vs warm start: fresh processes asking one question through FastStartMCPClient,
+  without a session snapshot (cold), with one (warm), and with a stale one the server
+  rejects (revalidate), against local_tool_server.py --http with a simulated RTT
+
+Usage:
+    python bench_startup.py --runs 10 --rtt 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from bench_transports import SERVER_SCRIPT, free_port, wait_for_port
+
+HERE = Path(__file__).resolve().parent
+
+IMPORT_CASES = {
+    "eager_sdks": "import anthropic, aiohttp, openai",
+    "lazy_scripts": ("import deepwiki_anthropic_app_is_mcpclient_one_step, "
+                     "deepwiki_anthropic_app_is_mcpclient_two_step, "
+                     "deepwiki_with_anthropic_llm_is_mcpclient"),
+}
+
+
+def run_python(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=HERE, capture_output=True, text=True, check=True)
+
+
+def time_import(statement: str) -> float:
+    """Wall time of `statement` in a fresh interpreter, excluding interpreter startup"""
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    return float(run_python(["-c", code]).stdout.strip())
+
+
+def ms_summary(samples: List[float]) -> Dict[str, float]:
+    return {"median_ms": statistics.median(samples) * 1000, "min_ms": min(samples) * 1000}
+
+
+async def first_answer(url: str, cache_dir: str) -> Dict[str, Any]:
+    """Child process body: time from launch to the first ask_question answer"""
+    start = time.perf_counter()
+    from fast_start import FastStartMCPClient, SessionStore
+
+    # Importing the one-step app configures INFO logging
+    logging.getLogger().setLevel(logging.WARNING)
+    async with FastStartMCPClient(url, store=SessionStore(Path(cache_dir))) as client:
+        await client.initialize()
+        await client.list_tools()
+        await client.ask_question("openai/codex", "What is OpenAI Codex?")
+        return {"elapsed": time.perf_counter() - start, "warm": client.warm,
+                "revalidations": client.revalidations}
+
+
+def start_run(url: str, cache_dir: str) -> Dict[str, Any]:
+    launched = time.perf_counter()
+    result = json.loads(run_python([__file__, "--child", url, "--cache-dir", cache_dir]).stdout.splitlines()[-1])
+    result["wall"] = time.perf_counter() - launched
+    return result
+
+
+def stale_snapshot(url: str, cache_dir: str) -> None:
+    """Point the snapshot at a session the server never issued"""
+    from fast_start import SessionStore
+
+    store = SessionStore(Path(cache_dir))
+    snapshot = store.load(url)
+    snapshot.session_id = "expired-session"
+    store.save(snapshot)
+
+
+async def bench_starts(args) -> Dict[str, Any]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/mcp"
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, SERVER_SCRIPT, "--http", "--port", str(port), "--rtt", str(args.rtt),
+        stderr=subprocess.DEVNULL
+    )
+    runs: Dict[str, List[Dict[str, Any]]] = {"cold": [], "warm": [], "revalidate": []}
+    try:
+        await wait_for_port("127.0.0.1", port)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for _ in range(args.runs):
+                runs["cold"].append(await asyncio.to_thread(start_run, url, tempfile.mkdtemp(dir=cache_dir)))
+                runs["warm"].append(await asyncio.to_thread(start_run, url, cache_dir))
+            for _ in range(args.runs):
+                stale_snapshot(url, cache_dir)
+                runs["revalidate"].append(await asyncio.to_thread(start_run, url, cache_dir))
+    finally:
+        if process.returncode is None:
+            process.terminate()
+        await process.wait()
+
+    # The first "warm" run only primes the shared snapshot
+    runs["warm"] = runs["warm"][1:]
+    return {
+        mode: {
+            "first_answer": ms_summary([run["elapsed"] for run in results]),
+            "process_wall": ms_summary([run["wall"] for run in results]),
+            "warm_starts": sum(run["warm"] for run in results),
+            "revalidations": sum(run["revalidations"] for run in results),
+        }
+        for mode, results in runs.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and cold vs warm start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rtt", type=float, default=0.05, help="Simulated network round trip in seconds")
+    parser.add_argument("--child", metavar="URL", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(first_answer(args.child, args.cache_dir))))
+        return
+
+    report = {
+        "imports": {name: ms_summary([time_import(statement) for _ in range(args.runs)])
+                    for name, statement in IMPORT_CASES.items()},
+        "starts": asyncio.run(bench_starts(args))
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
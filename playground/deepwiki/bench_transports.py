@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Transport Benchmark
+Compares per-call latency of MCPClient.call_tool over the Streamable HTTP, stdio
+and in-process transports, all backed by local_tool_server.LocalToolServer.
+
+Usage:
+    python bench_transports.py --calls 500 --answer-bytes 4096
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient
+from local_tool_server import LocalToolServer
+from mcp_transports import InProcessTransport, StdioTransport
+
+SERVER_SCRIPT = str(Path(__file__).resolve().parent / "local_tool_server.py")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "calls": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "min_ms": min(samples) * 1000
+    }
+
+
+async def wait_for_port(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"Tool server did not start on {host}:{port}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def measure(client: MCPClient, calls: int, warmup: int) -> List[float]:
+    await client.initialize()
+    await client.list_tools()
+
+    for _ in range(warmup):
+        await client.ask_question("openai/codex", "What is OpenAI Codex?")
+
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        await client.ask_question("openai/codex", f"What is OpenAI Codex? ({i})")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_http(args) -> List[float]:
+    port = free_port()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, SERVER_SCRIPT, "--http", "--port", str(port),
+        "--answer-bytes", str(args.answer_bytes)
+    )
+    try:
+        await wait_for_port("127.0.0.1", port)
+        async with MCPClient(f"http://127.0.0.1:{port}/mcp") as client:
+            return await measure(client, args.calls, args.warmup)
+    finally:
+        if process.returncode is None:
+            process.terminate()
+        await process.wait()
+
+
+async def bench_stdio(args) -> List[float]:
+    transport = StdioTransport([sys.executable, SERVER_SCRIPT, "--stdio", "--answer-bytes", str(args.answer_bytes)])
+    async with MCPClient(transport=transport) as client:
+        return await measure(client, args.calls, args.warmup)
+
+
+async def bench_in_process(args) -> List[float]:
+    transport = InProcessTransport(LocalToolServer(answer_bytes=args.answer_bytes))
+    async with MCPClient(transport=transport) as client:
+        return await measure(client, args.calls, args.warmup)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Per-call latency across MCP transports")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--answer-bytes", type=int, default=2048)
+    parser.add_argument("--transports", default="http,stdio,in_process",
+                        help="Comma separated subset of: http, stdio, in_process")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    # Per-call INFO logs would dominate the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+
+    benches = {"http": bench_http, "stdio": bench_stdio, "in_process": bench_in_process}
+    report: Dict[str, Any] = {}
+    for name in args.transports.split(","):
+        report[name] = summarize(await benches[name](args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("MCP transport latency (ask_question)")
+    print("=" * 60)
+    print(f"{'transport':<12}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'min':>10}")
+    for name, stats in report.items():
+        print(f"{name:<12}{stats['mean_ms']:>10.3f}{stats['p50_ms']:>10.3f}"
+              f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['min_ms']:>10.3f}")
+    print("(milliseconds)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Refresh-Ahead Cache Warmer for Deep Wiki answers
+Sits alongside get_deepwiki_info and keeps popular (repoName, question) answers warm:
+- tracks request frequency per (repoName, question), persisted to a popularity file
+- pre-warms the top-K entries in the background at startup
+- refreshes popular entries before their TTL runs out, and serves stale entries
+  while revalidating them in the background (stale-while-revalidate)
+- background refreshes stay within a configurable upstream QPS budget; a user request
+  never waits for that budget (a refresh still queued for it is replaced by a direct fetch)
+- reports the fraction of requests served warm
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+Fetch = Callable[[str, str], Awaitable[str]]
+
+
+@dataclass
+class CacheEntry:
+    value: str
+    fetched_at: float
+
+
+class TokenBucket:
+    """Upstream QPS budget shared by foreground misses and background refreshes"""
+
+    def __init__(self, qps: float, burst: Optional[float] = None):
+        self.qps = qps
+        self.capacity = burst if burst is not None else max(1.0, qps)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.qps)
+        self.updated = now
+
+    def debit(self) -> None:
+        """Foreground requests never wait, but their upstream calls use up the budget"""
+        self._refill()
+        self.tokens -= 1
+
+    async def acquire(self) -> None:
+        """Background refreshes wait for budget"""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.qps)
+
+
+class RefreshAheadCache:
+    """Stale-while-revalidate cache with popularity-driven refresh-ahead"""
+
+    def __init__(self, fetch: Fetch, ttl: float = 3600.0, refresh_ahead: float = 0.8,
+                 stale_grace: float = 600.0, top_k: int = 50, qps: float = 1.0,
+                 popularity_file: Optional[str] = None, tick: float = 5.0):
+        """
+        Args:
+            fetch: async (repository, question) -> answer text, e.g. get_deepwiki_info
+            ttl: Seconds an answer is fresh
+            refresh_ahead: Popular entries are refreshed once older than refresh_ahead * ttl
+            stale_grace: Seconds past the TTL an entry may still be served while it is revalidated
+            top_k: How many of the most requested keys are kept warm
+            qps: Upstream request budget for background refreshes
+            popularity_file: JSON file the request counts are loaded from / saved to
+            tick: Scheduler interval in seconds
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.stale_grace = stale_grace
+        self.top_k = top_k
+        self.budget = TokenBucket(qps)
+        self.popularity_file = popularity_file
+        self.tick = tick
+
+        self.entries: Dict[Key, CacheEntry] = {}
+        self.popularity: Dict[Key, int] = {}
+        self._refreshing: Dict[Key, asyncio.Task] = {}
+        # Keys whose refresh is past the budget and talking to upstream
+        self._fetching: set = set()
+        # Keys whose refresh was scheduled for a cold miss; later cold misses share it
+        self._foreground: set = set()
+        self._scheduler: Optional[asyncio.Task] = None
+        self._prewarm: Optional[asyncio.Task] = None
+        self.stats = {"requests": 0, "fresh": 0, "stale": 0, "cold": 0, "cold_wait_max_s": 0.0,
+                      "refreshes": 0, "refresh_errors": 0, "prewarmed": 0, "preempted": 0}
+
+    # Popularity
+
+    def load_popularity(self) -> None:
+        if not self.popularity_file or not os.path.exists(self.popularity_file):
+            return
+        with open(self.popularity_file) as f:
+            for item in json.load(f):
+                self.popularity[(item["repoName"], item["question"])] = item["count"]
+        logger.info(f"Loaded popularity for {len(self.popularity)} questions")
+
+    def save_popularity(self) -> None:
+        if not self.popularity_file:
+            return
+        items = [{"repoName": repo, "question": question, "count": count}
+                 for (repo, question), count in sorted(self.popularity.items(), key=lambda item: -item[1])]
+        tmp_path = self.popularity_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(items, f, indent=2)
+        os.replace(tmp_path, self.popularity_file)
+
+    def top_keys(self) -> List[Key]:
+        return sorted(self.popularity, key=lambda key: -self.popularity[key])[:self.top_k]
+
+    # Requests
+
+    async def get(self, repository: str, question: str) -> str:
+        """Answer from cache when possible; only cold misses wait for upstream"""
+        key = (repository, question)
+        self.stats["requests"] += 1
+        self.popularity[key] = self.popularity.get(key, 0) + 1
+
+        entry = self.entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            age = now - entry.fetched_at
+            if age <= self.ttl:
+                self.stats["fresh"] += 1
+                return entry.value
+            if age <= self.ttl + self.stale_grace:
+                self.stats["stale"] += 1
+                self._schedule_refresh(key, background=True)
+                return entry.value
+
+        self.stats["cold"] += 1
+        task = self._refreshing.get(key)
+        if task is not None and key not in self._fetching and key not in self._foreground:
+            # Still queued behind the background budget; the user should not wait for it
+            task.cancel()
+            del self._refreshing[key]
+            self.stats["preempted"] += 1
+            task = None
+        if task is None:
+            task = self._schedule_refresh(key, background=False)
+        await asyncio.shield(task)
+        self.stats["cold_wait_max_s"] = max(self.stats["cold_wait_max_s"], time.monotonic() - now)
+        entry = self.entries.get(key)
+        if entry is None:
+            raise RuntimeError(f"Deep Wiki lookup failed for {repository}: {question}")
+        return entry.value
+
+    def _schedule_refresh(self, key: Key, background: bool) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, background))
+            self._refreshing[key] = task
+            if not background:
+                self._foreground.add(key)
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return task
+
+    def _forget(self, key: Key, task: asyncio.Task) -> None:
+        # A preempted refresh finishes after its replacement is registered
+        if self._refreshing.get(key) is task:
+            del self._refreshing[key]
+            self._foreground.discard(key)
+
+    async def _refresh(self, key: Key, background: bool) -> None:
+        if background:
+            await self.budget.acquire()
+        else:
+            self.budget.debit()
+        self._fetching.add(key)
+        try:
+            value = await self.fetch(*key)
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.warning(f"Refresh failed for {key}: {e}")
+            return
+        finally:
+            self._fetching.discard(key)
+        self.entries[key] = CacheEntry(value, time.monotonic())
+        self.stats["refreshes"] += 1
+
+    # Scheduler
+
+    async def start(self, prewarm: bool = True) -> None:
+        """Load popularity, start pre-warming the top-K in the background and start the refresh-ahead loop"""
+        self.load_popularity()
+        if prewarm:
+            self._prewarm = asyncio.create_task(self._prewarm_top())
+        self._scheduler = asyncio.create_task(self._run())
+
+    async def _prewarm_top(self) -> None:
+        keys = self.top_keys()
+        # Refreshes preempted by user requests end cancelled; their keys are warm all the same
+        await asyncio.gather(*(self._schedule_refresh(key, background=True) for key in keys), return_exceptions=True)
+        self.stats["prewarmed"] = sum(1 for key in keys if key in self.entries)
+        logger.info(f"Pre-warmed {self.stats['prewarmed']}/{len(keys)} popular questions")
+
+    async def stop(self) -> None:
+        for task in (self._prewarm, self._scheduler):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self.save_popularity()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            now = time.monotonic()
+            for key in self.top_keys():
+                entry = self.entries.get(key)
+                if entry is None or now - entry.fetched_at >= self.refresh_ahead * self.ttl:
+                    self._schedule_refresh(key, background=True)
+
+    def report(self) -> Dict[str, Any]:
+        requests = self.stats["requests"]
+        warm = self.stats["fresh"] + self.stats["stale"]
+        return dict(self.stats, warm_fraction=warm / requests if requests else 0.0, entries=len(self.entries))
+
+
+def deepwiki_cache(**kwargs) -> RefreshAheadCache:
+    """RefreshAheadCache in front of the two-step app's get_deepwiki_info"""
+    from deepwiki_anthropic_app_is_mcpclient_two_step import get_deepwiki_info
+
+    return RefreshAheadCache(get_deepwiki_info, **kwargs)
+
+
+async def simulate(args) -> Dict[str, Any]:
+    """Replay a skewed question stream against the in-process local tool server"""
+    import random
+
+    from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient
+    from local_tool_server import LocalToolServer
+    from mcp_transports import InProcessTransport
+
+    client = MCPClient(transport=InProcessTransport(LocalToolServer(delay=args.upstream_latency)))
+    await client.__aenter__()
+    await client.initialize()
+
+    async def fetch(repository: str, question: str) -> str:
+        result = await client.ask_question(repository, question)
+        return "".join(item.get("text", "") for item in result.get("content", []) if item.get("type") == "text")
+
+    cache = RefreshAheadCache(fetch, ttl=args.ttl, top_k=args.top_k, qps=args.qps,
+                              popularity_file=args.popularity_file, tick=min(1.0, args.ttl / 4))
+    await cache.start()
+
+    rng = random.Random(0)
+    questions = [("openai/codex", f"Question {i}") for i in range(args.distinct)]
+    # Zipf-like skew: a few hot questions, a long tail
+    weights = [1 / (rank + 1) for rank in range(len(questions))]
+    start = time.monotonic()
+    while time.monotonic() - start < args.duration:
+        await cache.get(*rng.choices(questions, weights=weights)[0])
+        await asyncio.sleep(rng.expovariate(args.rps))
+
+    await cache.stop()
+    await client.__aexit__(None, None, None)
+    return cache.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh-ahead cache warming simulation")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--rps", type=float, default=20.0, help="User request rate")
+    parser.add_argument("--distinct", type=int, default=200, help="Distinct questions in the stream")
+    parser.add_argument("--ttl", type=float, default=5.0)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--qps", type=float, default=5.0, help="Background refresh budget")
+    parser.add_argument("--upstream-latency", type=float, default=0.5)
+    parser.add_argument("--popularity-file", help="Persist popularity here; a second run pre-warms from it")
+    args = parser.parse_args()
+
+    logging.getLogger("deepwiki_anthropic_app_is_mcpclient_one_step").setLevel(logging.WARNING)
+    print(json.dumps(asyncio.run(simulate(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
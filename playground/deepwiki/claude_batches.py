@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Message Batches mode for ClaudeMCPApp
+Offline summarization runs submit their prompts through Anthropic's Message Batches
+API instead of one messages.create call at a time:
+- requests are built with ClaudeMCPApp.create_message_params (same system message)
+- prompts are split into batches of up to --batch-size requests
+- open batches are polled together with a backing-off interval
+- results are streamed back keyed by custom_id as soon as their batch ends
+
+A job directory holds the submitted batch ids (state.json) and every result
+received so far (results.jsonl), so a restarted run resumes: it neither resubmits
+prompts that are already in a batch nor re-emits results it has already written.
+
+Usage:
+    python fake_batches_server.py --port 8766 &
+    python claude_batches.py prompts.jsonl --job-dir runs/summaries --base-url http://127.0.0.1:8766
+
+prompts.jsonl has one {"custom_id": "...", "prompt": "..."} object per line.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterator, List
+
+from deepwiki_with_anthropic_llm_is_mcpclient import ClaudeMCPApp
+
+logger = logging.getLogger(__name__)
+
+# API limit is 100,000 requests (256 MB) per batch
+MAX_BATCH_SIZE = 100_000
+CUSTOM_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+
+class BatchJob:
+    """A resumable set of Message Batches for one offline run"""
+
+    def __init__(self, app: ClaudeMCPApp, job_dir: str, batch_size: int = 10_000,
+                 poll_interval: float = 5.0, max_poll_interval: float = 60.0):
+        """
+        Args:
+            app: ClaudeMCPApp whose client, model and system message are used
+            job_dir: Directory for state.json and results.jsonl
+            batch_size: Requests per batch (at most MAX_BATCH_SIZE)
+            poll_interval: First wait between status checks, in seconds
+            max_poll_interval: The wait grows 1.5x per round up to this
+        """
+        if not 0 < batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        self.app = app
+        self.job_dir = Path(job_dir)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.state_path = self.job_dir / "state.json"
+        self.results_path = self.job_dir / "results.jsonl"
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self.state = self._load_state()
+
+    # State
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not self.state_path.exists():
+            return {"mcp_server": None, "batches": []}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def completed_ids(self) -> set:
+        """custom_ids that already have a result in results.jsonl"""
+        if not self.results_path.exists():
+            return set()
+        with open(self.results_path, "rb+") as f:
+            data = f.read()
+            # A crash mid-write leaves a line without its newline; that result is collected again
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                logger.warning(f"Dropping {len(data) - complete} bytes of a partially written result")
+                f.truncate(complete)
+        return {json.loads(line)["custom_id"] for line in data[:complete].splitlines() if line.strip()}
+
+    def submitted_ids(self) -> set:
+        return {custom_id for batch in self.state["batches"] for custom_id in batch["custom_ids"]}
+
+    # Submit
+
+    def submit(self, prompts: Dict[str, str], mcp_server_url: str) -> List[str]:
+        """Create batches for prompts that are neither completed nor already submitted"""
+        for custom_id in prompts:
+            if not CUSTOM_ID_PATTERN.match(custom_id):
+                raise ValueError(f"Invalid custom_id {custom_id!r} (1-64 chars of a-z, A-Z, 0-9, _ and -)")
+
+        skip = self.completed_ids() | self.submitted_ids()
+        pending = [custom_id for custom_id in prompts if custom_id not in skip]
+        if len(pending) < len(prompts):
+            logger.info(f"Resuming: {len(prompts) - len(pending)} prompts already submitted or completed")
+
+        self.state["mcp_server"] = mcp_server_url
+        created = []
+        for start in range(0, len(pending), self.batch_size):
+            custom_ids = pending[start:start + self.batch_size]
+            batch = self.app.client.messages.batches.create(requests=[
+                {"custom_id": custom_id, "params": self.app.create_message_params(prompts[custom_id], mcp_server_url)}
+                for custom_id in custom_ids
+            ])
+            # Saved per batch: a crash can at worst resubmit the batch being created
+            self.state["batches"].append({"id": batch.id, "custom_ids": custom_ids, "collected": False})
+            self._save_state()
+            created.append(batch.id)
+            logger.info(f"Submitted {batch.id} with {len(custom_ids)} requests")
+        return created
+
+    # Poll and collect
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        """Poll open batches and yield each new result as soon as its batch has ended"""
+        completed = self.completed_ids()
+        interval = self.poll_interval
+        while True:
+            open_batches = [batch for batch in self.state["batches"] if not batch["collected"]]
+            if not open_batches:
+                return
+
+            progressed = False
+            processing = 0
+            for batch in open_batches:
+                status = self.app.client.messages.batches.retrieve(batch["id"])
+                if status.processing_status != "ended":
+                    processing += status.request_counts.processing
+                    continue
+                yield from self._collect(batch, completed)
+                progressed = True
+
+            if progressed:
+                interval = self.poll_interval
+            else:
+                logger.info(f"{processing} requests processing in {len(open_batches)} batches, "
+                            f"checking again in {interval:.0f}s")
+                time.sleep(interval)
+                interval = min(interval * 1.5, self.max_poll_interval)
+
+    def _collect(self, batch: Dict[str, Any], completed: set) -> Iterator[Dict[str, Any]]:
+        with open(self.results_path, "ab", buffering=0) as out:
+            for entry in self.app.client.messages.batches.results(batch["id"]):
+                if entry.custom_id in completed:
+                    continue
+                result = self._to_result(entry)
+                line = memoryview((json.dumps(result) + "\n").encode("utf-8"))
+                while line:
+                    line = line[out.write(line):]
+                # On disk before it is reported, so a resumed run never loses a result it yielded
+                os.fsync(out.fileno())
+                completed.add(entry.custom_id)
+                yield result
+        batch["collected"] = True
+        self._save_state()
+        logger.info(f"Collected {batch['id']}")
+
+    def _to_result(self, entry: Any) -> Dict[str, Any]:
+        """Same shape as ClaudeMCPApp.invoke_claude_with_mcp, keyed by custom_id"""
+        result = {"custom_id": entry.custom_id, "model": self.app.model, "mcp_server": self.state["mcp_server"]}
+        if entry.result.type == "succeeded":
+            message = entry.result.message
+            result.update({
+                "success": True,
+                "model": message.model,
+                "response": message.content[0].text,
+                "usage": {
+                    "input_tokens": message.usage.input_tokens,
+                    "output_tokens": message.usage.output_tokens
+                }
+            })
+        elif entry.result.type == "errored":
+            result.update({"success": False, "error": entry.result.error.error.message})
+        else:
+            result.update({"success": False, "error": entry.result.type})
+        return result
+
+    def run(self, prompts: Dict[str, str], mcp_server_url: str) -> Iterator[Dict[str, Any]]:
+        """Submit what is missing, then stream results until every batch is collected"""
+        self.submit(prompts, mcp_server_url)
+        yield from self.results()
+
+    def cancel(self) -> None:
+        for batch in self.state["batches"]:
+            if not batch["collected"]:
+                self.app.client.messages.batches.cancel(batch["id"])
+
+
+def load_prompts(path: str) -> Dict[str, str]:
+    prompts = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                prompts[item["custom_id"]] = item["prompt"]
+    return prompts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ClaudeMCPApp prompts through the Message Batches API")
+    parser.add_argument("prompts", help="JSONL file of {custom_id, prompt}")
+    parser.add_argument("--job-dir", required=True, help="Where batch state and results are kept (reuse it to resume)")
+    parser.add_argument("--mcp-server-url", default="https://mcp.deepwiki.com/mcp")
+    parser.add_argument("--base-url", help="Anthropic API base URL, e.g. the fake batches server")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--max-poll-interval", type=float, default=60.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # The fake endpoint accepts any key
+    api_key = os.getenv("ANTHROPIC_API_KEY") or ("local" if args.base_url else None)
+    app = ClaudeMCPApp(api_key, base_url=args.base_url)
+    job = BatchJob(app, args.job_dir, batch_size=args.batch_size,
+                   poll_interval=args.poll_interval, max_poll_interval=args.max_poll_interval)
+
+    succeeded = failed = 0
+    for result in job.run(load_prompts(args.prompts), args.mcp_server_url):
+        if result["success"]:
+            succeeded += 1
+        else:
+            failed += 1
+            print(f"{result['custom_id']}: {result['error']}")
+
+    print(f"\nNew results: {succeeded} succeeded, {failed} failed")
+    print(f"All results: {job.results_path} ({len(job.completed_ids())} total)")
+
+
+if __name__ == "__main__":
+    main()
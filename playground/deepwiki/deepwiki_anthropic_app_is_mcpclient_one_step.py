@@ -8,16 +8,24 @@ import asyncio
 import json
 import logging
 import uuid
-from typing import Dict, Any, Optional, AsyncGenerator
-import aiohttp
+from typing import Dict, Any, Optional, AsyncGenerator, AsyncIterator, Callable, List
 from dataclasses import dataclass
 from enum import Enum
-from anthropic import Anthropic
+
+from lazy_imports import lazy_import
+from model_router import ModelRouter, ModelTier, message_output
+from mcp_transports import MCPTransport, StreamableHttpTransport, ToolProgress, print_progress, progress_listener
+
+# Imported on first use, so MCP-only runs do not pay for the SDK import
+anthropic = lazy_import("anthropic")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Let ModelRouter pick the Claude model per call instead of always using Sonnet 4
+MODEL_ROUTING = False
+
 
 class MCPMessageType(Enum):
     """MCP message types according to the specification"""
@@ -37,13 +45,57 @@ class MCPMessage:
     error: Optional[Dict[str, Any]] = None
 
 
+class ToolCallStream:
+    """Async iterator over a tool call's progress updates; the result is in .result afterwards"""
+
+    def __init__(self, client: "MCPClient", tool_name: str, arguments: Dict[str, Any]):
+        self.client = client
+        self.tool_name = tool_name
+        self.arguments = arguments
+        self.result: Optional[Dict[str, Any]] = None
+        # Text of all partial content received so far
+        self.partial_text = ""
+
+    async def __aiter__(self) -> AsyncIterator[ToolProgress]:
+        updates: asyncio.Queue = asyncio.Queue()
+        call = asyncio.create_task(self.client.call_tool(self.tool_name, self.arguments, on_progress=updates.put_nowait))
+        try:
+            while not call.done() or not updates.empty():
+                if updates.empty():
+                    next_update = asyncio.ensure_future(updates.get())
+                    await asyncio.wait([next_update, call], return_when=asyncio.FIRST_COMPLETED)
+                    if not next_update.done():
+                        next_update.cancel()
+                        continue
+                    update = next_update.result()
+                else:
+                    update = updates.get_nowait()
+                self.partial_text += update.text
+                yield update
+            self.result = call.result()
+        finally:
+            # Leaving the loop early abandons the call
+            call.cancel()
+
+
 class MCPClient:
     """MCP Client implementation for Deep Wiki server"""
 
     #def __init__(self, server_url: str = "https://mcp.deepwiki.com/mcp"):
-    def __init__(self, server_url: str):
+    def __init__(self, server_url: Optional[str] = None, transport: Optional[MCPTransport] = None,
+                 http_pool: Any = None):
+        """
+        Args:
+            server_url: Streamable HTTP endpoint of the MCP server
+            transport: Alternative transport (stdio, in-process); takes precedence over server_url
+            http_pool: Shared http_pool.SharedHttpPool for the Streamable HTTP transport
+        """
+        if transport is None:
+            if not server_url:
+                raise ValueError("Either server_url or transport must be provided")
+            transport = StreamableHttpTransport(server_url, http_pool=http_pool)
         self.server_url = server_url
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.transport = transport
         self.server_capabilities: Dict[str, Any] = {}
         self.client_capabilities: Dict[str, Any] = {
             "roots": {
@@ -52,18 +104,23 @@ class MCPClient:
             "sampling": {}
         }
         self.initialized = False
-        self.mcp_session_id = ""
+
+    @property
+    def mcp_session_id(self) -> str:
+        return self.transport.session_id
+
+    @mcp_session_id.setter
+    def mcp_session_id(self, value: str) -> None:
+        self.transport.session_id = value
 
     async def __aenter__(self):
         """Async context manager entry"""
-        connector = aiohttp.TCPConnector(ssl=False)
-        self.session = aiohttp.ClientSession(connector=connector)
+        await self.transport.open()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        await self.transport.close()
 
     def generate_request_id(self) -> str:
         """Generate unique request ID"""
@@ -86,12 +143,8 @@ class MCPClient:
             params=params or {}
         )
 
-    async def send_streaming_request(self, message: MCPMessage) -> Dict[str, Any]:
-        """Send request using HTTP Streaming transport"""
-        if not self.session:
-            raise RuntimeError("Session not initialized. Use async context manager.")
-
-        # Convert message to JSON
+    def to_json_rpc(self, message: MCPMessage) -> Dict[str, Any]:
+        """Wire form of a request or notification (notifications have no id)"""
         message_data = {
             "jsonrpc": message.jsonrpc,
             "method": message.method,
@@ -101,110 +154,46 @@ class MCPClient:
         if message.id:
             message_data["id"] = message.id
 
+        return message_data
+
+    async def send_streaming_request(self, message: MCPMessage,
+                                     on_message: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+        """Send request through the configured transport
+
+        on_message receives the server messages (e.g. notifications/progress) sent before the response.
+        """
+        if not self.transport.connected:
+            raise RuntimeError("Session not initialized. Use async context manager.")
+
+        message_data = self.to_json_rpc(message)
+
         logger.info(f"Sending streaming request: {message.method}")
         logger.debug(f"Request data: {json.dumps(message_data, indent=2)}")
 
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/event-stream"  # New-line delimited JSON for streaming
-        }
-        if self.mcp_session_id != "":
-            headers["Mcp-Session-Id"] = self.mcp_session_id
-
         try:
-            async with self.session.post(
-                    self.server_url,
-                    json=message_data,
-                    headers=headers,
-                    # headers={
-                    #     "Content-Type": "application/json",
-                    #     "Accept": "application/json, text/event-stream",  # New-line delimited JSON for streaming
-                    #     #"Accept": "application/x-ndjson"  # New-line delimited JSON for streaming
-                    #     #text/event-stream
-                    #     #"Mcp-Session-Id": self.mcp_session_id
-                    # },
-                    ssl=False
-            ) as response:
-                if response.status != 200:
-                    raise RuntimeError(f"HTTP {response.status}: {await response.text()}")
-
-                self.mcp_session_id = response.headers["Mcp-Session-Id"]
-
-                # Handle streaming response
-                full_response = ""
-                async for chunk in response.content.iter_chunked(1024):
-                    chunk_text = chunk.decode('utf-8')
-                    full_response += chunk_text
-
-                # Parse the response - it might be multiple JSON objects separated by newlines
-                response_lines = [line.strip() for line in full_response.split('\n') if line.strip()]
-
-                # For most MCP responses, we expect a single JSON object
-                # But streaming responses might have multiple parts
-                final_response = None
-                for line in response_lines:
-                    line = line.replace("data: ", "")
-                    print(line)
-                    try:
-                        parsed_line = json.loads(line)
-                        # Look for the response with matching ID or the final result
-                        if message.id and parsed_line.get("id") == message.id:
-                            final_response = parsed_line
-                            break
-                        elif "result" in parsed_line or "error" in parsed_line:
-                            final_response = parsed_line
-                    except json.JSONDecodeError:
-                        continue
-
-                if final_response is None:
-                    # If no structured response found, try parsing the whole thing
-                    try:
-                        final_response = json.loads(full_response)
-                    except json.JSONDecodeError:
-                        raise RuntimeError(f"Could not parse streaming response: {full_response}")
+            final_response = await self.transport.send_request(message_data, on_message=on_message)
 
-                logger.info(f"Received streaming response for: {message.method}")
-                logger.debug(f"Response data: {json.dumps(final_response, indent=2)}")
+            logger.info(f"Received streaming response for: {message.method}")
+            logger.debug(f"Response data: {json.dumps(final_response, indent=2)}")
 
-                return final_response
+            return final_response
 
         except Exception as e:
             logger.error(f"Error sending streaming request: {e}")
             raise
 
     async def send_notification(self, message: MCPMessage) -> None:
-        """Send notification to MCP server using streaming transport"""
-        if not self.session:
+        """Send notification to MCP server through the configured transport"""
+        if not self.transport.connected:
             raise RuntimeError("Session not initialized. Use async context manager.")
 
-        # Convert message to JSON
-        message_data = {
-            "jsonrpc": message.jsonrpc,
-            "method": message.method,
-            "params": message.params or {}
-        }
+        message_data = self.to_json_rpc(message)
 
         logger.info(f"Sending streaming notification: {message.method}")
         logger.debug(f"Notification data: {json.dumps(message_data, indent=2)}")
 
         try:
-            async with self.session.post(
-                    self.server_url,
-                    json=message_data,
-                    headers={
-                        "Content-Type": "application/json",
-                        #"Accept": "application/x-ndjson"
-                        "Accept": "application/json, text/event-stream",
-                        "Mcp-Session-Id": self.mcp_session_id
-                    },
-                    ssl=False
-            ) as response:
-                if response.status != 200:
-                    logger.warning(f"Notification HTTP {response.status}: {await response.text()}")
-
-                # Consume the response even for notifications
-                async for chunk in response.content.iter_chunked(1024):
-                    pass  # Just consume the stream
+            await self.transport.send_notification(message_data)
 
         except Exception as e:
             logger.error(f"Error sending streaming notification: {e}")
@@ -259,56 +248,87 @@ class MCPClient:
 
         return response.get("result", {})
 
-    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Call a specific tool with given arguments"""
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any],
+                        on_progress: Optional[Callable[[ToolProgress], Any]] = None) -> Dict[str, Any]:
+        """Call a specific tool with given arguments
+
+        With on_progress (a function or coroutine function), the request carries a progressToken
+        and every notifications/progress for it is passed on as a ToolProgress while the tool runs.
+        """
         if not self.initialized:
             raise RuntimeError("Client not initialized. Call initialize() first.")
 
         logger.info(f"Calling tool: {tool_name}")
         logger.debug(f"Tool arguments: {json.dumps(arguments, indent=2)}")
 
-        tool_request = self.create_request("tools/call", {
+        params = {
             "name": tool_name,
             "arguments": arguments
-        })
+        }
+        on_message = None
+        if on_progress is not None:
+            progress_token = self.generate_request_id()
+            params["_meta"] = {"progressToken": progress_token}
+            on_message = progress_listener(progress_token, on_progress)
+
+        tool_request = self.create_request("tools/call", params)
 
-        response = await self.send_streaming_request(tool_request)
+        response = await self.send_streaming_request(tool_request, on_message=on_message)
 
         if "error" in response:
             raise RuntimeError(f"Tool call failed: {response['error']}")
 
         return response.get("result", {})
 
-    async def ask_question(self, repository: str, question: str) -> Dict[str, Any]:
+    def stream_tool(self, tool_name: str, arguments: Dict[str, Any]) -> ToolCallStream:
+        """Call a tool and iterate over its progress updates:
+
+            stream = client.stream_tool("ask_question", {...})
+            async for update in stream:
+                print(update.progress, update.text)
+            result = stream.result
+        """
+        return ToolCallStream(self, tool_name, arguments)
+
+    async def ask_question(self, repository: str, question: str,
+                           on_progress: Optional[Callable[[ToolProgress], Any]] = None) -> Dict[str, Any]:
         """Ask a question about a GitHub repository using the ask_question tool"""
         return await self.call_tool("ask_question", {
             "repoName": repository,
             "question": question
-        })
+        }, on_progress=on_progress)
 
 
 class ClaudeClient:
     """Client for interacting with Claude Sonnet 4"""
 
-    def __init__(self, api_key: str):
-        self.client = Anthropic(api_key=api_key)
+    def __init__(self, api_key: str, router: Optional[ModelRouter] = None):
+        self.client = anthropic.Anthropic(api_key=api_key)
         self.model = "claude-sonnet-4-20250514"
+        # Picks the model per call when set (see model_router.py)
+        self.router = router
 
     #    async def generate_response(self, prompt: str, context: Optional[str] = None) -> str:
-    async def generate_response(self, prompt: str, context: Optional[str] = None):
-        """Generate a response using Claude Sonnet 4"""
+    async def generate_response(self, prompt: str, context: Optional[str] = None, quality: str = "standard"):
+        """Generate a response using Claude Sonnet 4 (or the routed model)"""
         try:
             full_prompt = prompt
             if context:
                 full_prompt = f"Context: {context}\n\nQuery: {prompt}"
 
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=4000,
-                messages=[
-                    {"role": "user", "content": full_prompt}
-                ]
-            )
+            async def create(tier: Optional[ModelTier] = None):
+                return self.client.messages.create(
+                    model=tier.model if tier else self.model,
+                    max_tokens=tier.max_tokens if tier else 4000,
+                    messages=[
+                        {"role": "user", "content": full_prompt}
+                    ]
+                )
+
+            if self.router:
+                message = await self.router.run(create, len(full_prompt), message_output, quality)
+            else:
+                message = await create()
 
             # return message.content[0].text
             return message
@@ -342,12 +362,13 @@ async def main():
             logger.info("✓ Asking question about OpenAI Codex...")
             result = await client.ask_question(
                 repository="openai/codex",
-                question="What is OpenAI Codex?"
+                question="What is OpenAI Codex?",
+                on_progress=print_progress
             )
 
             logger.info("✓ Question answered successfully!")
 
-            claude = ClaudeClient(CLAUDE_API_KEY)
+            claude = ClaudeClient(CLAUDE_API_KEY, router=ModelRouter() if MODEL_ROUTING else None)
             response = await claude.generate_response(prompt="Based on its specification, provide a summary of the main points about OpenAI Codex", context=result['content'][0]['text'])
 
             logger.info("Answer:")
@@ -363,6 +384,10 @@ async def main():
             print(response)
             print("-" * 80)
 
+            if claude.router:
+                print("ROUTING:")
+                print(json.dumps(claude.router.metrics(), indent=2))
+
         except Exception as e:
             logger.error(f"Error: {e}")
             raise
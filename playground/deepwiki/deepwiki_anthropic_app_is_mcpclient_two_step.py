@@ -12,10 +12,17 @@ import asyncio
 import json
 import logging
 import uuid
-from typing import Dict, Any, Optional, List
-import aiohttp
+from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass
 
+from http_pool import SharedHttpPool
+from lazy_imports import lazy_import
+from mcp_transports import ToolProgress, print_progress, progress_listener, read_streaming_response
+from model_router import ModelRouter, ModelTier, json_output
+
+# Imported on first use to keep startup fast
+aiohttp = lazy_import("aiohttp")
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +31,13 @@ logger = logging.getLogger(__name__)
 ANTHROPIC_API_KEY = "your-anthropic-api-key-here"  # Replace with your API key
 ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
 DEEPWIKI_MCP_URL = "https://mcp.deepwiki.com/mcp"
+# Start a guessed Deep Wiki query while Claude's first turn is running (see speculative_prefetch.py)
+SPECULATIVE_PREFETCH = False
+TOOL_HISTORY_FILE = "deepwiki_tool_history.jsonl"
+# Let ModelRouter pick the Claude model per call instead of always using Sonnet 4 (see model_router.py)
+MODEL_ROUTING = False
+# Keep every tool result and Claude transcript in a compressed, deduplicated store (see audit_store.py)
+AUDIT_STORE_DIR = None  # e.g. "deepwiki_audit"
 
 
 @dataclass
@@ -40,8 +54,9 @@ class MCPMessage:
 class MCPClient:
     """MCP Client for Deep Wiki server using HTTP Streaming"""
 
-    def __init__(self, server_url: str = DEEPWIKI_MCP_URL):
+    def __init__(self, server_url: str = DEEPWIKI_MCP_URL, http_pool: Optional[SharedHttpPool] = None):
         self.server_url = server_url
+        self.http_pool = http_pool
         self.session: Optional[aiohttp.ClientSession] = None
         self.server_capabilities: Dict[str, Any] = {}
         self.client_capabilities: Dict[str, Any] = {
@@ -52,12 +67,16 @@ class MCPClient:
         self.initialized = False
 
     async def __aenter__(self):
+        if self.http_pool:
+            await self.http_pool.open()
+            self.session = self.http_pool.session
+            return self
         connector = aiohttp.TCPConnector(ssl=False)
         self.session = aiohttp.ClientSession(connector=connector)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self.session and not self.http_pool:
             await self.session.close()
 
     def generate_request_id(self) -> str:
@@ -78,8 +97,11 @@ class MCPClient:
             params=params or {}
         )
 
-    async def send_streaming_request(self, message: MCPMessage) -> Dict[str, Any]:
-        """Send request using HTTP Streaming transport"""
+    async def send_streaming_request(self, message: MCPMessage, on_message: Optional[Callable] = None) -> Dict[str, Any]:
+        """Send request using HTTP Streaming transport
+
+        on_message receives the server messages (e.g. notifications/progress) sent before the response.
+        """
         if not self.session:
             raise RuntimeError("Session not initialized.")
 
@@ -113,6 +135,11 @@ class MCPClient:
 
                 self.mcp_session_id = response.headers["Mcp-Session-Id"]
 
+                if on_message is not None:
+                    final_response = await read_streaming_response(response, message.id, on_message)
+                    logger.info(f"MCP Response received for: {message.method}")
+                    return final_response
+
                 # Handle streaming response
                 full_response = ""
                 async for chunk in response.content.iter_chunked(1024):
@@ -226,20 +253,28 @@ class MCPClient:
 
         return response.get("result", {})
 
-    async def ask_question(self, repository: str, question: str) -> Dict[str, Any]:
-        """Ask question using the ask_question tool"""
+    async def ask_question(self, repository: str, question: str,
+                           on_progress: Optional[Callable[[ToolProgress], Any]] = None) -> Dict[str, Any]:
+        """Ask question using the ask_question tool (progress updates go to on_progress while it runs)"""
         if not self.initialized:
             raise RuntimeError("Client not initialized")
 
-        tool_request = self.create_request("tools/call", {
+        params = {
             "name": "ask_question",
             "arguments": {
                 "repoName": repository,
                 "question": question
             }
-        })
+        }
+        on_message = None
+        if on_progress is not None:
+            progress_token = self.generate_request_id()
+            params["_meta"] = {"progressToken": progress_token}
+            on_message = progress_listener(progress_token, on_progress)
+
+        tool_request = self.create_request("tools/call", params)
 
-        response = await self.send_streaming_request(tool_request)
+        response = await self.send_streaming_request(tool_request, on_message=on_message)
 
         if "error" in response:
             raise RuntimeError(f"Tool call failed: {response['error']}")
@@ -250,30 +285,31 @@ class MCPClient:
 class ClaudeClient:
     """Client for Claude Sonnet 4 API"""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http_pool: Optional[SharedHttpPool] = None, router: Optional[ModelRouter] = None):
         self.api_key = api_key
+        self.http_pool = http_pool
         self.session: Optional[aiohttp.ClientSession] = None
+        # Picks the model per call when set (see model_router.py)
+        self.router = router
 
     async def __aenter__(self):
+        if self.http_pool:
+            await self.http_pool.open()
+            self.session = self.http_pool.session
+            return self
         self.session = aiohttp.ClientSession()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self.session and not self.http_pool:
             await self.session.close()
 
-    async def send_message(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> Dict[
-        str, Any]:
-        """Send message to Claude API"""
+    async def send_message(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None,
+                           quality: str = "standard") -> Dict[str, Any]:
+        """Send message to Claude API (on the routed model when a router is set)"""
         if not self.session:
             raise RuntimeError("Session not initialized")
 
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01"
-        }
-
         payload = {
             "model": "claude-sonnet-4-20250514",
             "max_tokens": 4000,
@@ -283,7 +319,24 @@ class ClaudeClient:
         if tools:
             payload["tools"] = tools
 
-        logger.info("Sending request to Claude...")
+        if not self.router:
+            return await self._post(payload)
+
+        async def post(tier: ModelTier) -> Dict[str, Any]:
+            return await self._post(dict(payload, model=tier.model, max_tokens=tier.max_tokens))
+
+        # Prompt, earlier turns and tool results all count towards the input size
+        input_chars = len(json.dumps(messages)) + (len(json.dumps(tools)) if tools else 0)
+        return await self.router.run(post, input_chars, json_output, quality)
+
+    async def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        headers = {
+            "Content-Type": "application/json",
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01"
+        }
+
+        logger.info(f"Sending request to Claude ({payload['model']})...")
 
         try:
             async with self.session.post(ANTHROPIC_API_URL, json=payload, headers=headers, ssl=False) as response:
@@ -300,11 +353,12 @@ class ClaudeClient:
             raise
 
 
-async def get_deepwiki_info(repository: str, question: str) -> str:
-    """Get information from Deep Wiki MCP server"""
+async def get_deepwiki_info(repository: str, question: str, http_pool: Optional[SharedHttpPool] = None,
+                            on_progress: Optional[Callable[[ToolProgress], Any]] = None) -> str:
+    """Get information from Deep Wiki MCP server (on_progress gets partial answers while it runs)"""
     logger.info(f"Querying Deep Wiki for: {repository}")
 
-    async with MCPClient() as mcp_client:
+    async with MCPClient(http_pool=http_pool) as mcp_client:
         # Initialize MCP connection
         await mcp_client.initialize()
 
@@ -313,16 +367,20 @@ async def get_deepwiki_info(repository: str, question: str) -> str:
         logger.info(f"Available MCP tools: {[tool.get('name') for tool in tools.get('tools', [])]}")
 
         # Ask the question
-        result = await mcp_client.ask_question(repository, question)
+        result = await mcp_client.ask_question(repository, question, on_progress=on_progress)
+
+        return extract_text(result)
 
-        # Extract text content from result
-        content_text = ""
-        if "content" in result:
-            for content_item in result["content"]:
-                if content_item.get("type") == "text":
-                    content_text += content_item.get("text", "")
 
-        return content_text or str(result)
+def extract_text(result: Dict[str, Any]) -> str:
+    """Text content of a tools/call result (the whole result as a string if it has none)"""
+    content_text = ""
+    if "content" in result:
+        for content_item in result["content"]:
+            if content_item.get("type") == "text":
+                content_text += content_item.get("text", "")
+
+    return content_text or str(result)
 
 
 async def main():
@@ -354,7 +412,29 @@ async def main():
         }
     }
 
-    async with ClaudeClient(ANTHROPIC_API_KEY) as claude:
+    # One connection pool for Claude and Deep Wiki, so keep-alive connections are reused across calls
+    http_pool = SharedHttpPool()
+
+    router = ModelRouter() if MODEL_ROUTING else None
+
+    # Opened once for the whole run, not per exchange
+    audit_store = None
+    if AUDIT_STORE_DIR:
+        from audit_store import TranscriptStore
+
+        audit_store = TranscriptStore(AUDIT_STORE_DIR)
+
+    try:
+        await run_exchange(deepwiki_tool, http_pool, router, audit_store)
+    finally:
+        if audit_store:
+            audit_store.close()
+
+
+async def run_exchange(deepwiki_tool: Dict[str, Any], http_pool: SharedHttpPool, router: Optional[ModelRouter],
+                       audit_store: Any) -> None:
+    """Ask Claude, run the Deep Wiki tool call it requests and print the final answer"""
+    async with http_pool, ClaudeClient(ANTHROPIC_API_KEY, http_pool=http_pool, router=router) as claude:
         # Step 1: Initial request to Claude with tool definition
         print("\n1. Sending initial request to Claude with tool definition...")
 
@@ -363,6 +443,17 @@ async def main():
             "content": "Based on its specification, provide a summary of the main points about OpenAI Codex"
         }]
 
+        prefetcher = speculation = None
+        if SPECULATIVE_PREFETCH:
+            from speculative_prefetch import ArgumentGuesser, SpeculativePrefetcher
+
+            prefetcher = SpeculativePrefetcher(
+                lambda repository, question, on_progress: get_deepwiki_info(repository, question, http_pool=http_pool,
+                                                                            on_progress=on_progress),
+                ArgumentGuesser(TOOL_HISTORY_FILE)
+            )
+            speculation = prefetcher.start(initial_messages[0]["content"])
+
         response1 = await claude.send_message(initial_messages, tools=[deepwiki_tool])
 
         print("Claude's initial response:")
@@ -388,7 +479,13 @@ async def main():
                 question = tool_use['input'].get('question', 'What is OpenAI Codex?')
 
                 try:
-                    deepwiki_result = await get_deepwiki_info(repository, question)
+                    # Partial answers are shown as they stream in; Claude gets the complete result
+                    if prefetcher:
+                        deepwiki_result = await prefetcher.resolve(speculation, repository, question,
+                                                                   on_progress=print_progress)
+                    else:
+                        deepwiki_result = await get_deepwiki_info(repository, question, http_pool=http_pool,
+                                                                  on_progress=print_progress)
                     print(f"Deep Wiki result obtained ({len(deepwiki_result)} characters)")
 
                     # Step 3: Send results back to Claude
@@ -408,6 +505,14 @@ async def main():
 
                     final_response = await claude.send_message(followup_messages)
 
+                    if audit_store:
+                        # The whole conversation: prompt, tool_use turn, tool_result turn and final answer
+                        conversation = followup_messages + [{"role": "assistant",
+                                                             "content": final_response.get("content", [])}]
+                        audit_store.record(repository, question, deepwiki_result, final_response,
+                                           messages=conversation, model=final_response.get("model"),
+                                           tool_use_id=tool_use["id"], initial_response=response1.get("id"))
+
                     # Step 4: Display final results
                     print("\n5. Final Results:")
                     print("=" * 60)
@@ -437,6 +542,18 @@ async def main():
                 if content.get("type") == "text":
                     print(content.get("text", ""))
 
+        if prefetcher:
+            prefetcher.discard(speculation)
+            print("\nSpeculative prefetch:")
+            print(json.dumps(prefetcher.report(), indent=2))
+
+        if router:
+            print("\nModel routing:")
+            print(json.dumps(router.metrics(), indent=2))
+
+        print("\nHTTP connection pool:")
+        print(json.dumps(http_pool.stats(), indent=2))
+
 
 if __name__ == "__main__":
     print("Required dependencies:")
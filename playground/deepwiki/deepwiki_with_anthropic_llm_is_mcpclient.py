@@ -6,24 +6,32 @@ Invokes Claude with Deep Wiki MCP Server for OpenAI Codex research
 
 import os
 import json
-from anthropic import Anthropic
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from lazy_imports import lazy_import
+from model_router import ModelRouter, ModelTier, message_output
+
+# Imported on first use to keep startup fast
+anthropic = lazy_import("anthropic")
 
 
 class ClaudeMCPApp:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, router: Optional[ModelRouter] = None):
         """
         Initialize the Claude MCP application
 
         Args:
             api_key: Anthropic API key (if not provided, reads from ANTHROPIC_API_KEY env var)
+            base_url: Alternative API endpoint, e.g. a local fake (defaults to the SDK's)
+            router: Picks the model per request instead of always using self.model
         """
         self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
         if not self.api_key:
             raise ValueError("API key must be provided or set in ANTHROPIC_API_KEY environment variable")
 
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = anthropic.Anthropic(api_key=self.api_key, base_url=base_url)
         self.model = "claude-sonnet-4-20250514"
+        self.router = router
 
     def create_mcp_system_message(self, mcp_server_url: str) -> str:
         """
@@ -46,6 +54,36 @@ When responding to queries that require external information lookup, you should:
 
 The MCP server at {mcp_server_url} specializes in wiki-based knowledge retrieval and should be your primary source for factual information."""
 
+    def create_message_params(self, prompt: str, mcp_server_url: str,
+                              tier: Optional[ModelTier] = None) -> Dict[str, Any]:
+        """
+        Build the Messages API parameters for a prompt (shared by single and batch invocations)
+
+        Args:
+            prompt: The user prompt to send to Claude
+            mcp_server_url: URL of the MCP server Claude should use
+            tier: Model tier to use; routed from the prompt size when a router is set and no tier is given.
+                That selection is not counted in the router's metrics, since no latency or
+                outcome is reported back for it (batches)
+
+        Returns:
+            Keyword arguments for messages.create
+        """
+        if tier is None and self.router:
+            tier = self.router.route(len(prompt), record=False).tier
+        return {
+            "model": tier.model if tier else self.model,
+            "max_tokens": tier.max_tokens if tier else 4096,
+            "temperature": 0.1,
+            "system": self.create_mcp_system_message(mcp_server_url),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        }
+
     def invoke_claude_with_mcp(self, prompt: str, mcp_server_url: str) -> Dict[str, Any]:
         """
         Invoke Claude Sonnet 4 with MCP server configuration
@@ -57,27 +95,20 @@ The MCP server at {mcp_server_url} specializes in wiki-based knowledge retrieval
         Returns:
             Dictionary containing the response and metadata
         """
-        system_message = self.create_mcp_system_message(mcp_server_url)
-
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                temperature=0.1,
-                system=system_message,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
+            if self.router:
+                response = self.router.run_sync(
+                    lambda tier: self.client.messages.create(**self.create_message_params(prompt, mcp_server_url, tier)),
+                    len(prompt), message_output
+                )
+            else:
+                response = self.client.messages.create(**self.create_message_params(prompt, mcp_server_url))
 
             return {
                 "success": True,
                 "response": response.content[0].text,
                 "raw": response,
-                "model": self.model,
+                "model": response.model,
                 "usage": {
                     "input_tokens": response.usage.input_tokens,
                     "output_tokens": response.usage.output_tokens
@@ -1,22 +1,204 @@
-from openai import OpenAI
-
-client = OpenAI()
-
-resp = client.responses.create(
-    #model="gpt-4.1",
-    model="gpt-4o-mini",
-    tools=[
-        {
-            "type": "mcp",
-            "server_label": "deepwiki",
-            "server_url": "https://mcp.deepwiki.com/mcp",
-            "require_approval": "never",
-        },
-    ],
-    input="What is OpenAI Codex?"
-)
-
-print("SUMMARY\n---\n")
-print(resp.output_text)
-print("\n\n\nDETAILS\n---\n")
-print(resp)
+#!/usr/bin/env python3
+"""
+OpenAI Responses API with the Deep Wiki MCP server as a hosted tool
+
+    python deepwiki_with_openai_llm_is_mcpclient.py               # one blocking question
+    python deepwiki_with_openai_llm_is_mcpclient.py --concurrent  # streamed question threads
+
+--concurrent runs several question threads at once with AsyncOpenAI and streams their
+events. Follow-ups in a thread are chained through previous_response_id, so OpenAI
+keeps the earlier mcp_list_tools output and context instead of re-listing the Deep
+Wiki tools and re-sending the conversation. Per-question latency and token usage
+are reported at the end.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+from lazy_imports import lazy_import
+
+# Imported on first use to keep startup fast
+openai = lazy_import("openai")
+
+MODEL = "gpt-4o-mini"
+
+DEEPWIKI_TOOL = {
+    "type": "mcp",
+    "server_label": "deepwiki",
+    "server_url": "https://mcp.deepwiki.com/mcp",
+    "require_approval": "never",
+}
+
+# Each thread is a first question followed by follow-ups that rely on its context
+DEFAULT_THREADS = [
+    ["What is OpenAI Codex (openai/codex)?",
+     "How does it sandbox the shell commands it runs?",
+     "Which configuration options control that sandbox?"],
+    ["What transports does modelcontextprotocol/python-sdk support?",
+     "How is Streamable HTTP session management implemented there?"],
+    ["How does openai/openai-agents-python trace agent runs?",
+     "How would I plug in a custom trace processor?"],
+]
+
+
+def ask_once():
+    """Original single blocking request"""
+    client = openai.OpenAI()
+
+    resp = client.responses.create(
+        #model="gpt-4.1",
+        model=MODEL,
+        tools=[DEEPWIKI_TOOL],
+        input="What is OpenAI Codex?"
+    )
+
+    print("SUMMARY\n---\n")
+    print(resp.output_text)
+    print("\n\n\nDETAILS\n---\n")
+    print(resp)
+
+
+@dataclass
+class QuestionStats:
+    """Latency and usage of one streamed question"""
+    thread: int
+    turn: int
+    question: str
+    response_id: str = ""
+    latency: float = 0.0
+    time_to_first_token: Optional[float] = None
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    listed_tools: bool = False
+    mcp_calls: int = 0
+    error: Optional[str] = None
+
+
+async def ask_streaming(client, question: str, stats: QuestionStats, previous_response_id: Optional[str],
+                        echo: bool):
+    """Stream one question; returns the completed response (or None on failure)"""
+    start = time.perf_counter()
+    response = None
+    stream = await client.responses.create(
+        model=MODEL,
+        tools=[DEEPWIKI_TOOL],
+        input=question,
+        previous_response_id=previous_response_id,
+        stream=True
+    )
+    async for event in stream:
+        if event.type == "response.output_text.delta":
+            if stats.time_to_first_token is None:
+                stats.time_to_first_token = time.perf_counter() - start
+            if echo:
+                print(event.delta, end="", flush=True)
+        elif event.type == "response.mcp_list_tools.completed":
+            stats.listed_tools = True
+            if echo:
+                print("[deepwiki tools listed]", flush=True)
+        elif event.type == "response.mcp_call.completed":
+            stats.mcp_calls += 1
+            if echo:
+                print("[deepwiki tool call completed]", flush=True)
+        elif event.type == "response.completed":
+            response = event.response
+        elif event.type == "response.failed":
+            stats.error = str(event.response.error)
+        elif event.type == "error":
+            stats.error = event.message
+
+    stats.latency = time.perf_counter() - start
+    if response is not None:
+        stats.response_id = response.id
+        usage = response.usage
+        if usage is not None:
+            stats.input_tokens = usage.input_tokens
+            stats.output_tokens = usage.output_tokens
+            details = usage.input_tokens_details
+            stats.cached_tokens = details.cached_tokens if details else 0
+    return response
+
+
+async def run_thread(client, thread: int, questions: List[str], semaphore: asyncio.Semaphore,
+                     echo: bool) -> List[QuestionStats]:
+    """Ask a thread's questions in order, each chained to the previous response"""
+    results = []
+    previous_response_id = None
+    async with semaphore:
+        for turn, question in enumerate(questions):
+            stats = QuestionStats(thread, turn, question)
+            results.append(stats)
+            if echo:
+                print(f"\n>>> [{thread}.{turn}] {question}\n", flush=True)
+            try:
+                response = await ask_streaming(client, question, stats, previous_response_id, echo)
+            except Exception as e:
+                stats.error = str(e)
+                break
+            if response is None:
+                break
+            if not echo:
+                print(f"\n>>> [{thread}.{turn}] {question}\n{response.output_text}", flush=True)
+            previous_response_id = response.id
+    return results
+
+
+async def run_concurrent(threads: List[List[str]], concurrency: int) -> List[QuestionStats]:
+    client = openai.AsyncOpenAI()
+    semaphore = asyncio.Semaphore(concurrency)
+    # Interleaved deltas from several threads would be unreadable; only echo them one thread at a time
+    echo = concurrency == 1 or len(threads) == 1
+    start = time.perf_counter()
+    per_thread = await asyncio.gather(*(run_thread(client, i, questions, semaphore, echo)
+                                        for i, questions in enumerate(threads)))
+    wall = time.perf_counter() - start
+    results = [stats for thread_stats in per_thread for stats in thread_stats]
+    print_report(results, wall)
+    return results
+
+
+def print_report(results: List[QuestionStats], wall: float) -> None:
+    print("\n\nPER QUESTION\n---\n")
+    print(f"{'q':<6}{'latency':>9}{'ttft':>8}{'in':>8}{'cached':>8}{'out':>7}{'tools':>7}{'calls':>7}")
+    for stats in results:
+        ttft = f"{stats.time_to_first_token:.2f}" if stats.time_to_first_token is not None else "-"
+        print(f"{stats.thread}.{stats.turn:<4}{stats.latency:>9.2f}{ttft:>8}{stats.input_tokens:>8}"
+              f"{stats.cached_tokens:>8}{stats.output_tokens:>7}{'list' if stats.listed_tools else '-':>7}"
+              f"{stats.mcp_calls:>7}" + (f"  error: {stats.error}" if stats.error else ""))
+    total_latency = sum(stats.latency for stats in results)
+    print(f"\n{len(results)} questions in {wall:.2f}s wall ({total_latency:.2f}s if asked one by one), "
+          f"tools listed {sum(stats.listed_tools for stats in results)} times, "
+          f"{sum(stats.input_tokens for stats in results)} input / "
+          f"{sum(stats.output_tokens for stats in results)} output tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deep Wiki questions through the OpenAI Responses API")
+    parser.add_argument("--concurrent", action="store_true", help="Stream question threads concurrently")
+    parser.add_argument("--threads", help="JSON file with a list of question threads (lists of questions)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads in flight at once")
+    parser.add_argument("--stats-json", help="Write per-question stats to this file")
+    args = parser.parse_args()
+
+    if not args.concurrent:
+        ask_once()
+        return
+
+    threads = DEFAULT_THREADS
+    if args.threads:
+        with open(args.threads) as f:
+            threads = json.load(f)
+
+    results = asyncio.run(run_concurrent(threads, args.concurrency))
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump([asdict(stats) for stats in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
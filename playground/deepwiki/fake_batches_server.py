@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Fake Message Batches Endpoint
+Local stand-in for Anthropic's Message Batches API, enough for the official SDK
+(`Anthropic(base_url="http://127.0.0.1:8766")`) and claude_batches.py:
+- POST /v1/messages/batches                   create a batch
+- GET  /v1/messages/batches/{id}              retrieve / poll
+- GET  /v1/messages/batches/{id}/results      JSONL results once the batch has ended
+- POST /v1/messages/batches/{id}/cancel       cancel
+
+Each batch "processes" for --process-seconds; answers echo the prompt, and
+--error-rate of the requests come back errored.
+
+Usage:
+    python fake_batches_server.py --port 8766 --process-seconds 3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class FakeBatches:
+    """In-memory batches whose results become available after a fixed processing time"""
+
+    def __init__(self, base_url: str, process_seconds: float = 3.0, error_rate: float = 0.0):
+        self.base_url = base_url
+        self.process_seconds = process_seconds
+        self.error_rate = error_rate
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.rng = random.Random(0)
+
+    def create(self, requests: list) -> Dict[str, Any]:
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        self.batches[batch_id] = {
+            "created": time.time(),
+            "canceled": False,
+            "results": [self._result(request) for request in requests]
+        }
+        logger.info(f"Created {batch_id} with {len(requests)} requests")
+        return self.describe(batch_id)
+
+    def _result(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        params = request["params"]
+        if self.rng.random() < self.error_rate:
+            return {"custom_id": request["custom_id"],
+                    "result": {"type": "errored",
+                               "error": {"type": "error",
+                                         "error": {"type": "overloaded_error", "message": "Overloaded"}}}}
+        prompt = params["messages"][-1]["content"]
+        text = f"Summary for: {prompt}"
+        return {
+            "custom_id": request["custom_id"],
+            "result": {
+                "type": "succeeded",
+                "message": {
+                    "id": f"msg_{uuid.uuid4().hex[:24]}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": params["model"],
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": (len(params.get("system", "")) + len(prompt)) // 4,
+                              "output_tokens": len(text) // 4}
+                }
+            }
+        }
+
+    def ended(self, batch_id: str) -> bool:
+        batch = self.batches[batch_id]
+        return batch["canceled"] or time.time() - batch["created"] >= self.process_seconds
+
+    def describe(self, batch_id: str) -> Dict[str, Any]:
+        batch = self.batches[batch_id]
+        ended = self.ended(batch_id)
+        results = batch["results"]
+        counts = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        if not ended:
+            counts["processing"] = len(results)
+        elif batch["canceled"]:
+            counts["canceled"] = len(results)
+        else:
+            for result in results:
+                counts[result["result"]["type"]] += 1
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": counts,
+            "created_at": _iso(batch["created"]),
+            "expires_at": _iso(batch["created"] + timedelta(days=1).total_seconds()),
+            "ended_at": _iso(batch["created"] + self.process_seconds) if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{self.base_url}/v1/messages/batches/{batch_id}/results" if ended else None
+        }
+
+    def results(self, batch_id: str) -> str:
+        batch = self.batches[batch_id]
+        results = batch["results"]
+        if batch["canceled"]:
+            results = [{"custom_id": result["custom_id"], "result": {"type": "canceled"}} for result in results]
+        # Like the real API, results are not in request order
+        shuffled = list(results)
+        random.Random(batch_id).shuffle(shuffled)
+        return "".join(json.dumps(result) + "\n" for result in shuffled)
+
+
+async def serve(batches: FakeBatches, host: str, port: int) -> None:
+    from aiohttp import web
+
+    def not_found(batch_id: str) -> web.Response:
+        return web.json_response({"type": "error", "error": {"type": "not_found_error",
+                                                             "message": f"Unknown batch {batch_id}"}}, status=404)
+
+    async def create(request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response(batches.create(body["requests"]))
+
+    async def retrieve(request: web.Request) -> web.Response:
+        batch_id = request.match_info["batch_id"]
+        if batch_id not in batches.batches:
+            return not_found(batch_id)
+        return web.json_response(batches.describe(batch_id))
+
+    async def results(request: web.Request) -> web.Response:
+        batch_id = request.match_info["batch_id"]
+        if batch_id not in batches.batches:
+            return not_found(batch_id)
+        if not batches.ended(batch_id):
+            return web.json_response({"type": "error", "error": {"type": "invalid_request_error",
+                                                                 "message": "Batch is still processing"}}, status=400)
+        return web.Response(text=batches.results(batch_id), content_type="application/x-jsonl")
+
+    async def cancel(request: web.Request) -> web.Response:
+        batch_id = request.match_info["batch_id"]
+        if batch_id not in batches.batches:
+            return not_found(batch_id)
+        batches.batches[batch_id]["canceled"] = True
+        return web.json_response(batches.describe(batch_id))
+
+    app = web.Application(client_max_size=256 * 1024 * 1024)
+    app.router.add_post("/v1/messages/batches", create)
+    app.router.add_get("/v1/messages/batches/{batch_id}", retrieve)
+    app.router.add_get("/v1/messages/batches/{batch_id}/results", results)
+    app.router.add_post("/v1/messages/batches/{batch_id}/cancel", cancel)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info(f"Fake Message Batches API listening on {batches.base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Anthropic Message Batches endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--process-seconds", type=float, default=3.0, help="Time until a batch has ended")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that come back errored")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    batches = FakeBatches(f"http://{args.host}:{args.port}", args.process_seconds, args.error_rate)
+    asyncio.run(serve(batches, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
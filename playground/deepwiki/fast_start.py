@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Fast-Start MCP Client
+A cold start pays for initialize + notifications/initialized + tools/list before the
+first real call. FastStartMCPClient snapshots the Mcp-Session-Id, the server
+capabilities and the tool catalog to disk, and a warm start reuses them without
+any handshake. The snapshot is trusted until the server rejects it (404 / 400 for
+an expired or unknown session, or the connection is refused): the client then
+re-initializes, refreshes the snapshot and retries that request once. Any other
+failure (timeouts, disconnects mid-response) is raised, since the server may
+already have run the request.
+
+Usage:
+    async with FastStartMCPClient(DEEP_WIKI_URL) as client:
+        await client.initialize()      # no network round trip when a snapshot exists
+        await client.ask_question("openai/codex", "What is OpenAI Codex?")
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient, MCPMessage
+from mcp_transports import HttpStatusError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(os.getenv("DEEPWIKI_MCP_CACHE_DIR", Path.home() / ".cache" / "deepwiki-mcp"))
+
+
+def rejected_before_running(error: Exception) -> bool:
+    """True when a request failed without the server running it, so resending it is safe"""
+    if isinstance(error, HttpStatusError):
+        # Expired or unknown Mcp-Session-Id
+        return error.status in (400, 404)
+    # Connection refused before the request was sent; only the HTTP client already in use is checked
+    aiohttp = sys.modules.get("aiohttp")
+    if aiohttp is not None and isinstance(error, aiohttp.ClientConnectorError):
+        return True
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(error, httpx.ConnectError)
+
+
+@dataclass
+class SessionSnapshot:
+    """What a warm start needs to skip the MCP handshake"""
+    server_url: str
+    session_id: str
+    server_capabilities: Dict[str, Any] = field(default_factory=dict)
+    tools: List[Dict[str, Any]] = field(default_factory=list)
+    saved_at: float = 0.0
+
+
+class SessionStore:
+    """One JSON snapshot per server URL under a cache directory"""
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory or DEFAULT_CACHE_DIR)
+
+    def path(self, server_url: str) -> Path:
+        digest = hashlib.sha256(server_url.encode("utf-8")).hexdigest()[:16]
+        return self.directory / f"session-{digest}.json"
+
+    def load(self, server_url: str, max_age: Optional[float] = None) -> Optional[SessionSnapshot]:
+        try:
+            with open(self.path(server_url)) as f:
+                snapshot = SessionSnapshot(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if snapshot.server_url != server_url or not snapshot.session_id:
+            return None
+        if max_age is not None and time.time() - snapshot.saved_at > max_age:
+            return None
+        return snapshot
+
+    def save(self, snapshot: SessionSnapshot) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        snapshot.saved_at = time.time()
+        # Write-then-rename so a concurrent launch never reads a half written file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(asdict(snapshot), f)
+        os.replace(tmp_path, self.path(snapshot.server_url))
+
+    def clear(self, server_url: str) -> None:
+        try:
+            os.remove(self.path(server_url))
+        except FileNotFoundError:
+            pass
+
+
+class FastStartMCPClient(MCPClient):
+    """MCPClient that restores its session from a SessionStore snapshot"""
+
+    def __init__(self, server_url: Optional[str] = None, transport: Any = None, http_pool: Any = None,
+                 store: Optional[SessionStore] = None, max_age: Optional[float] = 3600.0):
+        """
+        Args:
+            server_url: Streamable HTTP endpoint; also the snapshot key (no snapshot without it)
+            transport: Alternative transport, as for MCPClient
+            http_pool: Shared http_pool.SharedHttpPool, as for MCPClient
+            store: Where snapshots live, defaults to DEFAULT_CACHE_DIR
+            max_age: Seconds after which a snapshot is ignored (None = no limit)
+        """
+        super().__init__(server_url, transport=transport, http_pool=http_pool)
+        self.store = store or SessionStore()
+        self.max_age = max_age
+        self.tools: Optional[List[Dict[str, Any]]] = None
+        self.warm = False
+        self.revalidations = 0
+        # True while the restored session has not yet been confirmed by a successful request
+        self._unverified = False
+
+    async def initialize(self) -> Dict[str, Any]:
+        snapshot = self.store.load(self.server_url, self.max_age) if self.server_url else None
+        if snapshot is None:
+            return await self._cold_start()
+
+        self.mcp_session_id = snapshot.session_id
+        self.server_capabilities = snapshot.server_capabilities
+        self.tools = snapshot.tools
+        self.initialized = True
+        self.warm = True
+        self._unverified = True
+        logger.info(f"Restored MCP session {snapshot.session_id} ({len(snapshot.tools)} tools) "
+                    f"saved {time.time() - snapshot.saved_at:.0f}s ago")
+        return {"capabilities": self.server_capabilities}
+
+    async def _cold_start(self) -> Dict[str, Any]:
+        self._unverified = False
+        self.mcp_session_id = ""
+        result = await super().initialize()
+        self.tools = (await super().list_tools()).get("tools", [])
+        if self.server_url:
+            self.store.save(SessionSnapshot(self.server_url, self.mcp_session_id,
+                                            self.server_capabilities, self.tools))
+        return result
+
+    async def list_tools(self) -> Dict[str, Any]:
+        """Tool catalog from the snapshot / handshake, without a tools/list round trip"""
+        if not self.initialized:
+            raise RuntimeError("Client not initialized. Call initialize() first.")
+        if self.tools is None:
+            self.tools = (await super().list_tools()).get("tools", [])
+        return {"tools": self.tools}
+
+    async def send_streaming_request(self, message: MCPMessage, on_message: Any = None) -> Dict[str, Any]:
+        if not self._unverified:
+            return await super().send_streaming_request(message, on_message=on_message)
+
+        try:
+            response = await super().send_streaming_request(message, on_message=on_message)
+        except Exception as e:
+            if not rejected_before_running(e):
+                raise
+            logger.warning(f"Restored MCP session rejected ({e}), re-initializing")
+            await self.revalidate()
+            return await super().send_streaming_request(message, on_message=on_message)
+        self._unverified = False
+        return response
+
+    async def revalidate(self) -> None:
+        """Drop the snapshot and run a full handshake"""
+        self.revalidations += 1
+        self.warm = False
+        if self.server_url:
+            self.store.clear(self.server_url)
+        await self._cold_start()
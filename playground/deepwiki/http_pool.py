@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Connection Layer
+One tuned connection pool injected into MCPClient (via StreamableHttpTransport)
+and ClaudeClient instead of a fresh aiohttp session per client:
+- global and per-host connection limits
+- keep-alive with idle reuse, DNS cache with a TTL
+- Accept-Encoding gzip (and br when Brotli is installed) with transparent decoding
+- optional HTTP/2 backend (httpx + h2), one multiplexed connection per host
+- connection reuse counters, to confirm we are not paying a TLS handshake per call
+
+Usage:
+    async with SharedHttpPool(limit_per_host=8) as pool:
+        async with MCPClient(DEEP_WIKI_URL, http_pool=pool) as client: ...
+        async with ClaudeClient(api_key, http_pool=pool) as claude: ...
+        print(pool.stats())
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _accept_encoding(http2: bool = False) -> str:
+    """Only advertise brotli when the backend in use can decode it"""
+    if http2:
+        from httpx._decoders import SUPPORTED_DECODERS
+
+        has_brotli = "br" in SUPPORTED_DECODERS
+    else:
+        from aiohttp.compression_utils import HAS_BROTLI as has_brotli
+
+    return "gzip, deflate, br" if has_brotli else "gzip, deflate"
+
+
+class SharedHttpPool:
+    """Process-wide HTTP client shared by the MCP and Claude clients"""
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 16, keepalive_timeout: float = 60.0,
+                 dns_ttl: int = 300, http2: bool = False):
+        """
+        Args:
+            limit: Maximum open connections overall
+            limit_per_host: Maximum open connections per host (aiohttp backend)
+            keepalive_timeout: Seconds an idle connection is kept for reuse
+            dns_ttl: Seconds resolved addresses are cached (aiohttp backend)
+            http2: Use httpx with HTTP/2 instead of aiohttp (requires `pip install httpx[h2]`)
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self.http2 = http2
+        self.session = None
+        self.counters = {"requests": 0, "connections_created": 0, "connections_reused": 0,
+                         "dns_cache_hits": 0, "dns_cache_misses": 0}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self) -> None:
+        if self.session is not None:
+            return
+        self.session = self._open_httpx() if self.http2 else self._open_aiohttp()
+        logger.info(f"Shared HTTP pool opened ({'HTTP/2 httpx' if self.http2 else 'aiohttp'}, "
+                    f"limit={self.limit}, per_host={self.limit_per_host})")
+
+    def _open_aiohttp(self):
+        import aiohttp
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._count("requests"))
+        trace_config.on_connection_create_end.append(self._count("connections_created"))
+        trace_config.on_connection_reuseconn.append(self._count("connections_reused"))
+        trace_config.on_dns_cache_hit.append(self._count("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(self._count("dns_cache_misses"))
+
+        connector = aiohttp.TCPConnector(
+            ssl=False,
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl,
+            enable_cleanup_closed=True
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers={"Accept-Encoding": _accept_encoding()},
+            auto_decompress=True,
+            trace_configs=[trace_config]
+        )
+
+    def _open_httpx(self):
+        import httpx
+
+        client = httpx.AsyncClient(
+            http2=True,
+            verify=False,
+            timeout=None,
+            headers={"Accept-Encoding": _accept_encoding(http2=True)},
+            limits=httpx.Limits(max_connections=self.limit, max_keepalive_connections=self.limit,
+                                keepalive_expiry=self.keepalive_timeout)
+        )
+        return _HttpxSession(client, self.counters)
+
+    def _count(self, counter: str):
+        async def on_event(session, trace_config_ctx, params):
+            self.counters[counter] += 1
+        return on_event
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def stats(self) -> Dict[str, Any]:
+        created = self.counters["connections_created"]
+        reused = self.counters["connections_reused"]
+        return dict(self.counters, reuse_ratio=reused / (created + reused) if created + reused else 0.0)
+
+
+class _HttpxResponse:
+    """The subset of aiohttp.ClientResponse used by the MCP and Claude clients"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        self.content = self
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("Content-Type", "application/octet-stream").split(";")[0].strip().lower()
+
+    async def read(self) -> bytes:
+        return await self._response.aread()
+
+    async def text(self) -> str:
+        await self._response.aread()
+        return self._response.text
+
+    async def json(self) -> Any:
+        await self._response.aread()
+        return self._response.json()
+
+    async def iter_chunked(self, size: int):
+        async for chunk in self._response.aiter_bytes(size):
+            yield chunk
+
+    async def iter_any(self):
+        # No chunk size: each piece is passed on as soon as it arrives (progress events must not wait)
+        async for chunk in self._response.aiter_bytes():
+            yield chunk
+
+
+class _HttpxSession:
+    """aiohttp.ClientSession-like wrapper around an HTTP/2 httpx.AsyncClient"""
+
+    def __init__(self, client, counters: Dict[str, int]):
+        self.client = client
+        self.counters = counters
+
+    @asynccontextmanager
+    async def post(self, url: str, json: Any = None, headers: Optional[Dict[str, str]] = None, ssl: Any = None):
+        # ssl is accepted for call-site compatibility; verification is configured on the client
+        connected = False
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            # httpcore only opens a connection when none in the pool can take the request
+            nonlocal connected
+            if event == "connection.connect_tcp.complete":
+                connected = True
+
+        request = self.client.build_request("POST", url, json=json, headers=headers, extensions={"trace": trace})
+        response = await self.client.send(request, stream=True)
+        self.counters["requests"] += 1
+        self.counters["connections_created" if connected else "connections_reused"] += 1
+        try:
+            yield _HttpxResponse(response)
+        finally:
+            await response.aclose()
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Lazy module imports
+`anthropic`, `openai` and `aiohttp` together cost well over a second to import, which
+dominates short-lived CLI / serverless runs that may never touch some of them.
+lazy_import() returns a module object that is only executed on first attribute access.
+
+    anthropic = lazy_import("anthropic")   # nothing imported yet
+    client = anthropic.Anthropic(...)      # imported here
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import `name` on first attribute access (no-op if it is already imported)"""
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Local Tool Server
+Minimal MCP tool server exposing Deep Wiki shaped tools, used as a local stand-in
+for transport benchmarks. Serves the same tools over three transports:
+- in-process: pass a LocalToolServer to mcp_transports.InProcessTransport
+- stdio: python local_tool_server.py --stdio
+- Streamable HTTP: python local_tool_server.py --http --port 8765
+
+Tool calls that carry a progressToken get notifications/progress while the tool
+runs (over HTTP as an SSE response), each with the next slice of the answer as
+partial `content`, before the full result.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import uuid
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2024-11-05"
+
+Notify = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def progress_token(message: Dict[str, Any]) -> Any:
+    return ((message.get("params") or {}).get("_meta") or {}).get("progressToken")
+
+
+class LocalToolServer:
+    """JSON-RPC dispatcher for a handful of deterministic tools"""
+
+    def __init__(self, answer_bytes: int = 2048, delay: float = 0.0, progress_steps: int = 5):
+        """
+        Args:
+            answer_bytes: Size of the text returned by ask_question / read_wiki_contents
+            delay: Simulated tool latency in seconds
+            progress_steps: Progress notifications per call when the client sends a progressToken
+        """
+        self.answer_bytes = answer_bytes
+        self.delay = delay
+        self.progress_steps = progress_steps
+        self.tools: Dict[str, Dict[str, Any]] = {
+            "read_wiki_structure": {
+                "description": "Get a list of documentation topics for a GitHub repository",
+                "properties": {"repoName": {"type": "string"}},
+                "required": ["repoName"]
+            },
+            "read_wiki_contents": {
+                "description": "View documentation about a GitHub repository",
+                "properties": {"repoName": {"type": "string"}},
+                "required": ["repoName"]
+            },
+            "ask_question": {
+                "description": "Ask any question about a GitHub repository",
+                "properties": {"repoName": {"type": "string"}, "question": {"type": "string"}},
+                "required": ["repoName", "question"]
+            }
+        }
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[str]]] = {
+            "read_wiki_structure": self._read_wiki_structure,
+            "read_wiki_contents": self._read_wiki_contents,
+            "ask_question": self._ask_question
+        }
+
+    def _filler(self, prefix: str) -> str:
+        text = prefix
+        while len(text) < self.answer_bytes:
+            text += " Lorem ipsum dolor sit amet, consectetur adipiscing elit."
+        return text[:self.answer_bytes]
+
+    async def _read_wiki_structure(self, arguments: Dict[str, Any]) -> str:
+        return f"Available pages for {arguments['repoName']}:\n- 1 Overview\n- 2 Architecture\n- 3 Usage"
+
+    async def _read_wiki_contents(self, arguments: Dict[str, Any]) -> str:
+        return self._filler(f"# {arguments['repoName']}\n")
+
+    async def _ask_question(self, arguments: Dict[str, Any]) -> str:
+        return self._filler(f"Answer about {arguments['repoName']}: {arguments['question']}\n")
+
+    def list_tools(self) -> Dict[str, Any]:
+        return {
+            "tools": [
+                {
+                    "name": name,
+                    "description": spec["description"],
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": spec["properties"],
+                        "required": spec["required"]
+                    }
+                }
+                for name, spec in self.tools.items()
+            ]
+        }
+
+    async def handle(self, message: Dict[str, Any], notify: Optional[Notify] = None) -> Optional[Dict[str, Any]]:
+        """Handle one JSON-RPC message; returns None for notifications
+
+        notify, when given, is used to send progress notifications before the response.
+        """
+        method = message.get("method")
+        if "id" not in message:
+            return None
+
+        try:
+            if method == "initialize":
+                result = {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {"tools": {"listChanged": False}},
+                    "serverInfo": {"name": "local-tool-server", "version": "1.0.0"}
+                }
+            elif method == "tools/list":
+                result = self.list_tools()
+            elif method == "tools/call":
+                params = message.get("params") or {}
+                handler = self.handlers.get(params.get("name"))
+                if handler is None:
+                    return self._error(message["id"], -32602, f"Unknown tool: {params.get('name')}")
+                token = progress_token(message)
+                if notify is not None and token is not None and self.progress_steps:
+                    text = await self._run_with_progress(handler, params.get("arguments") or {}, token, notify)
+                else:
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    text = await handler(params.get("arguments") or {})
+                result = {"content": [{"type": "text", "text": text}], "isError": False}
+            elif method == "ping":
+                result = {}
+            else:
+                return self._error(message["id"], -32601, f"Method not found: {method}")
+        except KeyError as e:
+            return self._error(message["id"], -32602, f"Missing argument: {e}")
+
+        return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+    async def _run_with_progress(self, handler: Callable[[Dict[str, Any]], Awaitable[str]],
+                                 arguments: Dict[str, Any], token: Any, notify: Notify) -> str:
+        """Spread the delay over progress_steps updates, each carrying the next slice of the answer"""
+        text = await handler(arguments)
+        steps = self.progress_steps
+        for step in range(steps):
+            await asyncio.sleep(self.delay / steps)
+            chunk = text[len(text) * step // steps:len(text) * (step + 1) // steps]
+            await notify({
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {
+                    "progressToken": token,
+                    "progress": step + 1,
+                    "total": steps,
+                    "message": f"Generated {step + 1} of {steps} parts",
+                    "content": [{"type": "text", "text": chunk}]
+                }
+            })
+        return text
+
+    def _error(self, request_id: Any, code: int, text: str) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": text}}
+
+
+async def serve_stdio(server: LocalToolServer) -> None:
+    """Serve newline-delimited JSON-RPC on stdin/stdout"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=16 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+
+    async def send(message: Dict[str, Any]) -> None:
+        writer.write((json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def respond(message: Dict[str, Any]) -> None:
+        response = await server.handle(message, notify=send)
+        if response is not None:
+            await send(response)
+
+    tasks = set()
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        # Requests are handled concurrently, like they would be over HTTP
+        task = asyncio.create_task(respond(message))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def serve_http(server: LocalToolServer, host: str, port: int, path: str = "/mcp", rtt: float = 0.0) -> None:
+    """Serve Streamable HTTP on host:port
+
+    Responses are plain JSON, except for requests with a progressToken from clients that
+    accept text/event-stream: those get an SSE stream of progress notifications and the response.
+    Sessions are issued on initialize; like a real server that restarted or expired them,
+    requests carrying an unknown Mcp-Session-Id get 404 and must re-initialize.
+    """
+    from aiohttp import web
+
+    sessions = set()
+
+    async def handle_streaming(request: web.Request, message: Dict[str, Any], session_id: str) -> web.StreamResponse:
+        stream = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                             "Mcp-Session-Id": session_id})
+        await stream.prepare(request)
+
+        async def send(event: Dict[str, Any]) -> None:
+            await stream.write(f"event: message\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+
+        await send(await server.handle(message, notify=send))
+        await stream.write_eof()
+        return stream
+
+    async def handle_post(request: web.Request) -> web.StreamResponse:
+        if rtt:
+            await asyncio.sleep(rtt)
+        message = await request.json()
+        session_id = request.headers.get("Mcp-Session-Id")
+        if message.get("method") == "initialize" or not session_id:
+            session_id = str(uuid.uuid4())
+            sessions.add(session_id)
+        elif session_id not in sessions:
+            return web.Response(status=404, text=f"Unknown session: {session_id}")
+        if progress_token(message) is not None and "text/event-stream" in request.headers.get("Accept", ""):
+            return await handle_streaming(request, message, session_id)
+        response = await server.handle(message)
+        if response is None:
+            return web.Response(status=202, headers={"Mcp-Session-Id": session_id})
+        return web.json_response(response, headers={"Mcp-Session-Id": session_id})
+
+    app = web.Application()
+    app.router.add_post(path, handle_post)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info(f"Local tool server listening on http://{host}:{port}{path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local MCP tool server")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--stdio", action="store_true", help="Serve over stdin/stdout")
+    mode.add_argument("--http", action="store_true", help="Serve Streamable HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--answer-bytes", type=int, default=2048)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated tool latency in seconds")
+    parser.add_argument("--rtt", type=float, default=0.0, help="Simulated network round trip per HTTP request")
+    parser.add_argument("--progress-steps", type=int, default=5, help="Progress notifications per tool call")
+    args = parser.parse_args()
+
+    # stdout carries the protocol in stdio mode, so logs must go to stderr
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    server = LocalToolServer(answer_bytes=args.answer_bytes, delay=args.delay, progress_steps=args.progress_steps)
+    if args.stdio:
+        asyncio.run(serve_stdio(server))
+    else:
+        asyncio.run(serve_http(server, args.host, args.port, rtt=args.rtt))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Event-Loop Health Monitor
+Opt-in instrumentation for spotting code that blocks the event loop, such as the
+one-step app's synchronous Anthropic call, a large json.loads or print() per SSE
+line in send_streaming_request:
+- loop lag: a probe task that should wake every `interval` measures how late it runs
+- blocking callbacks: every callback the loop runs (task steps, call_soon / call_later
+  callbacks) is timed on its own, and those over `slow_threshold` are recorded with the
+  task or function they belong to; a watchdog thread captures the loop thread's stack
+  while such a callback is still running. uvloop runs its callbacks in C, so there stalls
+  are detected from the lag probe's silence instead and back-to-back slow callbacks
+  show up as one
+- per-coroutine timing: instrument() wraps MCP / Claude client methods and charges
+  the thread CPU time and wall time of every step of those coroutines (inclusive of
+  nested calls); steps whose wall time exceeds the slow threshold are counted as blocking
+- uvloop: new_event_loop("uvloop") / run(main, "uvloop") when uvloop is installed
+
+Usage:
+    async with LoopMonitor(slow_threshold=0.1) as monitor:
+        instrument(monitor, mcp_client, MCP_METHODS)
+        instrument(monitor, claude, CLAUDE_METHODS)
+        ...
+    monitor.print_report()
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Iterable
+
+logger = logging.getLogger(__name__)
+
+MCP_METHODS = ("send_streaming_request", "send_notification", "call_tool", "ask_question")
+CLAUDE_METHODS = ("send_message", "generate_response")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def new_event_loop(implementation: str = "asyncio") -> asyncio.AbstractEventLoop:
+    """A fresh loop of the given implementation ("asyncio" or "uvloop")"""
+    if implementation == "uvloop":
+        import uvloop
+
+        return uvloop.new_event_loop()
+    if implementation != "asyncio":
+        raise ValueError(f"Unknown event loop implementation: {implementation}")
+    return asyncio.new_event_loop()
+
+
+def run(main, implementation: str = "asyncio"):
+    """asyncio.run() on the chosen loop implementation"""
+    loop = new_event_loop(implementation)
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+@dataclass
+class SlowCallback:
+    """One loop callback that ran longer than slow_threshold (or, on uvloop, one stall)"""
+    duration: float
+    stack: List[str]
+    callback: str = ""
+    at: float = field(default_factory=time.time)
+
+
+_original_handle_run = asyncio.events.Handle._run
+# Monitors by the id of the thread running their loop, consulted by the patched Handle._run
+_monitors: Dict[int, "LoopMonitor"] = {}
+
+
+def _timed_handle_run(handle: asyncio.Handle) -> None:
+    monitor = _monitors.get(threading.get_ident())
+    if monitor is None:
+        return _original_handle_run(handle)
+    return monitor._run_handle(handle)
+
+
+def describe_callback(handle: asyncio.Handle) -> str:
+    """Task name and coroutine for task steps, the function name for plain callbacks"""
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return f"Task {owner.get_name()} {getattr(coro, '__qualname__', coro)}"
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+def _suspended_at(handle: asyncio.Handle) -> List[str]:
+    """Where a task step left its coroutine, for steps the watchdog did not catch running"""
+    owner = getattr(handle._callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        return [line for frame in owner.get_stack() for line in traceback.format_stack(frame, limit=1)]
+    return []
+
+
+@dataclass
+class CoroutineStats:
+    calls: int = 0
+    cpu: float = 0.0
+    wall: float = 0.0
+    max_step_cpu: float = 0.0
+    max_step_wall: float = 0.0
+    # Steps that held the loop longer than the slow threshold (blocking I/O and sleeps use little CPU)
+    blocking_steps: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "cpu_ms": self.cpu * 1000,
+            "cpu_ms_per_call": self.cpu / self.calls * 1000 if self.calls else 0.0,
+            "wall_ms": self.wall * 1000,
+            "max_step_cpu_ms": self.max_step_cpu * 1000,
+            "max_step_wall_ms": self.max_step_wall * 1000,
+            "blocking_steps": self.blocking_steps
+        }
+
+
+class _TimedCoroutine:
+    """Drives a coroutine step by step, charging each step's thread CPU and wall time to stats"""
+
+    def __init__(self, coro, stats: CoroutineStats, slow_threshold: float):
+        self.coro = coro
+        self.stats = stats
+        self.slow_threshold = slow_threshold
+
+    def __await__(self):
+        coro, stats = self.coro, self.stats
+        stats.calls += 1
+        started = time.perf_counter()
+        value, error = None, None
+        try:
+            while True:
+                step_start, step_cpu_start = time.perf_counter(), time.thread_time()
+                try:
+                    yielded = coro.throw(error) if error is not None else coro.send(value)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    step_cpu = time.thread_time() - step_cpu_start
+                    step_wall = time.perf_counter() - step_start
+                    stats.cpu += step_cpu
+                    stats.max_step_cpu = max(stats.max_step_cpu, step_cpu)
+                    # A step is synchronous, so its wall time is how long it kept the loop from other work
+                    stats.max_step_wall = max(stats.max_step_wall, step_wall)
+                    if step_wall > self.slow_threshold:
+                        stats.blocking_steps += 1
+                try:
+                    value, error = (yield yielded), None
+                except BaseException as e:
+                    value, error = None, e
+        finally:
+            stats.wall += time.perf_counter() - started
+
+
+class LoopMonitor:
+    """Loop lag probe, per-callback timing with a stack-capturing watchdog and per-coroutine step timing"""
+
+    def __init__(self, interval: float = 0.05, slow_threshold: float = 0.1, max_slow_callbacks: int = 50):
+        """
+        Args:
+            interval: How often the lag probe wakes up, in seconds
+            slow_threshold: Callbacks running longer than this are recorded with a stack trace
+            max_slow_callbacks: How many slow callbacks to keep
+        """
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.lag: deque = deque(maxlen=10000)
+        self.slow_callbacks: deque = deque(maxlen=max_slow_callbacks)
+        self.coroutines: Dict[str, CoroutineStats] = {}
+        self.loop_implementation = ""
+        self.per_callback = False
+        self._heartbeat = time.monotonic()
+        self._stall_stack: Optional[List[str]] = None
+        # (sequence number, start) of the callback running right now, read by the watchdog
+        self._running: Optional[tuple] = None
+        self._callback_seq = 0
+        self._callback_stack: Optional[tuple] = None
+        self._loop_thread_id: Optional[int] = None
+        self._probe: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.loop_implementation = f"{type(loop).__module__}.{type(loop).__name__}"
+        self._loop_thread_id = threading.get_ident()
+        # Pure-Python loops run every callback through Handle._run; uvloop's handles are C
+        self.per_callback = isinstance(loop, asyncio.BaseEventLoop)
+        if self.per_callback:
+            _monitors[self._loop_thread_id] = self
+            asyncio.events.Handle._run = _timed_handle_run
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._probe = asyncio.create_task(self._run_probe())
+        self._watchdog = threading.Thread(target=self._run_watchdog, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._watchdog:
+            self._watchdog.join()
+        if _monitors.get(self._loop_thread_id) is self:
+            del _monitors[self._loop_thread_id]
+            if not _monitors:
+                asyncio.events.Handle._run = _original_handle_run
+        # A stall right before stop() may not have been seen by the probe yet
+        overdue = time.monotonic() - self._heartbeat - self.interval
+        if overdue > 0:
+            self._record(overdue)
+        if self._probe:
+            self._probe.cancel()
+            try:
+                await self._probe
+            except asyncio.CancelledError:
+                pass
+
+    async def _run_probe(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self._record(max(0.0, time.monotonic() - self._heartbeat - self.interval))
+            self._heartbeat = time.monotonic()
+
+    def _record(self, lag: float) -> None:
+        self.lag.append(lag)
+        stack, self._stall_stack = self._stall_stack, None
+        if stack is not None:
+            self._slow_callback(SlowCallback(lag, stack, "(loop stall)"))
+
+    def _slow_callback(self, slow: SlowCallback) -> None:
+        self.slow_callbacks.append(slow)
+        logger.warning(f"Event loop blocked for {slow.duration * 1000:.0f} ms by {slow.callback} at:\n"
+                       f"{''.join(slow.stack[-6:])}")
+
+    def _run_handle(self, handle: asyncio.Handle) -> None:
+        self._callback_seq += 1
+        seq = self._callback_seq
+        started = time.monotonic()
+        self._running = (seq, started)
+        try:
+            return _original_handle_run(handle)
+        finally:
+            self._running = None
+            duration = time.monotonic() - started
+            if duration > self.slow_threshold:
+                captured = self._callback_stack
+                stack = captured[1] if captured is not None and captured[0] == seq else _suspended_at(handle)
+                self._slow_callback(SlowCallback(duration, stack, describe_callback(handle)))
+
+    def _capture_stack(self) -> Optional[List[str]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        return traceback.format_stack(frame) if frame is not None else None
+
+    def _run_watchdog(self) -> None:
+        # The probe refreshes the heartbeat every `interval`; silence past that plus the threshold is a stall
+        deadline = self.interval + self.slow_threshold
+        while not self._stopped.wait(self.slow_threshold / 4):
+            if self.per_callback:
+                running = self._running
+                captured = self._callback_stack
+                if (running is not None and (captured is None or captured[0] != running[0])
+                        and time.monotonic() - running[1] > self.slow_threshold):
+                    stack = self._capture_stack()
+                    if stack is not None:
+                        self._callback_stack = (running[0], stack)
+            elif self._stall_stack is None and time.monotonic() - self._heartbeat > deadline:
+                self._stall_stack = self._capture_stack()
+
+    def timed(self, name: str, coro):
+        """Awaitable running coro with its CPU and per-step wall time charged to `name`"""
+        return _TimedCoroutine(coro, self.coroutines.setdefault(name, CoroutineStats()), self.slow_threshold)
+
+    def report(self) -> Dict[str, Any]:
+        samples = list(self.lag)
+        return {
+            "loop": self.loop_implementation,
+            "lag_p50_ms": percentile(samples, 50) * 1000,
+            "lag_p99_ms": percentile(samples, 99) * 1000,
+            "lag_max_ms": max(samples, default=0.0) * 1000,
+            "slow_callback_timing": "per callback" if self.per_callback else "loop stalls",
+            "slow_callbacks": [
+                {"duration_ms": slow.duration * 1000, "callback": slow.callback,
+                 "stack": [line.strip() for line in slow.stack[-6:]]}
+                for slow in self.slow_callbacks
+            ],
+            "coroutines": {name: stats.to_dict() for name, stats in sorted(self.coroutines.items())}
+        }
+
+    def print_report(self) -> None:
+        print(json.dumps(self.report(), indent=2))
+
+
+def instrument(monitor: LoopMonitor, obj: Any, methods: Iterable[str], prefix: Optional[str] = None) -> None:
+    """Replace obj's coroutine methods (those it has) with timed coroutine functions"""
+    prefix = prefix or type(obj).__name__
+    for name in methods:
+        original = getattr(obj, name, None)
+        if original is None or not inspect.iscoroutinefunction(original):
+            continue
+
+        # Still a coroutine function, so callers can hand the result to create_task / gather
+        async def wrapper(*args, _original=original, _label=f"{prefix}.{name}", **kwargs):
+            return await monitor.timed(_label, _original(*args, **kwargs))
+
+        setattr(obj, name, wrapper)
+
+
+async def demo(args) -> Dict[str, Any]:
+    """In-process MCP calls next to a stand-in for the one-step app's synchronous Claude call"""
+    from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient
+    from local_tool_server import LocalToolServer
+    from mcp_transports import InProcessTransport
+
+    class BlockingClaude:
+        """Like the one-step ClaudeClient: a synchronous SDK call inside an async method"""
+
+        async def generate_response(self, prompt: str, context: Optional[str] = None) -> str:
+            time.sleep(args.blocking_call)
+            return f"Summary of {len(context or '')} characters"
+
+    async with LoopMonitor(slow_threshold=args.slow_threshold) as monitor:
+        async with MCPClient(transport=InProcessTransport(LocalToolServer(answer_bytes=args.answer_bytes,
+                                                                          delay=0.01))) as client:
+            await client.initialize()
+            claude = BlockingClaude()
+            instrument(monitor, client, MCP_METHODS)
+            instrument(monitor, claude, CLAUDE_METHODS, prefix="ClaudeClient")
+
+            async def session(i: int) -> None:
+                result = await client.ask_question("openai/codex", f"What is OpenAI Codex? ({i})")
+                await claude.generate_response("Summarize", context=result["content"][0]["text"])
+
+            await asyncio.gather(*(session(i) for i in range(args.sessions)))
+    return monitor.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop monitor demo")
+    parser.add_argument("--loop", choices=("asyncio", "uvloop"), default="asyncio")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--answer-bytes", type=int, default=65536)
+    parser.add_argument("--blocking-call", type=float, default=0.15, help="Seconds the fake sync Claude call blocks")
+    parser.add_argument("--slow-threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.getLogger("deepwiki_anthropic_app_is_mcpclient_one_step").setLevel(logging.WARNING)
+    logging.getLogger(__name__).setLevel(logging.ERROR)
+    print(json.dumps(run(demo(args), args.loop), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+MCP Transports
+Pluggable transports used by MCPClient to exchange JSON-RPC messages with a tool server:
+- StreamableHttpTransport: HTTP POST to the server URL (JSON or SSE response bodies)
+- StdioTransport: tool server subprocess speaking newline-delimited JSON-RPC over pipes
+- InProcessTransport: Python tool server object living in the same event loop
+
+send_request takes an optional on_message callback. Server messages that arrive
+before the response (notifications/progress and friends) are passed to it as they
+come in instead of being dropped. progress_listener turns them into ToolProgress
+updates for the one-step and two-step apps.
+"""
+
+import asyncio
+import codecs
+import inspect
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+# Receives server messages sent while a request is in flight
+OnMessage = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class ToolProgress:
+    """One notifications/progress update for a running tool call"""
+    progress: float
+    total: Optional[float] = None
+    message: Optional[str] = None
+    # Partial result content sent along with this update, if the server streams any
+    content: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "".join(item.get("text", "") for item in self.content if item.get("type") == "text")
+
+
+def progress_listener(progress_token: str, on_progress: Callable[[ToolProgress], Any]):
+    """on_message callback turning notifications/progress for progress_token into ToolProgress updates"""
+    async def on_message(server_message: Dict[str, Any]) -> None:
+        notification = server_message.get("params") or {}
+        if (server_message.get("method") != "notifications/progress"
+                or notification.get("progressToken") != progress_token):
+            return
+        update = ToolProgress(
+            progress=notification.get("progress", 0),
+            total=notification.get("total"),
+            message=notification.get("message"),
+            content=notification.get("content") or []
+        )
+        outcome = on_progress(update)
+        if inspect.isawaitable(outcome):
+            await outcome
+
+    return on_message
+
+
+def print_progress(update: ToolProgress) -> None:
+    """Show a tool's progress and partial answer as they arrive, rather than after the whole call"""
+    total = f"/{update.total:g}" if update.total is not None else ""
+    print(f"\n[tool progress {update.progress:g}{total}] {update.message or ''}", flush=True)
+    if update.text:
+        print(update.text, end="", flush=True)
+
+
+def parse_streaming_response(full_response: str, request_id: Optional[str] = None) -> Dict[str, Any]:
+    """Pick the JSON-RPC response out of a JSON or SSE (data: lines) response body"""
+    # Parse the response - it might be multiple JSON objects separated by newlines
+    response_lines = [line.strip() for line in full_response.split('\n') if line.strip()]
+
+    # For most MCP responses, we expect a single JSON object
+    # But streaming responses might have multiple parts
+    final_response = None
+    for line in response_lines:
+        line = line.replace("data: ", "")
+        logger.debug(line)
+        try:
+            parsed_line = json.loads(line)
+            # Look for the response with matching ID or the final result
+            if request_id and parsed_line.get("id") == request_id:
+                final_response = parsed_line
+                break
+            elif "result" in parsed_line or "error" in parsed_line:
+                final_response = parsed_line
+        except json.JSONDecodeError:
+            continue
+
+    if final_response is None:
+        # If no structured response found, try parsing the whole thing
+        try:
+            final_response = json.loads(full_response)
+        except json.JSONDecodeError:
+            raise RuntimeError(f"Could not parse streaming response: {full_response}")
+
+    return final_response
+
+
+class StreamDecoder:
+    """Incremental decoder for JSON-RPC messages in an SSE or newline-delimited JSON body"""
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._partial: List[str] = []
+        self._data: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        lines = self._text.decode(chunk).split("\n")
+        if len(lines) == 1:
+            # Large answers arrive as one long data line; collect its pieces without re-scanning them
+            self._partial.append(lines[0])
+            return []
+        lines[0] = "".join(self._partial) + lines[0]
+        self._partial = [lines.pop()]
+        messages = []
+        for line in lines:
+            message = self._line(line.rstrip("\r"))
+            if message is not None:
+                messages.append(message)
+        return messages
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Messages left when the body ends without a final newline or blank line"""
+        rest = "".join(self._partial) + self._text.decode(b"", final=True)
+        self._partial = []
+        messages = [self._line(line) for line in (rest.rstrip("\r"), "")]
+        return [message for message in messages if message is not None]
+
+    def _line(self, line: str) -> Optional[Dict[str, Any]]:
+        if line.startswith("data:"):
+            self._data.append(line[6:] if line.startswith("data: ") else line[5:])
+            return None
+        if not line:
+            # A blank line ends an SSE event
+            data, self._data = "\n".join(self._data), []
+            return self._parse(data) if data else None
+        if line.startswith(("event:", "id:", "retry:", ":")):
+            return None
+        return self._parse(line)
+
+    def _parse(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            logger.debug(f"Skipping non JSON-RPC line: {text[:200]}")
+            return None
+
+
+async def read_streaming_response(response: Any, request_id: Optional[str], on_message: OnMessage) -> Dict[str, Any]:
+    """Read an HTTP response as it streams, passing server messages to on_message until the response
+
+    Works with aiohttp responses and the HTTP/2 responses of http_pool (headers, content.iter_any, read).
+    """
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type != "text/event-stream":
+        # A plain JSON body can only hold the response itself
+        return parse_streaming_response((await response.read()).decode("utf-8"), request_id)
+
+    decoder = StreamDecoder()
+    final_response = None
+
+    async def dispatch(messages: List[Dict[str, Any]]) -> None:
+        nonlocal final_response
+        for parsed in messages:
+            if "method" in parsed and "result" not in parsed and "error" not in parsed:
+                await on_message(parsed)
+            elif request_id is None or parsed.get("id") == request_id:
+                final_response = parsed
+
+    async for chunk in response.content.iter_any():
+        await dispatch(decoder.feed(chunk))
+    await dispatch(decoder.close())
+
+    if final_response is None:
+        raise RuntimeError(f"No response in event stream for request {request_id}")
+    return final_response
+
+
+class HttpStatusError(RuntimeError):
+    """Non-200 answer to a Streamable HTTP message (e.g. 404 for an expired session)"""
+
+    def __init__(self, status: int, body: str):
+        super().__init__(f"HTTP {status}: {body}")
+        self.status = status
+
+
+class MCPTransport:
+    """Base class for MCP transports"""
+
+    def __init__(self):
+        self.session_id = ""
+
+    @property
+    def connected(self) -> bool:
+        raise NotImplementedError
+
+    async def open(self) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+    async def send_request(self, message_data: Dict[str, Any], on_message: Optional[OnMessage] = None) -> Dict[str, Any]:
+        """Send a JSON-RPC request and return the response with the matching id
+
+        on_message, when given, receives the server messages sent before that response.
+        """
+        raise NotImplementedError
+
+    async def send_notification(self, message_data: Dict[str, Any]) -> None:
+        """Send a JSON-RPC notification (no response expected)"""
+        raise NotImplementedError
+
+
+class StreamableHttpTransport(MCPTransport):
+    """Streamable HTTP transport - one POST per message, JSON or SSE response body"""
+
+    def __init__(self, server_url: str, headers: Optional[Dict[str, str]] = None, http_pool: Any = None):
+        """
+        Args:
+            server_url: MCP endpoint URL
+            headers: Extra headers sent with every message (e.g. Authorization)
+            http_pool: Shared http_pool.SharedHttpPool; by default the transport owns its own session
+        """
+        super().__init__()
+        self.server_url = server_url
+        self.extra_headers = headers or {}
+        self.http_pool = http_pool
+        self.session = None
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None
+
+    async def open(self) -> None:
+        if self.http_pool is not None:
+            await self.http_pool.open()
+            self.session = self.http_pool.session
+            return
+
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(ssl=False)
+        self.session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self) -> None:
+        if self.session and self.http_pool is None:
+            await self.session.close()
+        self.session = None
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",  # New-line delimited JSON for streaming
+            **self.extra_headers
+        }
+        if self.session_id != "":
+            headers["Mcp-Session-Id"] = self.session_id
+        return headers
+
+    async def send_request(self, message_data: Dict[str, Any], on_message: Optional[OnMessage] = None) -> Dict[str, Any]:
+        async with self.session.post(
+                self.server_url,
+                json=message_data,
+                headers=self._headers(),
+                ssl=False
+        ) as response:
+            if response.status != 200:
+                raise HttpStatusError(response.status, await response.text())
+
+            self.session_id = response.headers["Mcp-Session-Id"]
+
+            if on_message is not None:
+                return await read_streaming_response(response, message_data.get("id"), on_message)
+
+            # Handle streaming response
+            full_response = ""
+            async for chunk in response.content.iter_chunked(1024):
+                chunk_text = chunk.decode('utf-8')
+                full_response += chunk_text
+
+        return parse_streaming_response(full_response, message_data.get("id"))
+
+    async def send_notification(self, message_data: Dict[str, Any]) -> None:
+        async with self.session.post(
+                self.server_url,
+                json=message_data,
+                headers={
+                    "Content-Type": "application/json",
+                    #"Accept": "application/x-ndjson"
+                    "Accept": "application/json, text/event-stream",
+                    "Mcp-Session-Id": self.session_id,
+                    **self.extra_headers
+                },
+                ssl=False
+        ) as response:
+            if response.status not in (200, 202):
+                logger.warning(f"Notification HTTP {response.status}: {await response.text()}")
+
+            # Consume the response even for notifications
+            async for chunk in response.content.iter_chunked(1024):
+                pass  # Just consume the stream
+
+
+class _ListenerQueue:
+    """Delivers one request's server messages to its on_message in order, off the stdio read loop"""
+
+    def __init__(self, on_message: OnMessage):
+        self.on_message = on_message
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                return
+            try:
+                await self.on_message(message)
+            except Exception as e:
+                logger.warning(f"on_message callback failed: {e}")
+
+    async def drain(self) -> None:
+        """Deliver what is queued, then stop"""
+        self.queue.put_nowait(None)
+        await self.task
+
+
+class StdioTransport(MCPTransport):
+    """Stdio transport - newline-delimited JSON-RPC over the pipes of a tool server subprocess"""
+
+    # Tool answers (e.g. Deep Wiki pages) easily exceed asyncio's 64 KiB default line limit
+    STREAM_LIMIT = 16 * 1024 * 1024
+
+    def __init__(self, command: List[str], env: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self.command = command
+        self.env = env
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._pending: Dict[Any, asyncio.Future] = {}
+        # on_message callbacks of in-flight requests, by the progressToken they sent
+        self._listeners: Dict[Any, _ListenerQueue] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def open(self) -> None:
+        logger.info(f"Starting stdio tool server: {' '.join(self.command)}")
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=self.env,
+            limit=self.STREAM_LIMIT
+        )
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def close(self) -> None:
+        if self.process is None:
+            return
+
+        if self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+
+        self.process = None
+
+    async def _write(self, message_data: Dict[str, Any]) -> None:
+        line = json.dumps(message_data, separators=(",", ":")) + "\n"
+        async with self._write_lock:
+            self.process.stdin.write(line.encode("utf-8"))
+            await self.process.stdin.drain()
+
+    async def _read_loop(self) -> None:
+        """Dispatch server messages to the requests waiting on their id"""
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    parsed_line = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring non JSON-RPC output from tool server: {line[:200]!r}")
+                    continue
+
+                future = self._pending.pop(parsed_line.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(parsed_line)
+                    continue
+
+                listener = self._listeners.get((parsed_line.get("params") or {}).get("progressToken"))
+                if listener is not None:
+                    # A slow callback must not hold up responses to other requests on the pipe
+                    listener.queue.put_nowait(parsed_line)
+                else:
+                    logger.debug(f"Unsolicited server message: {parsed_line.get('method')}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Tool server process exited"))
+            self._pending.clear()
+
+    async def send_request(self, message_data: Dict[str, Any], on_message: Optional[OnMessage] = None) -> Dict[str, Any]:
+        if not self.connected:
+            raise RuntimeError("Tool server process is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_data["id"]] = future
+        # Notifications on a shared pipe can only be matched to this request by its progress token
+        token = ((message_data.get("params") or {}).get("_meta") or {}).get("progressToken")
+        listener = None
+        if on_message is not None and token is not None:
+            listener = self._listeners[token] = _ListenerQueue(on_message)
+        try:
+            await self._write(message_data)
+            return await future
+        finally:
+            self._pending.pop(message_data["id"], None)
+            if listener is not None:
+                self._listeners.pop(token, None)
+                # Messages sent before the response still reach on_message before send_request returns
+                await listener.drain()
+
+    async def send_notification(self, message_data: Dict[str, Any]) -> None:
+        if not self.connected:
+            raise RuntimeError("Tool server process is not running")
+
+        await self._write(message_data)
+
+
+class InProcessTransport(MCPTransport):
+    """In-process transport - hands messages straight to a Python tool server object.
+
+    The server must provide `async handle(message: dict) -> Optional[dict]`,
+    returning None for notifications (see local_tool_server.LocalToolServer), and
+    accept a `notify` coroutine callback for messages sent before the response.
+    """
+
+    def __init__(self, server: Any):
+        super().__init__()
+        self.server = server
+        self._open = False
+
+    @property
+    def connected(self) -> bool:
+        return self._open
+
+    async def open(self) -> None:
+        self._open = True
+
+    async def close(self) -> None:
+        self._open = False
+
+    async def send_request(self, message_data: Dict[str, Any], on_message: Optional[OnMessage] = None) -> Dict[str, Any]:
+        if on_message is not None:
+            response = await self.server.handle(message_data, notify=on_message)
+        else:
+            response = await self.server.handle(message_data)
+        if response is None:
+            raise RuntimeError(f"No response for request: {message_data.get('method')}")
+        return response
+
+    async def send_notification(self, message_data: Dict[str, Any]) -> None:
+        await self.server.handle(message_data)
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmarks for the MCP client hot paths
+Fast, repeatable timings of the code that runs on every message, so parser and
+codec changes can be judged in seconds instead of with end-to-end load tests:
+- SSE / JSON-line parsing (mcp_transports.parse_streaming_response) and incremental
+  decoding of streamed bodies (mcp_transports.StreamDecoder)
+- MCPMessage construction and serialization (MCPClient.create_request / to_json_rpc)
+- content extraction (two-step extract_text, used by get_deepwiki_info)
+- system prompt / request construction (ClaudeMCPApp)
+- question cache normalization, embedding and lookups
+
+Every run happens in a fresh interpreter, and the suite is run several times: some
+timings (string building, allocation-heavy parsing) depend on the heap layout a process
+happens to get and differ by 2-3x between processes while being stable within one.
+A baseline keeps the best time of each benchmark over its runs plus the spread between
+runs, and compare allows that spread on top of the threshold.
+
+Baselines are JSON files under benchmarks/. They are machine specific: record one
+on the machine you compare on.
+
+Usage:
+    python microbench.py run                              # print timings
+    python microbench.py run --save benchmarks/baseline.json
+    python microbench.py compare --threshold 0.15         # exit 1 if anything got >15% (+ its spread) slower
+"""
+
+import argparse
+import gc
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "benchmarks" / "baseline.json"
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    """Register a setup function; it returns the zero-argument callable that is timed"""
+    def register(setup: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _answer(size: int) -> str:
+    text = "Codex is a coding agent that runs in your terminal. "
+    return (text * (size // len(text) + 1))[:size]
+
+
+def _sse_body(request_id: str, answer_bytes: int, progress_events: int = 0) -> str:
+    events = [
+        {"jsonrpc": "2.0", "method": "notifications/progress",
+         "params": {"progressToken": 1, "progress": i, "total": progress_events}}
+        for i in range(progress_events)
+    ]
+    events.append({"jsonrpc": "2.0", "id": request_id,
+                   "result": {"content": [{"type": "text", "text": _answer(answer_bytes)}], "isError": False}})
+    return "".join(f"event: message\ndata: {json.dumps(event)}\n\n" for event in events)
+
+
+# Parsing
+
+@benchmark("parse_sse_2k")
+def bench_parse_sse_small():
+    from mcp_transports import parse_streaming_response
+
+    body = _sse_body("req-1", 2048)
+    return lambda: parse_streaming_response(body, "req-1")
+
+
+@benchmark("parse_sse_256k")
+def bench_parse_sse_large():
+    from mcp_transports import parse_streaming_response
+
+    body = _sse_body("req-1", 256 * 1024)
+    return lambda: parse_streaming_response(body, "req-1")
+
+
+@benchmark("parse_sse_20_progress_events")
+def bench_parse_sse_progress():
+    from mcp_transports import parse_streaming_response
+
+    body = _sse_body("req-1", 2048, progress_events=20)
+    return lambda: parse_streaming_response(body, "req-1")
+
+
+@benchmark("parse_json_2k")
+def bench_parse_json():
+    from mcp_transports import parse_streaming_response
+
+    body = json.dumps({"jsonrpc": "2.0", "id": "req-1",
+                       "result": {"content": [{"type": "text", "text": _answer(2048)}], "isError": False}})
+    return lambda: parse_streaming_response(body, "req-1")
+
+
+def _stream_chunks(body: str, chunk_size: int) -> List[bytes]:
+    data = body.encode("utf-8")
+    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+def _decode_stream(chunks: List[bytes]) -> List[Dict[str, Any]]:
+    from mcp_transports import StreamDecoder
+
+    decoder = StreamDecoder()
+    messages = []
+    for chunk in chunks:
+        messages.extend(decoder.feed(chunk))
+    messages.extend(decoder.close())
+    return messages
+
+
+@benchmark("stream_decoder_sse_2k")
+def bench_stream_decoder_small():
+    chunks = _stream_chunks(_sse_body("req-1", 2048), 1024)
+    return lambda: _decode_stream(chunks)
+
+
+@benchmark("stream_decoder_sse_256k")
+def bench_stream_decoder_large():
+    chunks = _stream_chunks(_sse_body("req-1", 256 * 1024), 16 * 1024)
+    return lambda: _decode_stream(chunks)
+
+
+@benchmark("stream_decoder_20_progress_events")
+def bench_stream_decoder_progress():
+    chunks = _stream_chunks(_sse_body("req-1", 2048, progress_events=20), 1024)
+    return lambda: _decode_stream(chunks)
+
+
+# Messages
+
+@benchmark("mcp_request_build_and_dump")
+def bench_mcp_message():
+    from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient
+
+    client = MCPClient("http://127.0.0.1:1/mcp")
+    arguments = {"repoName": "openai/codex", "question": "How does Codex sandbox shell commands?"}
+
+    def build():
+        message = client.create_request("tools/call", {"name": "ask_question", "arguments": arguments})
+        return json.dumps(client.to_json_rpc(message))
+    return build
+
+
+@benchmark("extract_text_10_items")
+def bench_extract_text():
+    from deepwiki_anthropic_app_is_mcpclient_two_step import extract_text
+
+    result = {"content": [{"type": "text", "text": _answer(4096)} for _ in range(10)], "isError": False}
+    return lambda: extract_text(result)
+
+
+# Claude request construction
+
+def _claude_app():
+    from deepwiki_with_anthropic_llm_is_mcpclient import ClaudeMCPApp
+
+    return ClaudeMCPApp(api_key="benchmark")
+
+
+@benchmark("claude_system_message")
+def bench_system_message():
+    app = _claude_app()
+    return lambda: app.create_mcp_system_message("https://mcp.deepwiki.com/mcp")
+
+
+@benchmark("claude_message_params")
+def bench_message_params():
+    app = _claude_app()
+    prompt = "Based on its specification, provide a summary of the main points about OpenAI Codex"
+    return lambda: app.create_message_params(prompt, "https://mcp.deepwiki.com/mcp")
+
+
+# Question cache
+
+@benchmark("normalize_question")
+def bench_normalize():
+    from question_cache import normalize_question
+
+    return lambda: normalize_question("Please, what's the OpenAI Codex CLI and how doesn't it leak secrets?")
+
+
+@benchmark("ngram_vectorize")
+def bench_vectorize():
+    from question_cache import NgramVectorizer
+
+    vectorizer = NgramVectorizer()
+    return lambda: vectorizer("how does codex sandbox shell commands")
+
+
+def _filled_cache(entries: int):
+    from question_cache import SimilarityQuestionCache
+
+    cache = SimilarityQuestionCache(max_entries_per_repo=entries)
+    answer = {"content": [{"type": "text", "text": _answer(512)}]}
+    for i in range(entries):
+        cache.store("openai/codex", f"Question number {i} about Codex internals", answer)
+    return cache
+
+
+@benchmark("similarity_lookup_exact_1000")
+def bench_lookup_exact():
+    cache = _filled_cache(1000)
+    return lambda: cache.lookup("openai/codex", "Question number 500 about Codex internals")
+
+
+@benchmark("similarity_lookup_miss_1000")
+def bench_lookup_miss():
+    cache = _filled_cache(1000)
+    return lambda: cache.lookup("openai/codex", "Which models does the Codex CLI support?")
+
+
+def measure(fn: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    """Per-call time: calibrate the loop count to min_time per round, then take `repeat` rounds"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    rounds = []
+    # Like timeit: a collection landing in one round would be charged to whatever runs then
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            rounds.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "number": number,
+        "min_ns": min(rounds) * 1e9,
+        "median_ns": statistics.median(rounds) * 1e9
+    }
+
+
+def run_suite(names: List[str], repeat: int, min_time: float) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for name in names:
+        fn = BENCHMARKS[name]()
+        fn()  # warm up imports / caches outside the timing
+        results[name] = measure(fn, repeat, min_time)
+    return results
+
+
+def run_isolated(names: List[str], runs: int, repeat: int, min_time: float) -> Dict[str, Dict[str, Any]]:
+    """Run the suite `runs` times, each in a fresh interpreter, and combine the results per benchmark"""
+    per_run = []
+    for _ in range(runs):
+        command = [sys.executable, str(Path(__file__).resolve()), "worker",
+                   "--repeat", str(repeat), "--min-time", str(min_time), *names]
+        per_run.append(json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout))
+
+    results = {}
+    for name in names:
+        mins = [run[name]["min_ns"] for run in per_run]
+        results[name] = {
+            "number": per_run[0][name]["number"],
+            "min_ns": min(mins),
+            "median_ns": statistics.median(run[name]["median_ns"] for run in per_run),
+            "run_min_ns": mins,
+            # How far a typical process lands from the best one (median, so one disturbed run does not count)
+            "spread": statistics.median(mins) / min(mins) - 1
+        }
+    return results
+
+
+def select(pattern: Optional[str]) -> List[str]:
+    return [name for name in BENCHMARKS if not pattern or pattern in name]
+
+
+def environment() -> Dict[str, str]:
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "machine": platform.machine()}
+
+
+def format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def cmd_worker(args) -> int:
+    print(json.dumps(run_suite(args.names, args.repeat, args.min_time)))
+    return 0
+
+
+def cmd_run(args) -> int:
+    results = run_isolated(select(args.filter), args.runs, args.repeat, args.min_time)
+    print(f"{'benchmark':<36}{'min':>12}{'median':>12}{'spread':>10}{'loops':>10}")
+    for name, result in results.items():
+        print(f"{name:<36}{format_ns(result['min_ns']):>12}{format_ns(result['median_ns']):>12}"
+              f"{result['spread']:>10.1%}{result['number']:>10}")
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        baseline = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "environment": environment(),
+                    "settings": {"runs": args.runs, "repeat": args.repeat, "min_time": args.min_time},
+                    "results": results}
+        path.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nBaseline saved to {path}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    baseline = json.loads(Path(args.baseline).read_text())
+    if baseline.get("environment") != environment():
+        print(f"Warning: baseline was recorded on {baseline.get('environment')}, this is {environment()}\n")
+
+    names = [name for name in select(args.filter) if name in baseline["results"]]
+    results = run_isolated(names, args.runs, args.repeat, args.min_time)
+
+    def allowed(name: str) -> float:
+        # A benchmark is only as precise as its run-to-run spread
+        return args.threshold + baseline["results"][name].get("spread", 0.0)
+
+    def change(name: str) -> float:
+        return results[name]["min_ns"] / baseline["results"][name]["min_ns"] - 1
+
+    # A slowdown must show up again in another set of fresh processes before it counts
+    suspects = [name for name in names if change(name) > allowed(name)]
+    if suspects:
+        confirm = run_isolated(suspects, args.runs, args.repeat, args.min_time)
+        for name in suspects:
+            results[name]["min_ns"] = min(results[name]["min_ns"], confirm[name]["min_ns"])
+
+    regressions = []
+    print(f"{'benchmark':<36}{'baseline':>12}{'current':>12}{'change':>10}{'allowed':>10}")
+    for name in names:
+        # min is the least noisy estimate of the code's own cost
+        before, after = baseline["results"][name]["min_ns"], results[name]["min_ns"]
+        flag = ""
+        if change(name) > allowed(name):
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36}{format_ns(before):>12}{format_ns(after):>12}{change(name):>+10.1%}"
+              f"{allowed(name):>+10.1%}{flag}")
+
+    missing = [name for name in baseline["results"] if name not in BENCHMARKS]
+    if missing:
+        print(f"\nNo longer defined: {', '.join(missing)}")
+    new = [name for name in select(args.filter) if name not in baseline["results"]]
+    if new:
+        print(f"\nNot in the baseline: {', '.join(new)}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} + spread: {', '.join(regressions)}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} + spread")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP client hot path micro-benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and print timings")
+    run_parser.add_argument("--save", help="Write the results as a baseline JSON file")
+
+    compare_parser = commands.add_parser("compare", help="Run the suite and compare against a baseline")
+    compare_parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    compare_parser.add_argument("--threshold", type=float, default=0.15,
+                                help="Allowed slowdown as a fraction (0.15 = 15%%)")
+
+    # Used by run_isolated: times the named benchmarks in this process and prints JSON
+    worker_parser = commands.add_parser("worker")
+    worker_parser.add_argument("names", nargs="+")
+
+    for sub in (run_parser, compare_parser, worker_parser):
+        sub.add_argument("--repeat", type=int, default=7, help="Timed rounds per benchmark")
+        sub.add_argument("--min-time", type=float, default=0.1, help="Seconds per round")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--filter", help="Only benchmarks whose name contains this")
+        sub.add_argument("--runs", type=int, default=3, help="Separate processes the suite is run in")
+
+    args = parser.parse_args()
+
+    # The apps log every message at INFO, which would dominate the timings
+    logging.disable(logging.INFO)
+    sys.exit({"run": cmd_run, "compare": cmd_compare, "worker": cmd_worker}[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
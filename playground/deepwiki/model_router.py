@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Latency-Aware Model Routing for the Claude clients
+Every Anthropic call used to go to claude-sonnet-4 with max_tokens=4000, even to
+summarize a short Deep Wiki answer. ModelRouter picks the model per call:
+- tiers ordered by quality, each with its own max_tokens and input size ceiling
+- the required quality class ("fast", "standard", "best") sets the lowest usable tier;
+  small inputs (a short prompt plus tool result) may go one tier lower
+- among usable tiers the cheapest is taken, unless a bigger one has been observably
+  faster lately (per-model latency EWMA, which starts at the tier's expected latency
+  and drifts back to it while a model goes unsampled, so one slow call cannot rule a
+  tier out for good)
+- on an API error or a low-confidence answer (empty, truncated, "I don't know") the
+  call is retried on the next larger tier
+- routing decisions, fallbacks, per-model latency and the estimated latency saved
+  against always using the baseline model are exported by metrics()
+
+Usage:
+    router = ModelRouter()
+    ClaudeClient(api_key, router=router)                  # one-step / two-step apps
+    ClaudeMCPApp(api_key, router=router)
+    print(json.dumps(router.metrics(), indent=2))
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Any, Optional, List, Callable, Awaitable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BASELINE_MODEL = "claude-sonnet-4-20250514"
+
+
+@dataclass
+class ModelTier:
+    """A model the router may choose"""
+    name: str
+    model: str
+    quality: int  # Higher is more capable (and slower / more expensive)
+    max_tokens: int
+    max_input_tokens: int  # Inputs above this go to a larger tier
+    expected_latency: float  # Seconds per call until real calls have been observed
+
+
+DEFAULT_TIERS = [
+    ModelTier("small", "claude-3-5-haiku-20241022", quality=1, max_tokens=1024,
+              max_input_tokens=20_000, expected_latency=2.0),
+    ModelTier("medium", BASELINE_MODEL, quality=2, max_tokens=4000,
+              max_input_tokens=180_000, expected_latency=6.0),
+    ModelTier("large", "claude-opus-4-20250514", quality=3, max_tokens=4000,
+              max_input_tokens=180_000, expected_latency=12.0),
+]
+
+# Lowest tier quality each class may use
+QUALITY_CLASSES = {"fast": 1, "standard": 2, "best": 3}
+
+LOW_CONFIDENCE_PATTERN = re.compile(
+    r"\b(i don't know|i do not know|i'm not sure|i am not sure|i cannot determine|"
+    r"not enough information|insufficient information|unable to (answer|determine))\b",
+    re.IGNORECASE
+)
+
+
+def estimate_tokens(chars: int) -> int:
+    """Rough token count for English text and JSON (about 4 characters per token)"""
+    return chars // 4 + 1
+
+
+def low_confidence(text: str, stop_reason: Optional[str]) -> bool:
+    """Default check for an answer that a larger model should redo"""
+    if stop_reason == "tool_use":
+        return False
+    if stop_reason == "max_tokens" or not text.strip():
+        return True
+    # Only a hedge near the start means the model gave up; later ones are usually caveats
+    return LOW_CONFIDENCE_PATTERN.search(text[:300]) is not None
+
+
+@dataclass
+class RouteDecision:
+    tier: ModelTier
+    reason: str  # "quality", "size" or "latency"
+    input_tokens: int
+
+
+class _ModelStats:
+    def __init__(self, expected_latency: float):
+        self.calls = 0
+        self.errors = 0
+        self.low_confidence = 0
+        self.prior = expected_latency
+        self.observed = False
+        self._ewma = expected_latency
+        self._updated = time.monotonic()
+
+    def latency(self, half_life: float) -> float:
+        """Latency EWMA, decayed toward the prior by the time since the last sample"""
+        if half_life <= 0:
+            return self._ewma
+        weight = 0.5 ** ((time.monotonic() - self._updated) / half_life)
+        return self.prior + (self._ewma - self.prior) * weight
+
+    def observe(self, latency: float, alpha: float, half_life: float) -> None:
+        self._ewma = alpha * latency + (1 - alpha) * self.latency(half_life)
+        self._updated = time.monotonic()
+        self.observed = True
+
+
+class ModelRouter:
+    """Chooses a model tier per call and falls back to larger tiers"""
+
+    def __init__(self, tiers: Optional[List[ModelTier]] = None, baseline_model: str = BASELINE_MODEL,
+                 small_input_tokens: int = 2_000, latency_slack: float = 1.25, alpha: float = 0.2,
+                 half_life: float = 300.0, confidence: Callable[[str, Optional[str]], bool] = low_confidence):
+        """
+        Args:
+            tiers: Candidate models, defaults to Haiku / Sonnet / Opus
+            baseline_model: The model every call used before routing (for the savings estimate)
+            small_input_tokens: Inputs up to this size may use one tier below their quality class
+            latency_slack: A larger tier is preferred when the cheaper one is this much slower
+            alpha: Weight of the newest sample in the latency EWMA
+            half_life: Seconds after which half of a model's deviation from its expected latency is
+                forgotten when it gets no calls (0 = never)
+            confidence: (text, stop_reason) -> True when the answer should be retried on a larger tier
+        """
+        self.tiers = sorted(tiers or DEFAULT_TIERS, key=lambda tier: tier.quality)
+        self.baseline_model = baseline_model
+        self.small_input_tokens = small_input_tokens
+        self.latency_slack = latency_slack
+        self.alpha = alpha
+        self.half_life = half_life
+        self.is_low_confidence = confidence
+        self.stats = {tier.model: _ModelStats(tier.expected_latency) for tier in self.tiers}
+        if baseline_model not in self.stats:
+            self.stats[baseline_model] = _ModelStats(max(tier.expected_latency for tier in self.tiers))
+        self.decisions: Dict[str, int] = {tier.name: 0 for tier in self.tiers}
+        self.reasons: Dict[str, int] = {"quality": 0, "size": 0, "latency": 0}
+        self.fallbacks: Dict[str, int] = {"error": 0, "low_confidence": 0}
+        self.routed_calls = 0
+        self.latency_saved = 0.0
+
+    def latency(self, model: str) -> float:
+        return self.stats[model].latency(self.half_life)
+
+    def route(self, input_chars: int, quality: str = "standard", record: bool = True) -> RouteDecision:
+        """Pick the tier for an input of input_chars characters
+
+        record=False leaves the decision counters alone, for callers (e.g. batches) whose
+        outcome and latency never come back through run() / run_sync().
+        """
+        if quality not in QUALITY_CLASSES:
+            raise ValueError(f"Unknown quality class {quality!r}, expected one of {list(QUALITY_CLASSES)}")
+        input_tokens = estimate_tokens(input_chars)
+        min_quality = QUALITY_CLASSES[quality]
+        reason = "quality"
+        if input_tokens <= self.small_input_tokens and min_quality > 1:
+            min_quality -= 1
+            reason = "size"
+
+        usable = [tier for tier in self.tiers if tier.quality >= min_quality and input_tokens <= tier.max_input_tokens]
+        if not usable:
+            # Nothing is rated for this input size; the largest context is the best bet
+            usable = [max(self.tiers, key=lambda tier: (tier.max_input_tokens, tier.quality))]
+            reason = "size"
+        elif usable[0].quality > min_quality:
+            reason = "size"
+
+        chosen = usable[0]
+        fastest = min(usable, key=lambda tier: self.latency(tier.model))
+        if self.latency(fastest.model) * self.latency_slack < self.latency(chosen.model):
+            chosen, reason = fastest, "latency"
+
+        if not record:
+            return RouteDecision(chosen, reason, input_tokens)
+        self.decisions[chosen.name] += 1
+        self.reasons[reason] += 1
+        logger.info(f"Routing {input_tokens} input tokens ({quality}) to {chosen.model} ({reason})")
+        return RouteDecision(chosen, reason, input_tokens)
+
+    def escalate(self, tier: ModelTier) -> Optional[ModelTier]:
+        """The next larger tier, if any"""
+        larger = [candidate for candidate in self.tiers if candidate.quality > tier.quality]
+        return larger[0] if larger else None
+
+    def _after_attempt(self, tier: ModelTier, started: float, error: Optional[Exception],
+                       text: str = "", stop_reason: Optional[str] = None) -> Optional[ModelTier]:
+        """Book one attempt; returns the tier to retry on, or None when the result stands"""
+        stats = self.stats[tier.model]
+        stats.calls += 1
+        if error is not None:
+            stats.errors += 1
+            fallback = self.escalate(tier)
+            if fallback is None:
+                raise error
+            self.fallbacks["error"] += 1
+            logger.warning(f"{tier.model} failed ({error}), retrying on {fallback.model}")
+            return fallback
+
+        stats.observe(time.perf_counter() - started, self.alpha, self.half_life)
+        if self.is_low_confidence(text, stop_reason):
+            stats.low_confidence += 1
+            fallback = self.escalate(tier)
+            if fallback is not None:
+                self.fallbacks["low_confidence"] += 1
+                logger.info(f"Low-confidence answer from {tier.model}, retrying on {fallback.model}")
+                return fallback
+        return None
+
+    def _finish(self, first_started: float) -> None:
+        self.routed_calls += 1
+        self.latency_saved += self.latency(self.baseline_model) - (time.perf_counter() - first_started)
+
+    async def run(self, call: Callable[[ModelTier], Awaitable[T]], input_chars: int,
+                  output: Callable[[T], tuple], quality: str = "standard") -> T:
+        """
+        Run call(tier) on the routed tier, falling back to larger tiers
+
+        Args:
+            call: Makes the API request with tier.model / tier.max_tokens
+            input_chars: Size of the prompt, context and tool results
+            output: result -> (text, stop_reason), for the confidence check
+            quality: Required quality class
+        """
+        tier = self.route(input_chars, quality).tier
+        first_started = time.perf_counter()
+        while True:
+            started = time.perf_counter()
+            try:
+                result = await call(tier)
+            except Exception as e:
+                tier = self._after_attempt(tier, started, e)
+                continue
+            fallback = self._after_attempt(tier, started, None, *output(result))
+            if fallback is None:
+                self._finish(first_started)
+                return result
+            tier = fallback
+
+    def run_sync(self, call: Callable[[ModelTier], T], input_chars: int,
+                 output: Callable[[T], tuple], quality: str = "standard") -> T:
+        """run() for synchronous callers such as ClaudeMCPApp"""
+        tier = self.route(input_chars, quality).tier
+        first_started = time.perf_counter()
+        while True:
+            started = time.perf_counter()
+            try:
+                result = call(tier)
+            except Exception as e:
+                tier = self._after_attempt(tier, started, e)
+                continue
+            fallback = self._after_attempt(tier, started, None, *output(result))
+            if fallback is None:
+                self._finish(first_started)
+                return result
+            tier = fallback
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "baseline_model": self.baseline_model,
+            "routed_calls": self.routed_calls,
+            "decisions": dict(self.decisions),
+            "reasons": dict(self.reasons),
+            "fallbacks": dict(self.fallbacks),
+            "models": {
+                model: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "low_confidence": stats.low_confidence,
+                    "latency_ewma_s": stats.latency(self.half_life),
+                    "observed": stats.observed
+                }
+                for model, stats in self.stats.items()
+            },
+            # Against the baseline model's typical latency, fallbacks included
+            "estimated_latency_saved_s": self.latency_saved
+        }
+
+
+def message_output(message: Any) -> tuple:
+    """(text, stop_reason) of an SDK Message"""
+    text = "".join(block.text for block in message.content if getattr(block, "type", None) == "text")
+    return text, message.stop_reason
+
+
+def json_output(response: Dict[str, Any]) -> tuple:
+    """(text, stop_reason) of a Messages API JSON response"""
+    text = "".join(block.get("text", "") for block in response.get("content", []) if block.get("type") == "text")
+    return text, response.get("stop_reason")
+
+
+async def simulate(args) -> Dict[str, Any]:
+    """Fake Claude with per-tier latency, failures and hedging on large inputs"""
+    rng = random.Random(args.seed)
+    tiers = [replace(tier, expected_latency=tier.expected_latency * args.time_scale) for tier in DEFAULT_TIERS]
+
+    async def fake_claude(tier: ModelTier, input_chars: int) -> Dict[str, Any]:
+        await asyncio.sleep(tier.expected_latency * rng.uniform(0.7, 1.3) + input_chars * 1e-7)
+        if rng.random() < args.error_rate:
+            raise RuntimeError("Claude API error 529: overloaded")
+        if tier.quality == 1 and input_chars > 3_000 and rng.random() < 0.3:
+            return {"content": [{"type": "text", "text": "I'm not sure what this document says."}],
+                    "stop_reason": "end_turn"}
+        return {"content": [{"type": "text", "text": "Summary..."}], "stop_reason": "end_turn"}
+
+    router = ModelRouter(tiers)
+    sizes = [rng.choice([1_500, 4_000, 12_000, 40_000, 90_000]) for _ in range(args.calls)]
+    for size in sizes:
+        quality = rng.choices(["fast", "standard", "best"], weights=[0.2, 0.75, 0.05])[0]
+        await router.run(lambda tier: fake_claude(tier, size), size, json_output, quality)
+    return router.metrics()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model routing simulation")
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="Fraction of real model latency to sleep")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(simulate(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
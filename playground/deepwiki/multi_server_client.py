@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Multi-Server MCP Client
+Initializes sessions to several registered MCP servers concurrently, merges their
+tool catalogs and fans a question out to them in parallel:
+- policy "all": gather every server's answer (each bounded by its own timeout)
+- policy "first": return the first good answer and cancel the rest
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List
+
+from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient
+from mcp_transports import StreamableHttpTransport
+
+logger = logging.getLogger(__name__)
+
+TOOL_SEPARATOR = "__"
+
+
+@dataclass
+class ServerConfig:
+    """A registered MCP server and how to put a research question to it"""
+    name: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    timeout: float = 30.0
+    # Tool used by ask(); "{question}" / "{repo}" placeholders in the arguments are filled in
+    question_tool: Optional[str] = None
+    question_arguments: Dict[str, str] = field(default_factory=dict)
+
+
+def _bearer(env_var: str) -> Dict[str, str]:
+    token = os.getenv(env_var)
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+# Servers listed in proxy_gateway/README.md
+REGISTERED_SERVERS = [
+    ServerConfig("deepwiki", "https://mcp.deepwiki.com/mcp",
+                 question_tool="ask_question",
+                 question_arguments={"repoName": "{repo}", "question": "{question}"}),
+    ServerConfig("grep", "https://mcp.grep.app",
+                 question_tool="searchGitHub",
+                 question_arguments={"query": "{question}"}),
+    ServerConfig("github", "https://api.githubcopilot.com/mcp/", headers=_bearer("GITHUB_TOKEN")),
+    ServerConfig("huggingface", "https://huggingface.co/mcp", headers=_bearer("HF_TOKEN")),
+    ServerConfig("sentry", "https://mcp.sentry.dev/mcp", headers=_bearer("SENTRY_TOKEN")),
+]
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of one server's part of a fan-out"""
+    server: str
+    ok: bool
+    latency: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        if not self.result:
+            return ""
+        return "".join(item.get("text", "") for item in self.result.get("content", []) if item.get("type") == "text")
+
+
+class MultiServerClient:
+    """Concurrent sessions to N MCP servers with a merged tool catalog"""
+
+    def __init__(self, servers: List[ServerConfig], client_factory=None):
+        """
+        Args:
+            servers: Servers to connect to
+            client_factory: Optional callable(ServerConfig) -> MCPClient, e.g. for local transports
+        """
+        self.servers: Dict[str, ServerConfig] = {server.name: server for server in servers}
+        self.client_factory = client_factory or (
+            lambda server: MCPClient(transport=StreamableHttpTransport(server.url, headers=server.headers))
+        )
+        self.clients: Dict[str, MCPClient] = {}
+        self.tools: Dict[str, List[Dict[str, Any]]] = {}
+        self.failed: Dict[str, str] = {}
+
+    async def _connect(self, server: ServerConfig) -> None:
+        client = self.client_factory(server)
+        try:
+            tools = await asyncio.wait_for(self._initialize(client), timeout=server.timeout)
+        except Exception as e:
+            await client.__aexit__(None, None, None)
+            error = str(e) or type(e).__name__
+            logger.warning(f"Server {server.name} unavailable: {error}")
+            self.failed[server.name] = error
+            return
+        self.clients[server.name] = client
+        self.tools[server.name] = tools
+
+    async def _initialize(self, client: MCPClient) -> List[Dict[str, Any]]:
+        await client.__aenter__()
+        await client.initialize()
+        return (await client.list_tools()).get("tools", [])
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        await asyncio.gather(*(self._connect(server) for server in self.servers.values()))
+        logger.info(f"Connected to {sorted(self.clients)} in {time.perf_counter() - start:.2f}s"
+                    + (f", failed: {sorted(self.failed)}" if self.failed else ""))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.gather(*(client.__aexit__(exc_type, exc_val, exc_tb) for client in self.clients.values()),
+                             return_exceptions=True)
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """Merged catalog; tool names are prefixed with "<server>__" """
+        return [
+            dict(tool, name=f"{server}{TOOL_SEPARATOR}{tool['name']}")
+            for server, tools in self.tools.items()
+            for tool in tools
+        ]
+
+    async def call_tool(self, qualified_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a tool from the merged catalog"""
+        server, _, tool = qualified_name.partition(TOOL_SEPARATOR)
+        if server not in self.clients:
+            raise RuntimeError(f"Unknown or unavailable server: {server}")
+        return await self.clients[server].call_tool(tool, arguments)
+
+    async def _timed_call(self, server: str, tool: str, arguments: Dict[str, Any]) -> FanOutResult:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self.clients[server].call_tool(tool, arguments),
+                                            timeout=self.servers[server].timeout)
+            ok = not result.get("isError", False)
+            return FanOutResult(server, ok, time.perf_counter() - start, result=result,
+                                error=None if ok else "tool reported isError")
+        except asyncio.TimeoutError:
+            return FanOutResult(server, False, time.perf_counter() - start, error="timeout")
+        except Exception as e:
+            return FanOutResult(server, False, time.perf_counter() - start, error=str(e))
+
+    async def fan_out(self, calls: Dict[str, tuple], policy: str = "all") -> List[FanOutResult]:
+        """Dispatch {server: (tool, arguments)} in parallel.
+
+        "all" returns every result in completion order; "first" returns as soon as one
+        server gives a good (ok, non-empty) answer and cancels the others.
+        """
+        if policy not in ("all", "first"):
+            raise ValueError(f"Unknown policy: {policy}")
+
+        tasks = {
+            asyncio.create_task(self._timed_call(server, tool, arguments)): server
+            for server, (tool, arguments) in calls.items()
+            if server in self.clients
+        }
+        results: List[FanOutResult] = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    results.append(result)
+                    if policy == "first" and result.ok and result.text:
+                        return results
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        return results
+
+    def question_calls(self, question: str, repo: str = "") -> Dict[str, tuple]:
+        """Per-server (tool, arguments) for servers that have a question tool in their catalog"""
+        calls = {}
+        for name, server in self.servers.items():
+            available = {tool.get("name") for tool in self.tools.get(name, [])}
+            if server.question_tool and server.question_tool in available:
+                arguments = {key: value.format(question=question, repo=repo)
+                             for key, value in server.question_arguments.items()}
+                calls[name] = (server.question_tool, arguments)
+        return calls
+
+    async def ask(self, question: str, repo: str = "", policy: str = "all") -> List[FanOutResult]:
+        """Put a research question to every server that can answer it"""
+        return await self.fan_out(self.question_calls(question, repo), policy=policy)
+
+
+async def main():
+    """Ask the same question to Deep Wiki and Grep in parallel"""
+    servers = [server for server in REGISTERED_SERVERS if server.name in ("deepwiki", "grep")]
+
+    async with MultiServerClient(servers) as multi:
+        print("Merged tool catalog:")
+        for tool in multi.list_tools():
+            print(f"  - {tool['name']}")
+
+        for policy in ("first", "all"):
+            start = time.perf_counter()
+            results = await multi.ask("How does Codex sandbox shell commands?", repo="openai/codex", policy=policy)
+            print(f"\nPolicy '{policy}' finished in {time.perf_counter() - start:.2f}s")
+            print("-" * 60)
+            for result in results:
+                status = "ok" if result.ok else f"failed ({result.error})"
+                print(f"{result.server:<12} {result.latency:6.2f}s  {status}  {len(result.text)} chars")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Question Cache
+Similarity cache in front of MCPClient.ask_question. Questions are normalized
+("What's OpenAI Codex?" -> "what is openai codex"), embedded as hashed character
+n-gram vectors with NumPy and indexed per repository, so paraphrased repeats are
+served from cache when their cosine similarity clears a configurable threshold.
+Numbers and versions barely move an n-gram vector ("python 2" vs "python 3"), so a
+near-duplicate must also mention exactly the same numeric tokens to be a hit.
+
+A sample of hits can be audited against the upstream answer to measure false hits.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CONTRACTIONS = {
+    "what's": "what is", "how's": "how is", "where's": "where is", "who's": "who is",
+    "it's": "it is", "that's": "that is", "there's": "there is",
+    "what're": "what are", "how're": "how are", "doesn't": "does not", "don't": "do not",
+    "isn't": "is not", "aren't": "are not", "can't": "cannot", "won't": "will not",
+}
+
+CONTRACTION_PATTERN = re.compile(r"\b(" + "|".join(re.escape(c) for c in CONTRACTIONS) + r")\b")
+
+# Politeness / framing words that do not change what is being asked
+FILLER_WORDS = {"please", "pls", "kindly", "the", "a", "an"}
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, expand contractions, strip punctuation and filler words"""
+    text = unicodedata.normalize("NFKC", question).lower().replace("’", "'")
+    text = CONTRACTION_PATTERN.sub(lambda match: CONTRACTIONS[match.group(0)], text)
+    text = re.sub(r"[^\w\s/.-]", " ", text)
+    words = [word.strip(".-") for word in text.split()]
+    return " ".join(word for word in words if word and word not in FILLER_WORDS)
+
+
+def numeric_tokens(normalized: str) -> frozenset:
+    """Words of a normalized question that contain a digit (numbers, versions, "gpt-4", "py3")"""
+    return frozenset(word for word in normalized.split() if any(char.isdigit() for char in word))
+
+
+class NgramVectorizer:
+    """Hashed character n-gram vectors, L2-normalized so a dot product is the cosine similarity"""
+
+    def __init__(self, n: int = 3, dim: int = 2048):
+        self.n = n
+        self.dim = dim
+
+    def __call__(self, text: str) -> np.ndarray:
+        padded = f" {text} "
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if len(padded) < self.n:
+            return vector
+        buckets = [zlib.crc32(padded[i:i + self.n].encode("utf-8")) % self.dim
+                   for i in range(len(padded) - self.n + 1)]
+        np.add.at(vector, buckets, 1.0)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class _RepoIndex:
+    """Question vectors and cached answers for one repository"""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        # Hash of each question's numeric_tokens, compared in one vector operation per lookup
+        self.number_keys = np.zeros(capacity, dtype=np.int64)
+        self.questions: List[str] = []
+        self.answers: List[Dict[str, Any]] = []
+        self.created: List[float] = []
+        self.exact: Dict[str, int] = {}
+        # Row the next question overwrites once the index is full
+        self.oldest = 0
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def add(self, normalized: str, vector: np.ndarray, answer: Dict[str, Any], max_entries: int) -> None:
+        if normalized in self.exact:
+            row = self.exact[normalized]
+            self.answers[row] = answer
+            self.created[row] = time.monotonic()
+            return
+        if len(self) < max_entries:
+            if len(self) == self.vectors.shape[0]:
+                self.vectors = np.vstack([self.vectors, np.zeros_like(self.vectors)])
+                self.number_keys = np.concatenate([self.number_keys, np.zeros_like(self.number_keys)])
+            row = len(self)
+            self.questions.append(normalized)
+            self.answers.append(answer)
+            self.created.append(time.monotonic())
+        else:
+            # Full: rows are reused in insertion order (a ring), so evicting moves no other row
+            row = self.oldest
+            self.oldest = (row + 1) % len(self)
+            del self.exact[self.questions[row]]
+            self.questions[row] = normalized
+            self.answers[row] = answer
+            self.created[row] = time.monotonic()
+        self.vectors[row] = vector
+        self.number_keys[row] = hash(numeric_tokens(normalized))
+        self.exact[normalized] = row
+
+
+@dataclass
+class CacheLookup:
+    """Result of a similarity lookup"""
+    hit: bool
+    similarity: float = 0.0
+    # Same normalized question, as opposed to a near-duplicate
+    exact: bool = False
+    matched_question: Optional[str] = None
+    answer: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class CacheStats:
+    lookups: int = 0
+    hits: int = 0
+    exact_hits: int = 0
+    audits: int = 0
+    false_hits: int = 0
+    false_hit_samples: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def false_hit_rate(self) -> float:
+        return self.false_hits / self.audits if self.audits else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "hit_rate": self.hit_rate,
+            "audits": self.audits,
+            "false_hits": self.false_hits,
+            "false_hit_rate": self.false_hit_rate,
+            "false_hit_samples": self.false_hit_samples[-10:]
+        }
+
+
+class SimilarityQuestionCache:
+    """Per-repository similarity index over normalized questions"""
+
+    def __init__(self, threshold: float = 0.92, max_entries_per_repo: int = 1000,
+                 ttl: Optional[float] = None, vectorizer: Optional[NgramVectorizer] = None):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cached answer to be served
+            max_entries_per_repo: Oldest questions are evicted beyond this
+            ttl: Seconds a cached answer stays valid (None = forever)
+            vectorizer: Question embedding, defaults to hashed character 3-grams
+        """
+        self.threshold = threshold
+        self.max_entries_per_repo = max_entries_per_repo
+        self.ttl = ttl
+        self.vectorizer = vectorizer or NgramVectorizer()
+        self.repos: Dict[str, _RepoIndex] = {}
+        self.stats = CacheStats()
+
+    def lookup(self, repository: str, question: str) -> CacheLookup:
+        self.stats.lookups += 1
+        index = self.repos.get(repository.lower())
+        if not index:
+            return CacheLookup(hit=False)
+
+        normalized = normalize_question(question)
+        row = index.exact.get(normalized)
+        exact = row is not None
+        if exact:
+            similarity = 1.0
+        else:
+            similarities = index.vectors[:len(index)] @ self.vectorizer(normalized)
+            # Only questions about the same numbers / versions may share an answer
+            similarities[index.number_keys[:len(index)] != hash(numeric_tokens(normalized))] = -1.0
+            row = int(np.argmax(similarities))
+            similarity = float(similarities[row])
+
+        if similarity < self.threshold:
+            return CacheLookup(hit=False, similarity=similarity, matched_question=index.questions[row])
+        if self.ttl is not None and time.monotonic() - index.created[row] > self.ttl:
+            return CacheLookup(hit=False, similarity=similarity, matched_question=index.questions[row])
+
+        self.stats.hits += 1
+        if exact:
+            self.stats.exact_hits += 1
+        return CacheLookup(hit=True, similarity=similarity, exact=exact, matched_question=index.questions[row],
+                           answer=index.answers[row])
+
+    def store(self, repository: str, question: str, answer: Dict[str, Any]) -> None:
+        index = self.repos.setdefault(repository.lower(), _RepoIndex(self.vectorizer.dim))
+        normalized = normalize_question(question)
+        index.add(normalized, self.vectorizer(normalized), answer, self.max_entries_per_repo)
+
+    def answer_similarity(self, first: Dict[str, Any], second: Dict[str, Any]) -> float:
+        """Cosine similarity of two tool results' text, used by the false-hit audit"""
+        return float(self.vectorizer(_result_text(first).lower()) @ self.vectorizer(_result_text(second).lower()))
+
+
+def _result_text(result: Dict[str, Any]) -> str:
+    return "".join(item.get("text", "") for item in result.get("content", []) if item.get("type") == "text")
+
+
+class SimilarityCachedClient:
+    """Wraps an MCPClient so ask_question goes through a SimilarityQuestionCache"""
+
+    def __init__(self, client: Any, cache: SimilarityQuestionCache,
+                 audit_rate: float = 0.0, audit_threshold: float = 0.5):
+        """
+        Args:
+            client: Initialized MCPClient (anything with ask_question)
+            cache: Similarity cache to consult and fill
+            audit_rate: Fraction of non-exact hits re-asked upstream in the background
+            audit_threshold: Answer similarity below which an audited hit counts as false
+        """
+        self.client = client
+        self.cache = cache
+        self.audit_rate = audit_rate
+        self.audit_threshold = audit_threshold
+        self._audits = set()
+
+    async def ask_question(self, repository: str, question: str) -> Dict[str, Any]:
+        lookup = self.cache.lookup(repository, question)
+        if lookup.hit:
+            logger.info(f"Similarity cache hit ({lookup.similarity:.2f}): {question!r} ~ {lookup.matched_question!r}")
+            if not lookup.exact and random.random() < self.audit_rate:
+                task = asyncio.create_task(self._audit(repository, question, lookup))
+                self._audits.add(task)
+                task.add_done_callback(self._audits.discard)
+            return lookup.answer
+
+        answer = await self.client.ask_question(repository, question)
+        if not answer.get("isError"):
+            self.cache.store(repository, question, answer)
+        return answer
+
+    async def _audit(self, repository: str, question: str, lookup: CacheLookup) -> None:
+        try:
+            fresh = await self.client.ask_question(repository, question)
+        except Exception as e:
+            logger.warning(f"Cache audit failed: {e}")
+            return
+        stats = self.cache.stats
+        stats.audits += 1
+        answer_similarity = self.cache.answer_similarity(lookup.answer, fresh)
+        if answer_similarity < self.audit_threshold:
+            stats.false_hits += 1
+            stats.false_hit_samples.append({
+                "repository": repository,
+                "question": question,
+                "matched_question": lookup.matched_question,
+                "question_similarity": lookup.similarity,
+                "answer_similarity": answer_similarity
+            })
+
+    async def drain_audits(self) -> None:
+        """Wait for background audits to finish (e.g. before reporting)"""
+        if self._audits:
+            await asyncio.gather(*self._audits, return_exceptions=True)
+
+
+async def main():
+    """Replay paraphrased questions against the in-process local tool server"""
+    import json
+
+    from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient
+    from local_tool_server import LocalToolServer
+    from mcp_transports import InProcessTransport
+
+    questions = [
+        "What is OpenAI Codex?",
+        "what's openai codex",
+        "What is OpenAI Codex",
+        "Please, what is OpenAI Codex?",
+        "How does Codex sandbox shell commands?",
+        "how does codex sandbox shell commands",
+        "How does Codex sandbox its shell commands?",
+        "What is the OpenAI Codex CLI?",
+        "Which models does Codex support?",
+    ]
+
+    async with MCPClient(transport=InProcessTransport(LocalToolServer())) as client:
+        await client.initialize()
+        cached = SimilarityCachedClient(client, SimilarityQuestionCache(), audit_rate=1.0)
+        for question in questions:
+            await cached.ask_question("openai/codex", question)
+        await cached.drain_audits()
+
+    print(json.dumps(cached.cache.stats.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
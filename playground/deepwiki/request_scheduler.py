@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Priority-Aware Request Scheduler
+Interactive users and bulk jobs share the same upstream MCP / Anthropic capacity.
+RequestScheduler sits in front of MCPClient.call_tool and ClaudeClient.send_message:
+- capacity: how many upstream requests may be in flight at once
+- priority classes: a free slot always goes to the highest-priority class with waiting work
+- per-class shares: a class may hold at most `share` of the capacity, so a flood of
+  batch work always leaves headroom for interactive requests
+- weighted fair queuing across tenants inside a class (start-time fair queuing: waiters
+  are served in order of their start tag), so one bulk job cannot starve the others;
+  a Claude call's quality class sets its cost, so "best" calls use up a tenant's share faster
+- queue-time metrics per class (p50 / p95 / p99)
+
+Usage:
+    scheduler = RequestScheduler(capacity=8)
+    mcp = ScheduledMCPClient(client, scheduler)
+    await mcp.ask_question("openai/codex", "What is OpenAI Codex?", priority="interactive", tenant="web")
+    await mcp.ask_question("openai/codex", question, priority="batch", tenant="nightly-export")
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PriorityClass:
+    """A class of traffic sharing the scheduler's capacity"""
+    name: str
+    priority: int  # Lower is served first
+    share: float = 1.0  # Maximum fraction of the capacity this class may hold in flight
+
+
+# Fair-queuing cost of a Claude call per model_router quality class (bigger models hold the upstream longer)
+QUALITY_COSTS = {"fast": 0.5, "standard": 1.0, "best": 3.0}
+
+DEFAULT_CLASSES = [
+    PriorityClass("interactive", priority=0, share=1.0),
+    PriorityClass("batch", priority=1, share=0.75),
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class _Waiter:
+    def __init__(self, tenant: str, start_tag: float, future: asyncio.Future):
+        self.tenant = tenant
+        self.start_tag = start_tag
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class _ClassQueue:
+    """Per-class tenant-fair queue and counters"""
+
+    def __init__(self, spec: PriorityClass, capacity: int):
+        self.spec = spec
+        self.limit = max(1, math.floor(spec.share * capacity))
+        self.heap: List[tuple] = []
+        self.virtual_time = 0.0
+        self.tenant_finish: Dict[str, float] = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.submitted = 0
+        self.completed = 0
+        self.queue_times: deque = deque(maxlen=10000)
+
+    def push(self, waiter: _Waiter, seq: int) -> None:
+        heapq.heappush(self.heap, (waiter.start_tag, seq, waiter))
+        self.waiting += 1
+
+    def pop(self) -> Optional[_Waiter]:
+        while self.heap:
+            _, _, waiter = heapq.heappop(self.heap)
+            # A cancelled waiter is accounted for by its own task
+            if not waiter.future.done():
+                self.waiting -= 1
+                return waiter
+        return None
+
+
+class RequestScheduler:
+    """Admission control for a shared upstream: priority classes, shares and tenant fairness"""
+
+    def __init__(self, capacity: int = 8, classes: Optional[List[PriorityClass]] = None,
+                 tenant_weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            capacity: Upstream requests allowed in flight at once
+            classes: Priority classes, defaults to interactive (share 1.0) and batch (share 0.75)
+            tenant_weights: Relative weight per tenant within a class (default 1.0)
+        """
+        self.capacity = capacity
+        self.classes: Dict[str, _ClassQueue] = {
+            spec.name: _ClassQueue(spec, capacity) for spec in (classes or DEFAULT_CLASSES)
+        }
+        self._by_priority = sorted(self.classes.values(), key=lambda queue: queue.spec.priority)
+        self.tenant_weights = tenant_weights or {}
+        self.in_flight = 0
+        self._seq = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive", tenant: str = "default", cost: float = 1.0):
+        """Wait for an upstream slot; hold it for the duration of the block"""
+        queue = self.classes.get(priority)
+        if queue is None:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        # Start-time fair queuing: a request's start tag is the later of the class virtual time and its
+        # tenant's previous finish tag; the lowest start tag is served next
+        start_tag = max(queue.virtual_time, queue.tenant_finish.get(tenant, 0.0))
+        finish_tag = start_tag + cost / self.tenant_weights.get(tenant, 1.0)
+        queue.tenant_finish[tenant] = finish_tag
+
+        waiter = _Waiter(tenant, start_tag, asyncio.get_running_loop().create_future())
+        queue.submitted += 1
+        queue.push(waiter, next(self._seq))
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                queue.waiting -= 1
+            else:
+                # Cancelled after the slot was granted
+                self._release(queue)
+            raise
+
+        queue.queue_times.append(time.perf_counter() - waiter.enqueued)
+        try:
+            yield
+        finally:
+            queue.completed += 1
+            self._release(queue)
+
+    async def run(self, coro_fn, *args, priority: str = "interactive", tenant: str = "default", **kwargs):
+        """Run coro_fn(*args, **kwargs) once a slot is granted"""
+        async with self.slot(priority, tenant):
+            return await coro_fn(*args, **kwargs)
+
+    def _release(self, queue: _ClassQueue) -> None:
+        queue.in_flight -= 1
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.capacity:
+            for queue in self._by_priority:
+                if queue.in_flight < queue.limit and queue.waiting:
+                    waiter = queue.pop()
+                    if waiter is not None:
+                        break
+            else:
+                return
+            # Virtual time is the start tag of the request entering service
+            queue.virtual_time = max(queue.virtual_time, waiter.start_tag)
+            queue.in_flight += 1
+            self.in_flight += 1
+            waiter.future.set_result(None)
+
+    def metrics(self) -> Dict[str, Any]:
+        report = {}
+        for name, queue in self.classes.items():
+            samples = list(queue.queue_times)
+            report[name] = {
+                "submitted": queue.submitted,
+                "completed": queue.completed,
+                "waiting": queue.waiting,
+                "in_flight": queue.in_flight,
+                "limit": queue.limit,
+                "queue_p50_ms": percentile(samples, 50) * 1000,
+                "queue_p95_ms": percentile(samples, 95) * 1000,
+                "queue_p99_ms": percentile(samples, 99) * 1000,
+                "queue_max_ms": max(samples, default=0.0) * 1000
+            }
+        return report
+
+
+class ScheduledMCPClient:
+    """Routes MCPClient.call_tool / ask_question through a RequestScheduler"""
+
+    def __init__(self, client: Any, scheduler: RequestScheduler):
+        self.client = client
+        self.scheduler = scheduler
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any],
+                        priority: str = "interactive", tenant: str = "default") -> Dict[str, Any]:
+        async with self.scheduler.slot(priority, tenant):
+            return await self.client.call_tool(tool_name, arguments)
+
+    async def ask_question(self, repository: str, question: str,
+                           priority: str = "interactive", tenant: str = "default") -> Dict[str, Any]:
+        return await self.call_tool("ask_question", {"repoName": repository, "question": question},
+                                    priority=priority, tenant=tenant)
+
+
+class ScheduledClaudeClient:
+    """Routes ClaudeClient.send_message through a RequestScheduler, costed by quality class"""
+
+    def __init__(self, claude: Any, scheduler: RequestScheduler):
+        self.claude = claude
+        self.scheduler = scheduler
+
+    async def send_message(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None,
+                           quality: str = "standard", priority: str = "interactive",
+                           tenant: str = "default") -> Dict[str, Any]:
+        if quality not in QUALITY_COSTS:
+            raise ValueError(f"Unknown quality class {quality!r}, expected one of {list(QUALITY_COSTS)}")
+        async with self.scheduler.slot(priority, tenant, cost=QUALITY_COSTS[quality]):
+            return await self.claude.send_message(messages, tools, quality=quality)
+
+
+async def simulate(args, scheduled: bool) -> Dict[str, Any]:
+    """Interactive arrivals on top of saturating batch tenants, against the in-process tool server"""
+    import random
+
+    from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient
+    from local_tool_server import LocalToolServer
+    from mcp_transports import InProcessTransport
+
+    scheduler = RequestScheduler(capacity=args.capacity)
+    # Unscheduled baseline: one FIFO semaphore of the same capacity for everybody
+    semaphore = asyncio.Semaphore(args.capacity)
+    interactive: List[float] = []
+    batch_done = {f"batch-{i}": 0 for i in range(args.batch_tenants)}
+
+    async with MCPClient(transport=InProcessTransport(LocalToolServer(delay=args.upstream_latency))) as client:
+        await client.initialize()
+        mcp = ScheduledMCPClient(client, scheduler)
+
+        async def call(priority: str, tenant: str) -> None:
+            if scheduled:
+                await mcp.ask_question("openai/codex", "What is OpenAI Codex?", priority=priority, tenant=tenant)
+            else:
+                async with semaphore:
+                    await client.ask_question("openai/codex", "What is OpenAI Codex?")
+
+        async def batch_worker(tenant: str) -> None:
+            while True:
+                await call("batch", tenant)
+                batch_done[tenant] += 1
+
+        async def interactive_request() -> None:
+            start = time.perf_counter()
+            await call("interactive", "web")
+            interactive.append(time.perf_counter() - start)
+
+        workers = [asyncio.create_task(batch_worker(tenant))
+                   for tenant in batch_done for _ in range(args.batch_concurrency)]
+        rng = random.Random(0)
+        requests = []
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            requests.append(asyncio.create_task(interactive_request()))
+            await asyncio.sleep(rng.expovariate(args.rps))
+        await asyncio.gather(*requests)
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    report = {
+        "interactive_p50_ms": percentile(interactive, 50) * 1000,
+        "interactive_p99_ms": percentile(interactive, 99) * 1000,
+        "batch_completed": batch_done
+    }
+    if scheduled:
+        report["scheduler"] = scheduler.metrics()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interactive latency under batch saturation")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=20.0, help="Interactive request rate")
+    parser.add_argument("--batch-tenants", type=int, default=3)
+    parser.add_argument("--batch-concurrency", type=int, default=16, help="Concurrent requests per batch tenant")
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    logging.getLogger("deepwiki_anthropic_app_is_mcpclient_one_step").setLevel(logging.WARNING)
+    print(json.dumps({
+        "unscheduled": asyncio.run(simulate(args, scheduled=False)),
+        "scheduled": asyncio.run(simulate(args, scheduled=True))
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Speculative Deep Wiki Prefetch
+In the two-step flow the Deep Wiki query only starts once Claude's first response
+names repoName / question, so both latencies add up. The prefetcher guesses those
+arguments from the user prompt and starts ask_question while Claude is still thinking:
+- guesses come from a history of past (prompt -> tool input) pairs, matched by
+  character n-gram similarity, or else from a local extractor (owner/repo in the prompt)
+- when Claude's real arguments match the guess (same repo, near-identical question
+  after question_cache normalization) the prefetched answer is used
+- otherwise the speculative call is cancelled and the real one is made
+- progress of the speculative call is held back until resolve() and then handed to
+  its on_progress, so a prefetched answer streams like a direct call
+- hit rate, wasted upstream calls and time saved are reported
+
+Usage:
+    prefetcher = SpeculativePrefetcher(fetch, ArgumentGuesser("tool_history.jsonl"))
+    speculation = prefetcher.start(prompt)
+    response = await claude.send_message(...)
+    text = await prefetcher.resolve(speculation, repo_name, question, on_progress=print_progress)
+    # or prefetcher.discard(speculation)
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+
+from mcp_transports import ToolProgress
+from question_cache import NgramVectorizer, normalize_question, numeric_tokens
+
+logger = logging.getLogger(__name__)
+
+OnProgress = Callable[[ToolProgress], Any]
+# (repository, question, on_progress) -> answer text
+Fetch = Callable[[str, str, Optional[OnProgress]], Awaitable[str]]
+
+REPO_PATTERN = re.compile(r"\b([A-Za-z0-9][A-Za-z0-9_.-]*/[A-Za-z0-9][A-Za-z0-9_.-]*)\b")
+
+
+@dataclass
+class Guess:
+    repo_name: str
+    question: str
+    source: str  # "history" or "extractor"
+    similarity: float = 0.0
+
+
+class ArgumentGuesser:
+    """Predicts ask_question arguments from the user prompt"""
+
+    def __init__(self, history_file: Optional[str] = None, default_repo: Optional[str] = None,
+                 history_threshold: float = 0.8, vectorizer: Optional[NgramVectorizer] = None):
+        """
+        Args:
+            history_file: JSONL of past {"prompt", "repoName", "question"} records (appended to)
+            default_repo: Repository guessed when the prompt names none
+            history_threshold: Minimum prompt similarity for a past tool input to be reused
+            vectorizer: Prompt embedding, defaults to hashed character 3-grams
+        """
+        self.history_file = history_file
+        self.default_repo = default_repo
+        self.history_threshold = history_threshold
+        self.vectorizer = vectorizer or NgramVectorizer()
+        # Latest tool input per normalized prompt, with the prompt's vector
+        self.history: Dict[str, Dict[str, str]] = {}
+        self._vectors: Dict[str, Any] = {}
+        if history_file:
+            try:
+                with open(history_file) as f:
+                    for line in f:
+                        if line.strip():
+                            self._remember(json.loads(line))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, record: Dict[str, str]) -> None:
+        normalized = normalize_question(record["prompt"])
+        self.history[normalized] = record
+        if normalized not in self._vectors:
+            self._vectors[normalized] = self.vectorizer(normalized)
+
+    def guess(self, prompt: str) -> Optional[Guess]:
+        if self.history:
+            vector = self.vectorizer(normalize_question(prompt))
+            best, best_similarity = None, 0.0
+            for normalized, record in self.history.items():
+                similarity = float(vector @ self._vectors[normalized])
+                if similarity > best_similarity:
+                    best, best_similarity = record, similarity
+            if best_similarity >= self.history_threshold:
+                return Guess(best["repoName"], best["question"], "history", best_similarity)
+
+        match = REPO_PATTERN.search(prompt)
+        repo_name = match.group(1) if match else self.default_repo
+        if not repo_name:
+            return None
+        return Guess(repo_name, prompt, "extractor")
+
+    def record(self, prompt: str, repo_name: str, question: str) -> None:
+        """Remember the tool input Claude actually chose for this prompt"""
+        record = {"prompt": prompt, "repoName": repo_name, "question": question}
+        if self.history.get(normalize_question(prompt)) == record:
+            return
+        self._remember(record)
+        if self.history_file:
+            with open(self.history_file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+@dataclass
+class Speculation:
+    prompt: str
+    guess: Optional[Guess]
+    task: Optional[asyncio.Task] = None
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+    resolved: bool = False
+    # Progress of the speculative call, held until resolve() says who wants it
+    progress: List[ToolProgress] = field(default_factory=list)
+    on_progress: Optional[OnProgress] = None
+
+    async def relay(self, update: ToolProgress) -> None:
+        if self.on_progress is None:
+            self.progress.append(update)
+            return
+        outcome = self.on_progress(update)
+        if inspect.isawaitable(outcome):
+            await outcome
+
+    async def attach(self, on_progress: OnProgress) -> None:
+        """Replay the held-back progress to on_progress, then forward new updates as they come"""
+        while self.progress:
+            outcome = on_progress(self.progress.pop(0))
+            if inspect.isawaitable(outcome):
+                await outcome
+        self.on_progress = on_progress
+
+
+class SpeculativePrefetcher:
+    """Runs a guessed ask_question alongside the first Claude call"""
+
+    def __init__(self, fetch: Fetch, guesser: ArgumentGuesser, match_threshold: float = 0.92):
+        """
+        Args:
+            fetch: async (repository, question, on_progress) -> answer text, e.g. get_deepwiki_info
+            guesser: Predicts the tool arguments from the prompt
+            match_threshold: Question similarity at which the speculative answer is reused
+        """
+        self.fetch = fetch
+        self.guesser = guesser
+        self.match_threshold = match_threshold
+        self.stats = {"prompts": 0, "speculated": 0, "hits": 0, "misses": 0, "no_guess": 0,
+                      "unused": 0, "wasted_upstream_calls": 0, "saved_seconds": 0.0}
+
+    def start(self, prompt: str) -> Speculation:
+        """Guess the arguments and start the upstream call in the background"""
+        self.stats["prompts"] += 1
+        guess = self.guesser.guess(prompt)
+        speculation = Speculation(prompt, guess)
+        if guess is None:
+            self.stats["no_guess"] += 1
+            return speculation
+        self.stats["speculated"] += 1
+        logger.info(f"Speculating ask_question({guess.repo_name!r}, {guess.question!r}) from {guess.source}")
+        speculation.task = asyncio.create_task(self._prefetch(speculation))
+        return speculation
+
+    async def _prefetch(self, speculation: Speculation) -> str:
+        try:
+            return await self.fetch(speculation.guess.repo_name, speculation.guess.question, speculation.relay)
+        finally:
+            speculation.finished = time.perf_counter()
+
+    def matches(self, guess: Guess, repo_name: str, question: str) -> bool:
+        if guess.repo_name.lower() != repo_name.lower():
+            return False
+        guessed, actual = normalize_question(guess.question), normalize_question(question)
+        if guessed == actual:
+            return True
+        if numeric_tokens(guessed) != numeric_tokens(actual):
+            return False
+        vectorizer = self.guesser.vectorizer
+        return float(vectorizer(guessed) @ vectorizer(actual)) >= self.match_threshold
+
+    async def resolve(self, speculation: Speculation, repo_name: str, question: str,
+                      on_progress: Optional[OnProgress] = None) -> str:
+        """Answer for the real arguments, from the speculative call when it matches
+
+        on_progress gets the tool's progress updates either way, including those of the
+        speculative call that arrived before resolve().
+        """
+        speculation.resolved = True
+        self.guesser.record(speculation.prompt, repo_name, question)
+        if speculation.task is not None:
+            if self.matches(speculation.guess, repo_name, question):
+                waited_from = time.perf_counter()
+                if on_progress is not None:
+                    await speculation.attach(on_progress)
+                try:
+                    result = await speculation.task
+                except Exception as e:
+                    logger.warning(f"Speculative call failed ({e}), fetching again")
+                    self.stats["misses"] += 1
+                    self.stats["wasted_upstream_calls"] += 1
+                else:
+                    self.stats["hits"] += 1
+                    # Upstream time that overlapped the Claude call is latency the user did not see
+                    self.stats["saved_seconds"] += min(waited_from, speculation.finished) - speculation.started
+                    return result
+            else:
+                self.stats["misses"] += 1
+                self._cancel(speculation)
+        return await self.fetch(repo_name, question, on_progress)
+
+    def discard(self, speculation: Speculation) -> None:
+        """Claude did not call the tool: drop the speculative call (no-op once resolved)"""
+        if speculation.task is not None and not speculation.resolved:
+            speculation.resolved = True
+            self.stats["unused"] += 1
+            self._cancel(speculation)
+
+    def _cancel(self, speculation: Speculation) -> None:
+        speculation.task.cancel()
+        self.stats["wasted_upstream_calls"] += 1
+
+    def report(self) -> Dict[str, Any]:
+        speculated = self.stats["speculated"]
+        return dict(self.stats, hit_rate=self.stats["hits"] / speculated if speculated else 0.0)
+
+
+async def simulate(args) -> Dict[str, Any]:
+    """Prompts against the in-process tool server and a fake Claude that picks the tool input"""
+    from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient
+    from local_tool_server import LocalToolServer
+    from mcp_transports import InProcessTransport
+
+    # (prompt, what the fake Claude passes as repoName / question)
+    prompts = [
+        ("Based on its specification, provide a summary of the main points about OpenAI Codex",
+         "openai/codex", "What are the main points of the OpenAI Codex specification?"),
+        ("How does openai/codex sandbox shell commands?", "openai/codex", "How does Codex sandbox shell commands?"),
+        ("What is modelcontextprotocol/python-sdk?", "modelcontextprotocol/python-sdk",
+         "What is modelcontextprotocol/python-sdk?"),
+        ("Tell me a joke", None, None),
+    ]
+
+    async with MCPClient(transport=InProcessTransport(LocalToolServer(delay=args.upstream_latency))) as client:
+        await client.initialize()
+
+        async def fetch(repository: str, question: str, on_progress: Optional[OnProgress] = None) -> str:
+            result = await client.ask_question(repository, question, on_progress=on_progress)
+            return "".join(item.get("text", "") for item in result.get("content", []) if item.get("type") == "text")
+
+        prefetcher = SpeculativePrefetcher(fetch, ArgumentGuesser(args.history_file))
+        baseline = speculative = 0.0
+        # Progress updates the resolved calls passed on, speculative or not
+        updates: List[ToolProgress] = []
+        for _ in range(args.rounds):
+            for prompt, repo_name, question in prompts:
+                start = time.perf_counter()
+                await asyncio.sleep(args.claude_latency)
+                if repo_name:
+                    await fetch(repo_name, question)
+                baseline += time.perf_counter() - start
+
+                start = time.perf_counter()
+                speculation = prefetcher.start(prompt)
+                await asyncio.sleep(args.claude_latency)
+                if repo_name:
+                    await prefetcher.resolve(speculation, repo_name, question, on_progress=updates.append)
+                else:
+                    prefetcher.discard(speculation)
+                speculative += time.perf_counter() - start
+
+    return dict(prefetcher.report(), baseline_seconds=baseline, speculative_seconds=speculative,
+                progress_updates=len(updates))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speculative Deep Wiki prefetch simulation")
+    parser.add_argument("--rounds", type=int, default=3, help="Times the prompt set is replayed")
+    parser.add_argument("--claude-latency", type=float, default=0.8, help="Simulated first Claude turn")
+    parser.add_argument("--upstream-latency", type=float, default=1.0, help="Simulated ask_question latency")
+    parser.add_argument("--history-file", help="Persist past tool inputs here")
+    args = parser.parse_args()
+
+    logging.getLogger("deepwiki_anthropic_app_is_mcpclient_one_step").setLevel(logging.WARNING)
+    print(json.dumps(asyncio.run(simulate(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import asyncio
+
+from cache_warmer import RefreshAheadCache
+
+
+def test_concurrent_cold_gets_share_one_fetch():
+    calls = []
+
+    async def fetch(repository, question):
+        calls.append((repository, question))
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        cache = RefreshAheadCache(fetch, qps=1.0)
+        results = await asyncio.gather(*(cache.get("a/b", "q") for _ in range(3)), return_exceptions=True)
+        return cache, results
+
+    cache, results = asyncio.run(run())
+    assert results == ["answer"] * 3
+    assert calls == [("a/b", "q")]
+    assert cache.stats["preempted"] == 0
+
+
+def test_cold_get_preempts_queued_background_refresh():
+    async def fetch(repository, question):
+        return "answer"
+
+    async def run():
+        cache = RefreshAheadCache(fetch, qps=0.01)
+        cache.budget.tokens = 0
+        background = cache._schedule_refresh(("a/b", "q"), background=True)
+        await asyncio.sleep(0)
+        answer = await asyncio.wait_for(cache.get("a/b", "q"), timeout=1)
+        return cache, background, answer
+
+    cache, background, answer = asyncio.run(run())
+    assert answer == "answer"
+    assert background.cancelled()
+    assert cache.stats["preempted"] == 1
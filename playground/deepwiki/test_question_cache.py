@@ -0,0 +1,65 @@
+from question_cache import SimilarityQuestionCache, numeric_tokens, normalize_question
+
+ANSWER_2 = {"content": [{"type": "text", "text": "Python 2 answer"}]}
+ANSWER_3 = {"content": [{"type": "text", "text": "Python 3 answer"}]}
+
+
+def test_numeric_tokens():
+    assert numeric_tokens(normalize_question("Does it run on Python 3.11 and gpt-4?")) == {"3.11", "gpt-4"}
+    assert numeric_tokens(normalize_question("What is OpenAI Codex?")) == frozenset()
+
+
+def test_paraphrase_still_hits():
+    cache = SimilarityQuestionCache()
+    cache.store("openai/codex", "How does Codex sandbox shell commands?", ANSWER_3)
+    lookup = cache.lookup("openai/codex", "how does codex sandbox shell commands")
+    assert lookup.hit
+
+
+def test_different_version_is_not_served():
+    cache = SimilarityQuestionCache()
+    question = "How do I install the Codex CLI on Python 2?"
+    other = "How do I install the Codex CLI on Python 3?"
+    cache.store("openai/codex", question, ANSWER_2)
+    # The n-gram vectors alone would call these the same question
+    assert float(cache.vectorizer(normalize_question(question)) @ cache.vectorizer(normalize_question(other))) >= cache.threshold
+
+    assert not cache.lookup("openai/codex", other).hit
+    assert cache.lookup("openai/codex", "how do I install Codex CLI on python 2").answer is ANSWER_2
+
+
+def test_matching_version_is_found_among_others():
+    cache = SimilarityQuestionCache()
+    cache.store("openai/codex", "How do I install the Codex CLI on Python 2?", ANSWER_2)
+    cache.store("openai/codex", "How do I install the Codex CLI on Python 3?", ANSWER_3)
+    assert cache.lookup("openai/codex", "how do I install Codex CLI on python 3").answer is ANSWER_3
+
+
+def test_speculative_match_requires_same_version():
+    from speculative_prefetch import ArgumentGuesser, Guess, SpeculativePrefetcher
+
+    prefetcher = SpeculativePrefetcher(fetch=None, guesser=ArgumentGuesser())
+    guess = Guess("openai/codex", "How do I install the Codex CLI on Python 2?", "history")
+    assert prefetcher.matches(guess, "openai/codex", "how do I install Codex CLI on python 2")
+    assert not prefetcher.matches(guess, "openai/codex", "How do I install the Codex CLI on Python 3?")
+
+
+def test_full_index_reuses_oldest_row():
+    cache = SimilarityQuestionCache(max_entries_per_repo=3)
+    for topic in ["sandboxing", "configuration", "authentication", "streaming"]:
+        cache.store("openai/codex", f"How does Codex handle {topic}?", {"content": [{"type": "text", "text": topic}]})
+    index = cache.repos["openai/codex"]
+    assert len(index) == 3
+    assert not cache.lookup("openai/codex", "How does Codex handle sandboxing?").exact
+    assert cache.lookup("openai/codex", "How does Codex handle streaming?").answer["content"][0]["text"] == "streaming"
+    assert cache.lookup("openai/codex", "How does Codex handle configuration?").exact
+
+
+def test_exact_hits_count_only_equal_normalized_questions():
+    cache = SimilarityQuestionCache(threshold=0.5)
+    cache.store("openai/codex", "codex sandbox shell", ANSWER_3)
+    # Same tokens reordered: a hit, but not an exact one
+    assert cache.lookup("openai/codex", "shell sandbox codex").hit
+    assert cache.stats.exact_hits == 0
+    assert cache.lookup("openai/codex", "Codex sandbox shell?").exact
+    assert cache.stats.exact_hits == 1
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Offline trace processor for the Agents SDK.
+
+Records trace/span trees (agent turns, MCP list_tools / call_tool, model calls) into
+SQLite (in-memory by default) instead of exporting them to platform.openai.com, and
+computes per-span latency aggregates plus a critical-path breakdown per trace.
+
+Usage:
+    from agents import set_trace_processors
+    processor = LocalTraceProcessor("traces.db")
+    set_trace_processors([processor])   # replaces the OpenAI exporter
+    ...
+    print(json.dumps(processor.report(), indent=2))
+
+    python local_tracing.py traces.db   # summarize a stored database
+"""
+
+import json
+import sqlite3
+import statistics
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import TracingProcessor
+from agents.tracing import Span, Trace
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    trace_id TEXT PRIMARY KEY,
+    workflow_name TEXT,
+    started_at REAL,
+    ended_at REAL
+);
+CREATE TABLE IF NOT EXISTS spans (
+    span_id TEXT PRIMARY KEY,
+    trace_id TEXT NOT NULL,
+    parent_id TEXT,
+    span_type TEXT,
+    category TEXT,
+    name TEXT,
+    started_at REAL,
+    ended_at REAL,
+    duration_ms REAL,
+    error TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS spans_by_trace ON spans (trace_id);
+"""
+
+# Where critical-path time is attributed. MCP spans are client-side round trips: the gateway hop and
+# the tool's own run time are inside the same span and are not separated, so neither bucket is
+# "gateway" or "tool" time on its own
+BREAKDOWN = {
+    "model": "model",
+    "mcp_list_tools": "mcp_list_tools",
+    "mcp_call_tool": "mcp_call_tool",
+    "function": "local_tool",
+}
+
+BREAKDOWN_NOTE = ("mcp_list_tools / mcp_call_tool are client-side round trips: gateway overhead "
+                  "and tool execution are not measured separately")
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def classify(span_data: Any) -> Tuple[str, str]:
+    """Map SDK span data to a (category, name) pair"""
+    span_type = span_data.type
+    if span_type in ("generation", "response"):
+        model = getattr(span_data, "model", None)
+        response = getattr(span_data, "response", None)
+        return "model", model or getattr(response, "model", None) or span_type
+    if span_type == "mcp_tools":
+        return "mcp_list_tools", span_data.server or "mcp"
+    if span_type == "function":
+        if getattr(span_data, "mcp_data", None):
+            return "mcp_call_tool", span_data.name
+        return "function", span_data.name
+    return span_type, getattr(span_data, "name", None) or span_type
+
+
+class LocalTraceProcessor(TracingProcessor):
+    """TracingProcessor that keeps span trees in SQLite"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    # TracingProcessor hooks
+
+    def on_trace_start(self, trace: Trace) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO traces (trace_id, workflow_name, started_at) VALUES (?, ?, ?)",
+                (trace.trace_id, trace.name, datetime.now().timestamp())
+            )
+
+    def on_trace_end(self, trace: Trace) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE traces SET ended_at = ? WHERE trace_id = ?",
+                (datetime.now().timestamp(), trace.trace_id)
+            )
+            self._db.commit()
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        pass
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        category, name = classify(span.span_data)
+        started_at, ended_at = _timestamp(span.started_at), _timestamp(span.ended_at)
+        duration_ms = (ended_at - started_at) * 1000 if started_at and ended_at else None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    span.span_id, span.trace_id, span.parent_id, span.span_data.type, category, name,
+                    started_at, ended_at, duration_ms,
+                    json.dumps(span.error) if span.error else None,
+                    json.dumps(span.span_data.export(), default=str)
+                )
+            )
+
+    def shutdown(self) -> None:
+        self.force_flush()
+
+    def force_flush(self) -> None:
+        with self._lock:
+            self._db.commit()
+
+    # Analysis
+
+    def _spans(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT span_id, trace_id, parent_id, category, name, started_at, ended_at, duration_ms, error FROM spans"
+        params = ()
+        if trace_id:
+            query += " WHERE trace_id = ?"
+            params = (trace_id,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY started_at", params).fetchall()
+        keys = ("span_id", "trace_id", "parent_id", "category", "name", "started_at", "ended_at", "duration_ms", "error")
+        return [dict(zip(keys, row)) for row in rows if row[5] is not None and row[6] is not None]
+
+    def aggregates(self) -> List[Dict[str, Any]]:
+        """Latency statistics per (category, name)"""
+        groups: Dict[tuple, List[float]] = {}
+        errors: Dict[tuple, int] = {}
+        for span in self._spans():
+            key = (span["category"], span["name"])
+            groups.setdefault(key, []).append(span["duration_ms"])
+            errors[key] = errors.get(key, 0) + (1 if span["error"] else 0)
+
+        result = []
+        for (category, name), durations in sorted(groups.items(), key=lambda item: -sum(item[1])):
+            ordered = sorted(durations)
+            result.append({
+                "category": category,
+                "name": name,
+                "count": len(durations),
+                "errors": errors[(category, name)],
+                "total_ms": sum(durations),
+                "mean_ms": statistics.fmean(durations),
+                "p50_ms": ordered[len(ordered) // 2],
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max_ms": ordered[-1]
+            })
+        return result
+
+    def critical_path(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Spans on the critical path of a trace, each with its exclusive (self) time.
+
+        Walking back from a span's end, the child that finished last before the cursor is the
+        one the parent was waiting on; the gaps between chosen children are the parent's own time.
+        """
+        spans = self._spans(trace_id)
+        children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for span in spans:
+            children.setdefault(span["parent_id"], []).append(span)
+
+        path: List[Dict[str, Any]] = []
+
+        def walk(span: Dict[str, Any]) -> None:
+            cursor = span["ended_at"]
+            chosen = []
+            for child in sorted(children.get(span["span_id"], []), key=lambda c: c["ended_at"], reverse=True):
+                if child["ended_at"] <= cursor + 1e-6:
+                    chosen.append(child)
+                    cursor = child["started_at"]
+            waited = sum(child["ended_at"] - child["started_at"] for child in chosen)
+            path.append({
+                "span_id": span["span_id"],
+                "category": span["category"],
+                "name": span["name"],
+                "duration_ms": span["duration_ms"],
+                "self_ms": max(0.0, span["duration_ms"] - waited * 1000)
+            })
+            for child in reversed(chosen):
+                walk(child)
+
+        for root in children.get(None, []):
+            walk(root)
+        return path
+
+    def breakdown(self, trace_id: str) -> Dict[str, float]:
+        """Critical-path time per bucket (model / MCP round trips / local tools / agent overhead)"""
+        totals: Dict[str, float] = {}
+        for step in self.critical_path(trace_id):
+            bucket = BREAKDOWN.get(step["category"], "agent")
+            totals[bucket] = totals.get(bucket, 0.0) + step["self_ms"]
+        return totals
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            traces = self._db.execute("SELECT trace_id, workflow_name FROM traces ORDER BY started_at").fetchall()
+
+        per_trace = []
+        combined: Dict[str, float] = {}
+        for trace_id, workflow_name in traces:
+            breakdown = self.breakdown(trace_id)
+            for bucket, value in breakdown.items():
+                combined[bucket] = combined.get(bucket, 0.0) + value
+            per_trace.append({"trace_id": trace_id, "workflow_name": workflow_name, "critical_path_ms": breakdown})
+
+        total = sum(combined.values()) or 1.0
+        return {
+            "spans": self.aggregates(),
+            "traces": per_trace,
+            "critical_path_share": {bucket: value / total for bucket, value in combined.items()},
+            "note": BREAKDOWN_NOTE
+        }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    if not report["spans"]:
+        print("No spans were recorded")
+        return
+    print("Span latency (ms)")
+    print("=" * 78)
+    print(f"{'category':<16}{'name':<24}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}")
+    for row in report["spans"]:
+        print(f"{row['category']:<16}{str(row['name'])[:23]:<24}{row['count']:>7}"
+              f"{row['mean_ms']:>10.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}")
+    print("\nCritical path share")
+    print("-" * 40)
+    for bucket, share in sorted(report["critical_path_share"].items(), key=lambda item: -item[1]):
+        print(f"{bucket:<16}{share:>8.1%}")
+    print(f"\n({report['note']})")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python local_tracing.py traces.db")
+        sys.exit(1)
+    print_report(LocalTraceProcessor(sys.argv[1]).report())
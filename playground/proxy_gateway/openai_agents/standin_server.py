@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the gateway MCP endpoints used by transports.py.
+
+Serves the example tools (add, get_weather, get_secret_word) on both
+  http://localhost:8000/v1/mcp/sse     (legacy SSE transport)
+  http://localhost:8000/v1/mcp/stream  (Streamable HTTP transport)
+and counts HTTP requests / TCP connections per transport at
+  http://localhost:8000/v1/mcp/stats
+
+Usage:
+    uv run standin_server.py --port 8000 --tool-delay 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, Any
+
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+SSE_PATH = "/v1/mcp/sse"
+MESSAGE_PATH = "/v1/mcp/messages/"
+STREAM_PATH = "/v1/mcp/stream"
+STATS_PATH = "/v1/mcp/stats"
+
+TOOL_DELAY = 0.0
+
+mcp = FastMCP(
+    "Stand-in Gateway",
+    sse_path=SSE_PATH,
+    message_path=MESSAGE_PATH,
+    streamable_http_path=STREAM_PATH,
+)
+
+
+@mcp.tool()
+async def add(a: int, b: int) -> int:
+    """Add two numbers"""
+    await asyncio.sleep(TOOL_DELAY)
+    return a + b
+
+
+@mcp.tool()
+async def get_weather(city: str) -> str:
+    """Get the current weather for a city"""
+    await asyncio.sleep(TOOL_DELAY)
+    return f"The weather in {city} is {random.choice(['sunny', 'cloudy', 'rainy'])}."
+
+
+@mcp.tool()
+async def get_secret_word() -> str:
+    """Get the secret word"""
+    await asyncio.sleep(TOOL_DELAY)
+    return random.choice(["apple", "banana", "cherry"])
+
+
+class ConnectionStats:
+    """ASGI middleware counting requests, in-flight streams and TCP connections per transport"""
+
+    def __init__(self, app):
+        self.app = app
+        self.started = time.time()
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.peers: Dict[str, set] = {}
+
+    def _transport(self, path: str) -> str:
+        if path.startswith(STREAM_PATH):
+            return "stream"
+        if path.startswith(SSE_PATH) or path.startswith(MESSAGE_PATH):
+            return "sse"
+        return ""
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "uptime_s": time.time() - self.started,
+            "transports": {
+                name: dict(stats, tcp_connections=len(self.peers[name]))
+                for name, stats in self.stats.items()
+            }
+        }
+
+    async def __call__(self, scope, receive, send):
+        transport = self._transport(scope.get("path", "")) if scope["type"] == "http" else ""
+        if not transport:
+            return await self.app(scope, receive, send)
+
+        stats = self.stats.setdefault(transport, {"requests": 0, "in_flight": 0, "peak_in_flight": 0})
+        # Distinct client (host, port) pairs == distinct TCP connections seen by the server
+        self.peers.setdefault(transport, set()).add(tuple(scope.get("client") or ()))
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stats["in_flight"] -= 1
+
+
+def build_app() -> ConnectionStats:
+    sse_app = mcp.sse_app()
+    stream_app = mcp.streamable_http_app()
+
+    async def stats(request):
+        return JSONResponse(counted.snapshot())
+
+    app = Starlette(
+        routes=[*sse_app.routes, *stream_app.routes, Route(STATS_PATH, stats)],
+        lifespan=lambda app: mcp.session_manager.run(),
+    )
+    counted = ConnectionStats(app)
+    return counted
+
+
+def main():
+    global TOOL_DELAY
+
+    parser = argparse.ArgumentParser(description="Local stand-in MCP gateway")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--tool-delay", type=float, default=0.0, help="Simulated tool latency in seconds")
+    args = parser.parse_args()
+
+    TOOL_DELAY = args.tool_delay
+    uvicorn.run(build_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
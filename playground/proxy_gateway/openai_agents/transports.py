@@ -1,19 +1,40 @@
 #!/usr/bin/env python3
 """
 This example uses a local SSE server & local Streamable HTTP server.
+
+Run as a benchmark driver (K concurrent agents per transport, JSON report):
+    uv run standin_server.py --port 8000 &
+    uv run transports.py --bench --mode direct --concurrency 16 --requests 50 --report report.json
 """
 
+import argparse
 import asyncio
+import json
 import os
+import random
 import shutil
+import statistics
 import subprocess
 import time
-from typing import Any
+import urllib.request
+from typing import Any, Dict, List, Optional
 
-from agents import Agent, Runner, gen_trace_id, trace
+from agents import Agent, Runner, gen_trace_id, set_trace_processors, trace
 from agents.mcp import MCPServer, MCPServerSse
 from agents.mcp import MCPServer, MCPServerStreamableHttp
 from agents.model_settings import ModelSettings
+from agents.tracing import function_span, mcp_tools_span
+
+from local_tracing import LocalTraceProcessor, print_report
+
+# Set by --local-trace: spans are kept locally instead of being exported to platform.openai.com
+LOCAL_TRACES: Optional[LocalTraceProcessor] = None
+
+def print_trace_location(trace_id: str):
+    if LOCAL_TRACES is not None:
+        print(f"Trace recorded locally: {trace_id} ({LOCAL_TRACES.path})\n")
+    else:
+        print(f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}\n")
 
 async def run(mcp_server: MCPServer):
     agent = Agent(
@@ -50,7 +71,7 @@ async def main_sse():
     ) as server:
         trace_id = gen_trace_id()
         with trace(workflow_name="SSE Example", trace_id=trace_id):
-            print(f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}\n")
+            print_trace_location(trace_id)
             await run(server)
 
 async def main_stream():
@@ -62,16 +83,213 @@ async def main_stream():
     ) as server:
         trace_id = gen_trace_id()
         with trace(workflow_name="Streamable HTTP Example", trace_id=trace_id):
-            print(f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}\n")
+            print_trace_location(trace_id)
             await run(server)
 
+# Prompt mixes for the benchmark: each entry is the agent prompt plus the tool call it
+# maps to, so "direct" mode can exercise the transport without a model in the loop.
+PROMPT_MIXES: Dict[str, List[Dict[str, Any]]] = {
+    "example": [
+        {"prompt": "Add these numbers: 7 and 22.", "tool": "add", "arguments": {"a": 7, "b": 22}, "weight": 1},
+        {"prompt": "What's the weather in Tokyo?", "tool": "get_weather", "arguments": {"city": "Tokyo"}, "weight": 1},
+        {"prompt": "What's the secret word?", "tool": "get_secret_word", "arguments": {}, "weight": 1},
+    ],
+    "math-heavy": [
+        {"prompt": "Add these numbers: 7 and 22.", "tool": "add", "arguments": {"a": 7, "b": 22}, "weight": 8},
+        {"prompt": "What's the weather in Tokyo?", "tool": "get_weather", "arguments": {"city": "Tokyo"}, "weight": 1},
+        {"prompt": "What's the secret word?", "tool": "get_secret_word", "arguments": {}, "weight": 1},
+    ],
+}
+
+TRANSPORT_PATHS = {
+    "sse": "/v1/mcp/sse",
+    "stream": "/v1/mcp/stream",
+}
+
+def make_server(transport: str, base_url: str, cache_tools_list: bool) -> MCPServer:
+    url = base_url.rstrip("/") + TRANSPORT_PATHS[transport]
+    if transport == "sse":
+        return MCPServerSse(name="SSE Server", params={"url": url}, cache_tools_list=cache_tools_list)
+    return MCPServerStreamableHttp(name="Streamable HTTP Server", params={"url": url}, cache_tools_list=cache_tools_list)
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+async def fetch_server_stats(base_url: str) -> Dict[str, Any]:
+    """Connection counters from standin_server.py (empty if the server does not expose them)"""
+    def fetch():
+        with urllib.request.urlopen(base_url.rstrip("/") + "/v1/mcp/stats", timeout=5) as response:
+            return json.loads(response.read())
+    try:
+        return await asyncio.to_thread(fetch)
+    except Exception:
+        return {}
+
+async def direct_request(server: MCPServer, entry: Dict[str, Any]):
+    """Same MCP traffic an agent turn produces: tools/list (unless cached) + tools/call"""
+    arguments = entry.get("arguments", {})
+    if LOCAL_TRACES is None:
+        await server.list_tools()
+        await server.call_tool(entry["tool"], arguments)
+        return
+
+    # Without Runner.run the SDK opens no trace or spans, so record the ones an agent turn would
+    with trace(f"Bench {server.name}"):
+        with mcp_tools_span(server=server.name) as span:
+            tools = await server.list_tools()
+            span.span_data.result = [tool.name for tool in tools]
+        with function_span(entry["tool"], input=json.dumps(arguments)) as span:
+            span.span_data.mcp_data = {"server": server.name}
+            result = await server.call_tool(entry["tool"], arguments)
+            span.span_data.output = json.dumps(result.model_dump(), default=str)
+
+async def bench_worker(transport: str, worker_id: int, args, mix: List[Dict[str, Any]], results: Dict[str, list]):
+    rng = random.Random(args.seed + worker_id)
+    weights = [entry.get("weight", 1) for entry in mix]
+
+    start = time.perf_counter()
+    async with make_server(transport, args.base_url, args.cache_tools_list) as server:
+        results["setup"].append(time.perf_counter() - start)
+        agent = Agent(
+            name="Assistant",
+            instructions="Use the tools to answer the questions.",
+            mcp_servers=[server],
+            model_settings=ModelSettings(tool_choice="required"),
+        )
+
+        for _ in range(args.requests):
+            entry = rng.choices(mix, weights=weights)[0]
+            request_start = time.perf_counter()
+            try:
+                if args.mode == "agent":
+                    await Runner.run(starting_agent=agent, input=entry["prompt"])
+                else:
+                    await direct_request(server, entry)
+                results["latency"].append(time.perf_counter() - request_start)
+            except Exception as e:
+                results["errors"].append(f"{entry['tool']}: {e}")
+
+async def bench_transport(transport: str, args, mix: List[Dict[str, Any]]) -> Dict[str, Any]:
+    results: Dict[str, list] = {"setup": [], "latency": [], "errors": []}
+    stats_before = await fetch_server_stats(args.base_url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bench_worker(transport, i, args, mix, results) for i in range(args.concurrency)))
+    wall = time.perf_counter() - start
+
+    stats_after = await fetch_server_stats(args.base_url)
+    before = stats_before.get("transports", {}).get(transport, {})
+    after = stats_after.get("transports", {}).get(transport, {})
+
+    return {
+        "wall_s": wall,
+        "throughput_rps": len(results["latency"]) / wall if wall else 0.0,
+        "latency": latency_summary(results["latency"]),
+        "session_setup": latency_summary(results["setup"]),
+        "errors": len(results["errors"]),
+        "error_samples": results["errors"][:5],
+        "connections": {
+            "client_sessions": len(results["setup"]),
+            "http_requests": after.get("requests", 0) - before.get("requests", 0),
+            "tcp_connections": after.get("tcp_connections", 0) - before.get("tcp_connections", 0),
+            "peak_in_flight": after.get("peak_in_flight", 0),
+        },
+    }
+
+async def main_bench(args):
+    if args.mix_file:
+        with open(args.mix_file) as f:
+            mix = json.load(f)
+    else:
+        mix = PROMPT_MIXES[args.mix]
+
+    report: Dict[str, Any] = {
+        "config": {
+            "base_url": args.base_url,
+            "mode": args.mode,
+            "concurrency": args.concurrency,
+            "requests_per_agent": args.requests,
+            "mix": args.mix_file or args.mix,
+            "cache_tools_list": args.cache_tools_list,
+        },
+        "transports": {},
+    }
+
+    for transport in args.transports.split(","):
+        print(f"Benchmarking {transport}: {args.concurrency} agents x {args.requests} requests ({args.mode})")
+        report["transports"][transport] = await bench_transport(transport, args, mix)
+
+    sse, stream = report["transports"].get("sse"), report["transports"].get("stream")
+    if sse and stream and sse["latency"]["p50_ms"] and sse["throughput_rps"]:
+        report["comparison"] = {
+            "stream_vs_sse_p50": stream["latency"]["p50_ms"] / sse["latency"]["p50_ms"],
+            "stream_vs_sse_p99": stream["latency"]["p99_ms"] / sse["latency"]["p99_ms"],
+            "stream_vs_sse_throughput": stream["throughput_rps"] / sse["throughput_rps"],
+        }
+
+    if LOCAL_TRACES is not None:
+        report["tracing"] = LOCAL_TRACES.report()
+        if args.report:
+            print()
+            print_report(report["tracing"])
+
+    output = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(output)
+        print(f"Report written to {args.report}")
+    else:
+        print(output)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SSE vs Streamable HTTP example / benchmark driver")
+    parser.add_argument("--bench", action="store_true", help="Run the concurrent benchmark instead of the example")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--transports", default="sse,stream", help="Comma separated subset of: sse, stream")
+    parser.add_argument("--mode", choices=["direct", "agent"], default="direct",
+                        help="direct: MCP calls only (offline); agent: full Runner.run with a model")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent agents per transport")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per agent")
+    parser.add_argument("--mix", choices=sorted(PROMPT_MIXES), default="example")
+    parser.add_argument("--mix-file", help="JSON list of {prompt, tool, arguments, weight} entries")
+    parser.add_argument("--cache-tools-list", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--local-trace", nargs="?", const=":memory:", metavar="SQLITE_PATH",
+                        help="Record traces locally (in memory, or in the given SQLite file) instead of exporting them")
+    return parser.parse_args()
+
 async def main():
     # Server-Sent Events (SSE) - Deprecated, The legacy SSE transport enabled server-to-client streaming with HTTP POST requests for client-to-server communication.
     await main_sse()
     # Streamable HTTP - The Streamable HTTP transport uses HTTP POST requests for client-to-server communication and optional Server-Sent Events (SSE) streams for server-to-client communication.
     await main_stream()
 
+    if LOCAL_TRACES is not None:
+        print()
+        print_report(LOCAL_TRACES.report())
+
 if __name__ == "__main__":
+    args = parse_args()
+
+    if args.local_trace:
+        LOCAL_TRACES = LocalTraceProcessor(args.local_trace)
+        set_trace_processors([LOCAL_TRACES])
+
     # Let's make sure the user has uv installed
     if not shutil.which("uv"):
         raise RuntimeError(
@@ -79,6 +297,6 @@ if __name__ == "__main__":
         )
 
     try:
-        asyncio.run(main())
+        asyncio.run(main_bench(args) if args.bench else main())
     except Exception as e:
         print(f"Error occurred while running main(): {e}")
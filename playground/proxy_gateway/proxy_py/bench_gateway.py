@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Gateway Benchmark
+Client-side latency of Deep Wiki style lookups with and without the gateway.
+
+Each lookup follows get_deepwiki_info: open a session, initialize, tools/list,
+ask_question. Directly, every lookup pays the upstream handshake; through the
+gateway, the handshake ends at the gateway and the upstream sessions are pooled.
+Upstream is local_tool_server.py with a simulated tool latency.
+
+Usage:
+    python bench_gateway.py --lookups 200 --concurrency 8 --repeat-ratio 0.5 --tool-delay 0.2
+    python bench_gateway.py --loop uvloop --monitor   # uvloop in the client and the gateway, loop health report
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import statistics
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "deepwiki"))
+
+from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient  # noqa: E402
+from loop_monitor import LoopMonitor, MCP_METHODS, instrument, run  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+TOOL_SERVER = str(HERE.parents[1] / "deepwiki" / "local_tool_server.py")
+GATEWAY = str(HERE / "gateway.py")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples: List[float], wall: float) -> Dict[str, float]:
+    return {
+        "lookups": len(samples),
+        "throughput_rps": len(samples) / wall,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000
+    }
+
+
+async def lookup(url: str, tool_name: str, question: str, monitor: Optional[LoopMonitor] = None) -> None:
+    async with MCPClient(url) as client:
+        if monitor:
+            instrument(monitor, client, MCP_METHODS)
+        await client.initialize()
+        await client.list_tools()
+        await client.call_tool(tool_name, {"repoName": "openai/codex", "question": question})
+
+
+async def run_lookups(url: str, tool_name: str, questions: List[str], concurrency: int,
+                      monitor: Optional[LoopMonitor] = None) -> Dict[str, float]:
+    samples: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for question in questions:
+        queue.put_nowait(question)
+
+    async def worker():
+        while not queue.empty():
+            question = queue.get_nowait()
+            start = time.perf_counter()
+            await lookup(url, tool_name, question, monitor)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def make_questions(count: int, repeat_ratio: float, seed: int) -> List[str]:
+    """Question stream where roughly repeat_ratio of the lookups repeat an earlier question"""
+    rng = random.Random(seed)
+    questions: List[str] = []
+    for i in range(count):
+        if questions and rng.random() < repeat_ratio:
+            questions.append(rng.choice(questions))
+        else:
+            questions.append(f"What is OpenAI Codex? (variant {i})")
+    return questions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Client-side latency with and without the gateway")
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat-ratio", type=float, default=0.5)
+    parser.add_argument("--tool-delay", type=float, default=0.2, help="Simulated upstream tool latency (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--loop", choices=("asyncio", "uvloop"), default="asyncio",
+                        help="Event loop for the benchmark client and the gateway")
+    parser.add_argument("--monitor", action="store_true", help="Report client event-loop lag and MCP call CPU time")
+    return parser.parse_args()
+
+
+async def main(args):
+    logging.getLogger().setLevel(logging.WARNING)
+    monitor = LoopMonitor() if args.monitor else None
+    if monitor:
+        monitor.start()
+
+    upstream_port, gateway_port = free_port(), free_port()
+    upstream = await asyncio.create_subprocess_exec(
+        sys.executable, TOOL_SERVER, "--http", "--port", str(upstream_port), "--delay", str(args.tool_delay),
+        stdout=asyncio.subprocess.DEVNULL)
+    gateway = None
+    try:
+        await wait_for_port(upstream_port)
+        gateway = await asyncio.create_subprocess_exec(
+            sys.executable, GATEWAY, "--upstream", f"deepwiki=http://127.0.0.1:{upstream_port}/mcp",
+            "--port", str(gateway_port), "--max-concurrency", str(args.concurrency), "--loop", args.loop,
+            "--cacheable-tool", "ask_question", stdout=asyncio.subprocess.DEVNULL)
+        await wait_for_port(gateway_port)
+
+        questions = make_questions(args.lookups, args.repeat_ratio, args.seed)
+        report: Dict[str, Any] = {
+            "config": vars(args),
+            "direct": await run_lookups(f"http://127.0.0.1:{upstream_port}/mcp", "ask_question",
+                                        questions, args.concurrency, monitor),
+            "gateway": await run_lookups(f"http://127.0.0.1:{gateway_port}/v1/mcp/stream", "deepwiki__ask_question",
+                                         questions, args.concurrency, monitor)
+        }
+        with urllib.request.urlopen(f"http://127.0.0.1:{gateway_port}/v1/mcp/stats") as response:
+            report["gateway_stats"] = json.loads(response.read())
+    finally:
+        for process in (gateway, upstream):
+            if process is not None and process.returncode is None:
+                process.terminate()
+                await process.wait()
+
+    if monitor:
+        await monitor.stop()
+        report["loop_monitor"] = monitor.report()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(main(args), args.loop)
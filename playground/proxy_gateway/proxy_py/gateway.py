@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+MCP Aggregating Gateway (Python asyncio)
+Terminates client MCP sessions on /v1/mcp/stream (Streamable HTTP) and /v1/mcp/sse
+(legacy SSE) and multiplexes them onto pooled upstream sessions built from the
+deepwiki MCPClient:
+- tools/list merges the catalogs of all upstreams, prefixing names with "<upstream>__"
+- tools/call results of idempotent tools are cached (TTL + LRU) and identical
+  in-flight calls are coalesced into a single upstream request
+- every upstream has its own concurrency limit
+
+Usage:
+    python gateway.py --upstream deepwiki=https://mcp.deepwiki.com/mcp --port 8000
+    python gateway.py --config upstreams.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "deepwiki"))
+
+from deepwiki_anthropic_app_is_mcpclient_one_step import MCPClient  # noqa: E402
+from mcp_transports import HttpStatusError, StdioTransport, StreamableHttpTransport  # noqa: E402
+from loop_monitor import new_event_loop  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOOL_SEPARATOR = "__"
+PROTOCOL_VERSION = "2024-11-05"
+
+# Streamable HTTP clients rarely send DELETE, so idle sessions are dropped after this many seconds
+SESSION_IDLE_TTL = 600.0
+
+# Safe to send twice: a failed attempt of these may be retried even if the upstream saw it
+IDEMPOTENT_METHODS = {"initialize", "ping", "tools/list"}
+
+
+def never_reached_upstream(error: Exception) -> bool:
+    """True when a failed request provably was not executed by the upstream"""
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return True
+    # The upstream forgot the session and rejected the message without running it
+    return isinstance(error, HttpStatusError) and error.status == 404
+
+
+@dataclass
+class UpstreamConfig:
+    """Registered tool server (mirrors the /v1/admin/tools registration payload)"""
+    name: str
+    endpoint: Optional[str] = None
+    command: Optional[List[str]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    pool_size: int = 2
+    max_concurrency: int = 8
+    request_timeout: float = 120.0  # Seconds per upstream request
+    # Tools whose results may be cached by arguments, besides those annotated read-only / idempotent
+    cacheable_tools: List[str] = field(default_factory=list)
+
+
+class ResultCache:
+    """TTL + LRU cache of tool results"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Tuple, result: Dict[str, Any]) -> None:
+        self.entries[key] = (time.monotonic(), result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class UpstreamPool:
+    """A fixed set of initialized MCP sessions to one upstream, behind a concurrency limit"""
+
+    def __init__(self, config: UpstreamConfig):
+        self.config = config
+        self.clients: List[MCPClient] = []
+        self._reconnect_locks: List[asyncio.Lock] = []
+        self.semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.tools: List[Dict[str, Any]] = []
+        self.cacheable: set = set(config.cacheable_tools)
+        self._next = 0
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.queue_wait = 0.0
+        self.retries = 0
+        self.reconnects = 0
+        self.timeouts = 0
+
+    def _new_client(self) -> MCPClient:
+        if self.config.command:
+            return MCPClient(transport=StdioTransport(self.config.command))
+        return MCPClient(transport=StreamableHttpTransport(self.config.endpoint, headers=self.config.headers))
+
+    async def _connect(self) -> MCPClient:
+        client = self._new_client()
+        await client.__aenter__()
+        try:
+            await asyncio.wait_for(client.initialize(), self.config.request_timeout)
+        except BaseException:
+            await client.__aexit__(None, None, None)
+            raise
+        return client
+
+    async def _reconnect(self, index: int, broken: MCPClient) -> MCPClient:
+        """Replace a broken session; concurrent failures on the same session reconnect it only once"""
+        async with self._reconnect_locks[index]:
+            if self.clients[index] is broken:
+                logger.warning(f"Upstream {self.config.name} session {index} broken, reconnecting")
+                await broken.__aexit__(None, None, None)
+                self.clients[index] = await self._connect()
+                self.reconnects += 1
+            return self.clients[index]
+
+    async def start(self) -> None:
+        self.clients = list(await asyncio.gather(*(self._connect() for _ in range(self.config.pool_size))))
+        self._reconnect_locks = [asyncio.Lock() for _ in self.clients]
+        self.tools = (await self.clients[0].list_tools()).get("tools", [])
+        for tool in self.tools:
+            annotations = tool.get("annotations") or {}
+            if annotations.get("idempotentHint") or annotations.get("readOnlyHint"):
+                self.cacheable.add(tool["name"])
+        logger.info(f"Upstream {self.config.name}: {self.config.pool_size} sessions, "
+                    f"tools {[tool.get('name') for tool in self.tools]}")
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(client.__aexit__(None, None, None) for client in self.clients),
+                             return_exceptions=True)
+
+    async def _send(self, client: MCPClient, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(client.send_streaming_request(client.create_request(method, params)),
+                                          self.config.request_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a request on the next pooled session.
+
+        A failed request is retried once on a fresh session only when the upstream cannot have
+        run it (connection refused, session expired) or when the method is idempotent; a
+        tools/call that timed out or lost its connection mid-flight may have run and is not resent.
+        """
+        queued = time.monotonic()
+        async with self.semaphore:
+            self.queue_wait += time.monotonic() - queued
+            self.calls += 1
+            self.in_flight += 1
+            index = self._next
+            self._next = (self._next + 1) % len(self.clients)
+            try:
+                client = self.clients[index]
+                if not client.transport.connected:
+                    # e.g. the stdio tool server exited; nothing has been sent on this session yet
+                    client = await self._reconnect(index, client)
+                try:
+                    return await self._send(client, method, params)
+                except Exception as e:
+                    if not (never_reached_upstream(e) or method in IDEMPOTENT_METHODS):
+                        raise
+                    logger.warning(f"Upstream {self.config.name} session {index} failed on {method} ({e}), retrying")
+                    self.retries += 1
+                    client = await self._reconnect(index, client)
+                    return await self._send(client, method, params)
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.clients),
+            "max_concurrency": self.config.max_concurrency,
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "reconnects": self.reconnects,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "queue_wait_s": self.queue_wait
+        }
+
+
+class MCPGateway:
+    """Routes client JSON-RPC messages to upstream pools"""
+
+    def __init__(self, upstreams: List[UpstreamConfig], cache: Optional[ResultCache] = None):
+        """
+        Args:
+            upstreams: Tool servers to aggregate
+            cache: Result cache for idempotent tools; None disables caching and call coalescing
+        """
+        self.pools: Dict[str, UpstreamPool] = {config.name: UpstreamPool(config) for config in upstreams}
+        self.cache = cache
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def start(self) -> None:
+        await asyncio.gather(*(pool.start() for pool in self.pools.values()))
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(pool.stop() for pool in self.pools.values()))
+
+    def open_session(self, transport: str, **extra) -> str:
+        now = time.time()
+        for session_id, session in list(self.sessions.items()):
+            if "queue" not in session and now - session["last_seen"] > SESSION_IDLE_TTL:
+                del self.sessions[session_id]
+        session_id = str(uuid.uuid4())
+        self.sessions[session_id] = {"created": now, "last_seen": now, "transport": transport, **extra}
+        return session_id
+
+    def merged_tools(self) -> List[Dict[str, Any]]:
+        tools = []
+        for name, pool in self.pools.items():
+            for tool in pool.tools:
+                tool = dict(tool, name=f"{name}{TOOL_SEPARATOR}{tool['name']}")
+                tool["description"] = f"[{name}] {tool.get('description', '')}"
+                tools.append(tool)
+        return tools
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Route a prefixed tool call; returns the upstream JSON-RPC response (result or error)"""
+        upstream, _, tool = name.partition(TOOL_SEPARATOR)
+        pool = self.pools.get(upstream)
+        if pool is None or not tool:
+            return {"error": {"code": -32602, "message": f"Unknown tool: {name}"}}
+
+        if self.cache is None or tool not in pool.cacheable:
+            return await pool.request("tools/call", {"name": tool, "arguments": arguments})
+
+        key = (upstream, tool, json.dumps(arguments, sort_keys=True))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {"result": cached}
+
+        # Single flight: identical calls already on their way upstream share the response
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await pool.request("tools/call", {"name": tool, "arguments": arguments})
+            result = response.get("result")
+            if "error" not in response and result is not None and not result.get("isError"):
+                self.cache.put(key, result)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+            if not future.done():
+                # The leader was cancelled (client gone, timeout); its followers must not wait forever
+                future.set_exception(RuntimeError(f"Coalesced call to {name} was cancelled"))
+                future.exception()
+
+    async def handle(self, session_id: str, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Handle one client message; returns None for notifications"""
+        if "id" not in message:
+            return None
+
+        method = message.get("method")
+        params = message.get("params") or {}
+        try:
+            if method == "initialize":
+                response = {"result": {
+                    "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                    "capabilities": {"tools": {"listChanged": False}},
+                    "serverInfo": {"name": "javelin-py-gateway", "version": "1.0.0"}
+                }}
+            elif method == "tools/list":
+                response = {"result": {"tools": self.merged_tools()}}
+            elif method == "tools/call":
+                response = await self.call_tool(params.get("name", ""), params.get("arguments") or {})
+            elif method == "ping":
+                response = {"result": {}}
+            else:
+                response = {"error": {"code": -32601, "message": f"Method not found: {method}"}}
+        except Exception as e:
+            logger.error(f"Gateway error on {method}: {e}")
+            response = {"error": {"code": -32603, "message": f"Upstream error: {e}"}}
+
+        reply = {"jsonrpc": "2.0", "id": message["id"]}
+        if "error" in response:
+            reply["error"] = response["error"]
+        else:
+            reply["result"] = response.get("result", {})
+        return reply
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "client_sessions": len(self.sessions),
+            "cache": {
+                "entries": len(self.cache.entries),
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+                "coalesced": self.coalesced
+            } if self.cache is not None else None,
+            "upstreams": {name: pool.stats() for name, pool in self.pools.items()}
+        }
+
+
+def build_app(gateway: MCPGateway) -> web.Application:
+    """aiohttp application exposing the gateway over Streamable HTTP and legacy SSE"""
+    background_tasks = set()
+
+    async def handle_stream(request: web.Request) -> web.Response:
+        session_id = request.headers.get("Mcp-Session-Id")
+        message = await request.json()
+        if message.get("method") == "initialize" or not session_id:
+            session_id = gateway.open_session("stream")
+        elif session_id not in gateway.sessions:
+            return web.Response(status=404, text="Unknown session")
+        else:
+            gateway.sessions[session_id]["last_seen"] = time.time()
+
+        reply = await gateway.handle(session_id, message)
+        if reply is None:
+            return web.Response(status=202, headers={"Mcp-Session-Id": session_id})
+        return web.json_response(reply, headers={"Mcp-Session-Id": session_id})
+
+    async def delete_stream(request: web.Request) -> web.Response:
+        gateway.sessions.pop(request.headers.get("Mcp-Session-Id", ""), None)
+        return web.Response(status=200)
+
+    async def handle_sse(request: web.Request) -> web.StreamResponse:
+        queue: asyncio.Queue = asyncio.Queue()
+        session_id = gateway.open_session("sse", queue=queue)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        await response.write(f"event: endpoint\ndata: /v1/mcp/messages?session_id={session_id}\n\n".encode())
+        try:
+            while True:
+                reply = await queue.get()
+                await response.write(f"event: message\ndata: {json.dumps(reply)}\n\n".encode())
+        except (asyncio.CancelledError, ConnectionResetError):
+            pass
+        finally:
+            gateway.sessions.pop(session_id, None)
+        return response
+
+    async def handle_sse_message(request: web.Request) -> web.Response:
+        session = gateway.sessions.get(request.query.get("session_id", ""))
+        if session is None or "queue" not in session:
+            return web.Response(status=404, text="Unknown session")
+        message = await request.json()
+
+        async def respond():
+            reply = await gateway.handle(request.query["session_id"], message)
+            if reply is not None:
+                await session["queue"].put(reply)
+
+        # Replies travel over the event stream, so the POST is acknowledged immediately
+        task = asyncio.create_task(respond())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        return web.Response(status=202, text="Accepted")
+
+    async def handle_stats(request: web.Request) -> web.Response:
+        return web.json_response(gateway.stats())
+
+    async def on_startup(app: web.Application) -> None:
+        await gateway.start()
+
+    async def on_cleanup(app: web.Application) -> None:
+        await gateway.stop()
+
+    app = web.Application()
+    app.router.add_post("/v1/mcp/stream", handle_stream)
+    app.router.add_delete("/v1/mcp/stream", delete_stream)
+    app.router.add_get("/v1/mcp/sse", handle_sse)
+    app.router.add_post("/v1/mcp/messages", handle_sse_message)
+    app.router.add_get("/v1/mcp/stats", handle_stats)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def load_upstreams(args) -> List[UpstreamConfig]:
+    upstreams = []
+    if args.config:
+        with open(args.config) as f:
+            for entry in json.load(f):
+                upstreams.append(UpstreamConfig(**entry))
+    for spec in args.upstream or []:
+        name, _, endpoint = spec.partition("=")
+        upstreams.append(UpstreamConfig(name=name, endpoint=endpoint, pool_size=args.pool_size,
+                                        max_concurrency=args.max_concurrency,
+                                        request_timeout=args.request_timeout,
+                                        cacheable_tools=args.cacheable_tool or []))
+    if not upstreams:
+        raise SystemExit("No upstreams configured: use --upstream name=url or --config file.json")
+    return upstreams
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Python asyncio MCP aggregating gateway")
+    parser.add_argument("--upstream", action="append", metavar="NAME=URL", help="Streamable HTTP upstream")
+    parser.add_argument("--config", help="JSON list of UpstreamConfig entries")
+    parser.add_argument("--pool-size", type=int, default=2, help="Upstream sessions per --upstream")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Concurrent calls per --upstream")
+    parser.add_argument("--request-timeout", type=float, default=120.0, help="Seconds per upstream request")
+    parser.add_argument("--cacheable-tool", action="append", metavar="TOOL",
+                        help="Cache results of this tool of every --upstream (repeatable)")
+    parser.add_argument("--cache-ttl", type=float, default=300.0)
+    parser.add_argument("--cache-entries", type=int, default=1024)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--loop", choices=("asyncio", "uvloop"), default="asyncio", help="Event loop implementation")
+    args = parser.parse_args()
+
+    upstreams = load_upstreams(args)
+    cache = None if args.no_cache else ResultCache(max_entries=args.cache_entries, ttl=args.cache_ttl)
+
+    # Per-message INFO logs from the upstream clients would swamp the gateway log
+    logging.getLogger("deepwiki_anthropic_app_is_mcpclient_one_step").setLevel(logging.WARNING)
+
+    gateway = MCPGateway(upstreams, cache)
+    # The startup banner goes to the log, keeping stdout clean for callers that parse it
+    web.run_app(build_app(gateway), host=args.host, port=args.port, access_log=None,
+                print=logger.info, loop=new_event_loop(args.loop))
+
+
+if __name__ == "__main__":
+    main()